@@ -202,12 +202,18 @@ class ProjectOwnershipEndpoint(ProjectEndpoint):
         ):
             return
 
-        ownership.schema = create_schema_from_issue_owners(
+        schema = create_schema_from_issue_owners(
             project_id=project.id,
             issue_owners=ownership.raw,
             add_owner_ids=True,
             remove_deleted_owners=True,
         )
+        if schema == ownership.schema:
+            return
+
+        # Saving bumps `last_updated`, so that the rules compiled from the old
+        # schema are no longer used
+        ownership.schema = schema
         ownership.save()
 
     def rename_schema_identifier_for_parsing(self, ownership: ProjectOwnership) -> None:
@@ -0,0 +1,159 @@
+from __future__ import annotations
+
+import logging
+import threading
+from collections.abc import Mapping
+from dataclasses import dataclass, field
+from time import monotonic
+from typing import Any, cast
+
+from sentry.buffer.base import Buffer
+from sentry.utils import metrics
+from sentry.utils.concurrent import PeriodicFlusher
+from sentry.utils.services import build_instance_from_options
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class PendingIncr:
+    model: Any
+    filters: Mapping[str, Any]
+    columns: dict[str, int] = field(default_factory=dict)
+    extra: dict[str, Any] = field(default_factory=dict)
+    signal_only: bool | None = None
+    merged: int = 0
+
+
+class AggregatingBuffer(Buffer):
+    """
+    Merges increments in process before handing them to another buffer.
+
+    Increments for the same model and filters which arrive within
+    `flush_interval` seconds are combined into a single `incr` on the
+    wrapped buffer: counters are summed, `extra` is last-write-wins and
+    `signal_only` sticks once set, which is exactly how `RedisBuffer`
+    combines them in Redis. Pending increments are flushed when the window
+    elapses, when `max_keys` distinct keys are pending and at interpreter
+    shutdown.
+
+    Example configuration:
+
+        SENTRY_BUFFER = "sentry.buffer.aggregating.AggregatingBuffer"
+        SENTRY_BUFFER_OPTIONS = {
+            "backend": {"path": "sentry.buffer.redis.RedisBuffer", "options": {}},
+            "flush_interval": 0.5,
+        }
+    """
+
+    def __init__(
+        self,
+        backend: Mapping[str, Any],
+        flush_interval: float = 0.5,
+        max_keys: int = 10_000,
+    ):
+        assert flush_interval > 0
+        assert max_keys > 0
+        self.backend = cast(Buffer, build_instance_from_options(backend))
+        self.flush_interval = flush_interval
+        self.max_keys = max_keys
+
+        self._lock = threading.Lock()
+        self._pending: dict[Any, PendingIncr] = {}
+        self._window_start = monotonic()
+        self._flusher = PeriodicFlusher(
+            "buffer-aggregating-flusher", flush_interval, self.flush, on_fork=self._drop_pending
+        )
+
+    def validate(self) -> None:
+        self.backend.validate()
+
+    def get(self, model, columns, filters):
+        result = self.backend.get(model, columns, filters)
+        key = self._make_key(model, filters)
+        with self._lock:
+            pending = self._pending.get(key) if key is not None else None
+            if pending is not None:
+                for column in columns:
+                    result[column] = result.get(column, 0) + pending.columns.get(column, 0)
+        return result
+
+    def incr(self, model, columns, filters, extra=None, signal_only=None):
+        key = self._make_key(model, filters)
+        if key is None:
+            self.backend.incr(model, columns, filters, extra, signal_only)
+            return
+
+        self._flusher.ensure_started()
+
+        with self._lock:
+            pending = self._pending.get(key)
+            if pending is None:
+                pending = self._pending[key] = PendingIncr(model=model, filters=filters)
+            for column, amount in columns.items():
+                pending.columns[column] = pending.columns.get(column, 0) + amount
+            if extra:
+                pending.extra.update(extra)
+            if signal_only is True:
+                pending.signal_only = True
+            pending.merged += 1
+
+            should_flush = (
+                len(self._pending) >= self.max_keys
+                or monotonic() - self._window_start >= self.flush_interval
+            )
+
+        if should_flush:
+            self.flush()
+
+    def process_pending(self, partition=None):
+        return self.backend.process_pending(partition=partition)
+
+    def process(self, *args, **kwargs):
+        return self.backend.process(*args, **kwargs)
+
+    def flush(self) -> None:
+        """
+        Hands all pending increments to the wrapped buffer.
+        """
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            window = monotonic() - self._window_start
+            self._window_start = monotonic()
+
+        if not pending:
+            return
+
+        start = monotonic()
+        merged = 0
+        for incr in pending.values():
+            merged += incr.merged
+            try:
+                self.backend.incr(
+                    incr.model, incr.columns, incr.filters, incr.extra or None, incr.signal_only
+                )
+            except Exception:
+                logger.exception(
+                    "buffer.aggregating.flush-failed",
+                    extra={"model": getattr(incr.model, "__name__", incr.model)},
+                )
+
+        metrics.incr("buffer.aggregating.incrs", amount=merged, skip_internal=True)
+        metrics.incr("buffer.aggregating.flushed", amount=len(pending), skip_internal=True)
+        metrics.distribution("buffer.aggregating.merge-ratio", merged / len(pending))
+        metrics.timing("buffer.aggregating.window", window)
+        metrics.timing("buffer.aggregating.flush-latency", monotonic() - start)
+
+    def _make_key(self, model, filters):
+        try:
+            key = (model, tuple(sorted(filters.items())))
+            hash(key)
+        except TypeError:
+            # Unhashable or unorderable filters are passed through unmerged
+            return None
+        return key
+
+    def _drop_pending(self) -> None:
+        with self._lock:
+            self._pending = {}
+            self._window_start = monotonic()
@@ -1,9 +1,27 @@
+from __future__ import annotations
+
+import logging
+from collections import defaultdict
+from collections.abc import Sequence
+from typing import Any
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db import models
 from django.db.models import F
 
+from sentry.db.models.query import bulk_increment
 from sentry.signals import buffer_incr_complete
 from sentry.tasks.process_buffer import process_incr
+from sentry.utils import metrics
 from sentry.utils.services import Service
 
+logger = logging.getLogger(__name__)
+
+# (model, columns, filters, extra, signal_only), as passed to `Buffer.process`
+BufferedIncr = tuple[
+    type[models.Model], dict[str, int], dict[str, Any], dict[str, Any], bool | None
+]
+
 
 class Buffer(Service):
     """
@@ -93,3 +111,129 @@ class Buffer(Service):
             created=created,
             sender=model,
         )
+
+    def process_batch(self, entries: Sequence[BufferedIncr]) -> list[BufferedIncr]:
+        """
+        Flushes many buffered increments at once and returns the entries which
+        failed to apply, so that they can be buffered again.
+
+        Entries for the same model which share the same filter, counter and
+        extra columns are applied with a single multi-row UPDATE. Entries that
+        cannot be (`signal_only`, filters which aren't plain columns, rows
+        which don't exist yet) go through `process` one by one, and so do the
+        entries of an UPDATE which fails.
+
+        Subclasses (e.g. `RedisBuffer`) override `process` with a different
+        signature, so the fallback always calls `Buffer.process` directly.
+        """
+        from sentry.models.group import Group
+
+        failed: list[BufferedIncr] = []
+        statements: dict[tuple[Any, ...], list[BufferedIncr]] = defaultdict(list)
+        for entry in entries:
+            model, columns, filters, extra, signal_only = entry
+            if signal_only or not columns or not self._is_bulk_filter(model, filters):
+                self._process_entry(entry, failed)
+                continue
+            shape = (
+                model,
+                tuple(sorted(filters)),
+                tuple(sorted(columns)),
+                tuple(sorted(extra or ())),
+            )
+            statements[shape].append(entry)
+
+        for shape, shape_entries in statements.items():
+            model, filter_columns, increment_columns, set_columns = shape
+            # Keep a stable row order so concurrent flushes lock rows in the same order
+            shape_entries.sort(key=lambda e: tuple(str(e[2][c]) for c in filter_columns))
+            rows = [
+                (
+                    *(self._filter_value(filters[c]) for c in filter_columns),
+                    *(columns[c] for c in increment_columns),
+                    *(extra[c] for c in set_columns),
+                )
+                for _, columns, filters, extra, _ in shape_entries
+            ]
+
+            expressions = {}
+            # See `process`: keep the score in sync with the buffered values
+            if model is Group and "last_seen" in set_columns and "times_seen" in increment_columns:
+                table = model._meta.db_table
+                expressions["score"] = (
+                    f'log("{table}"."times_seen" + data."times_seen") * 600 '
+                    f'+ trunc(extract(epoch from data."last_seen"))::int'
+                )
+
+            try:
+                updated = set(
+                    bulk_increment(
+                        model, filter_columns, increment_columns, set_columns, rows, expressions
+                    )
+                )
+            except Exception:
+                # Nothing was updated, retry the rows one by one
+                logger.exception(
+                    "buffer.bulk-flush.statement-failed", extra={"model": model.__name__}
+                )
+                for entry in shape_entries:
+                    self._process_entry(entry, failed)
+                continue
+
+            metrics.distribution(
+                "buffer.bulk-flush.rows-per-statement",
+                len(rows),
+                tags={"model": model.__name__},
+            )
+
+            for entry, row in zip(shape_entries, rows):
+                _, columns, filters, extra, signal_only = entry
+                if row[: len(filter_columns)] not in updated:
+                    # The row doesn't exist (yet), let `process` create it
+                    self._process_entry(entry, failed)
+                    continue
+
+                # `Group.update` refreshes the group cache through `post_save`, which
+                # a bulk UPDATE doesn't send, so drop the stale cached group instead
+                group_id = filters.get("id", filters.get("pk"))
+                if model is Group and group_id is not None:
+                    try:
+                        model.objects.uncache_object(self._filter_value(group_id))
+                    except Exception:
+                        logger.exception("buffer.bulk-flush.uncache-failed")
+                buffer_incr_complete.send_robust(
+                    model=model,
+                    columns=columns,
+                    filters=filters,
+                    extra=extra,
+                    created=False,
+                    sender=model,
+                )
+
+        return failed
+
+    def _process_entry(self, entry: BufferedIncr, failed: list[BufferedIncr]) -> None:
+        try:
+            Buffer.process(self, *entry)
+        except Exception:
+            logger.exception("buffer.bulk-flush.entry-failed", extra={"model": entry[0].__name__})
+            failed.append(entry)
+
+    @staticmethod
+    def _filter_value(value: Any) -> Any:
+        return value.pk if isinstance(value, models.Model) else value
+
+    @staticmethod
+    def _is_bulk_filter(model: type[models.Model], filters: dict[str, Any]) -> bool:
+        if not filters:
+            return False
+        for name in filters:
+            if name == "pk":
+                continue
+            try:
+                field = model._meta.get_field(name)
+            except FieldDoesNotExist:
+                return False
+            if not field.concrete or field.many_to_many:
+                return False
+        return True
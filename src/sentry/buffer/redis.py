@@ -2,10 +2,14 @@ from __future__ import annotations
 
 import logging
 import pickle
+import struct
 import threading
-from datetime import date, datetime, timezone
+from collections import defaultdict
+from collections.abc import Callable, Iterator
+from datetime import date, datetime, timedelta, timezone
 from time import time
 
+import msgpack
 import rb
 from django.db import models
 from django.utils.encoding import force_bytes, force_str
@@ -21,6 +25,7 @@ from sentry.utils.redis import (
     get_dynamic_cluster_from_options,
     is_instance_rb_cluster,
     is_instance_redis_cluster,
+    redis_clusters,
     validate_dynamic_cluster,
 )
 
@@ -49,6 +54,58 @@ def _validate_json_roundtrip(value, model):
             logger.exception("buffer.invalid_value", extra={"value": value, "model": model})
 
 
+# Values written with the `msgpack` codec start with a NUL marker byte
+# followed by the format version. Neither JSON nor pickle payloads can start
+# with a NUL byte, so values in all formats can be told apart on read while
+# buffers written by an older codec are still being flushed.
+MSGPACK_MARKER = b"\x00"
+MSGPACK_VERSION = 1
+_EXT_DATETIME = 1
+_EXT_DATE = 2
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def _msgpack_default(value):
+    if isinstance(value, datetime):
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        micros = (value - _EPOCH) // timedelta(microseconds=1)
+        return msgpack.ExtType(_EXT_DATETIME, struct.pack(">q", micros))
+    elif isinstance(value, date):
+        return msgpack.ExtType(_EXT_DATE, struct.pack(">I", value.toordinal()))
+    elif isinstance(value, models.Model):
+        return value.pk
+    raise TypeError(type(value))
+
+
+def _msgpack_ext_hook(code, data):
+    if code == _EXT_DATETIME:
+        return _EPOCH + timedelta(microseconds=struct.unpack(">q", data)[0])
+    elif code == _EXT_DATE:
+        return date.fromordinal(struct.unpack(">I", data)[0])
+    return msgpack.ExtType(code, data)
+
+
+def dump_msgpack_value(value) -> bytes:
+    """
+    Encodes a buffer value (filters or a single extra value) with the compact
+    versioned msgpack format. Datetimes are stored as UTC microseconds, dates
+    as ordinals and model instances as their primary key.
+    """
+    return (
+        MSGPACK_MARKER
+        + bytes([MSGPACK_VERSION])
+        + msgpack.packb(value, default=_msgpack_default, use_bin_type=True)
+    )
+
+
+def load_msgpack_value(payload: bytes):
+    version = payload[1]
+    if version != MSGPACK_VERSION:
+        raise ValueError(f"invalid buffer value version: {version}")
+    return msgpack.unpackb(payload[2:], ext_hook=_msgpack_ext_hook, raw=False)
+
+
 class PendingBuffer:
     def __init__(self, size):
         assert size > 0
@@ -80,14 +137,43 @@ class RedisBuffer(Buffer):
     key_expire = 60 * 60  # 1 hour
     pending_key = "b:p"
 
-    def __init__(self, pending_partitions=1, incr_batch_size=2, **options):
+    def __init__(
+        self,
+        pending_partitions=1,
+        incr_batch_size=2,
+        bulk_flush_batch_size=0,
+        value_codec="json",
+        **options,
+    ):
+        """
+        When `bulk_flush_batch_size` is set, pending keys are handed to
+        `process_incr` in batches of that size and flushed in bulk: buffered
+        hashes are read with one pipeline per Redis host and applied with one
+        multi-row UPDATE per model (see `Buffer.process_batch`).
+
+        `value_codec` selects how filters and extra values are written:
+        `json` (typed JSON on Redis Cluster, pickle otherwise) or the compact
+        `msgpack` format. Values in every format can always be read, so the
+        codec can be switched while buffers are pending. Redis Cluster
+        returns binary responses in `msgpack` mode, which means switching
+        back to `json` requires draining the buffers first.
+        """
         self.is_redis_cluster, self.cluster, options = get_dynamic_cluster_from_options(
             "SENTRY_BUFFER_OPTIONS", options
         )
         self.pending_partitions = pending_partitions
         self.incr_batch_size = incr_batch_size
+        self.bulk_flush_batch_size = bulk_flush_batch_size
+        self.value_codec = value_codec
         assert self.pending_partitions > 0
         assert self.incr_batch_size > 0
+        assert self.bulk_flush_batch_size >= 0
+        assert self.value_codec in ("json", "msgpack")
+
+        if self.value_codec == "msgpack" and self.is_redis_cluster:
+            self.cluster = redis_clusters.get(
+                options.get("cluster", "default"), decode_responses=False
+            )
 
     def get_routing_client(self) -> RedisCluster | rb.RoutingClient:
         if is_instance_redis_cluster(self.cluster, self.is_redis_cluster):
@@ -163,6 +249,36 @@ class RedisBuffer(Buffer):
             raise TypeError(type(value))
         return (type_, str(value))
 
+    def _encode_values(self, values):
+        if self.value_codec == "msgpack":
+            return dump_msgpack_value(values)
+        elif is_instance_redis_cluster(self.cluster, self.is_redis_cluster):
+            return json.dumps(self._dump_values(values))
+        else:
+            return pickle.dumps(values)
+
+    def _encode_value(self, value):
+        if self.value_codec == "msgpack":
+            return dump_msgpack_value(value)
+        elif is_instance_redis_cluster(self.cluster, self.is_redis_cluster):
+            return json.dumps(self._dump_value(value))
+        else:
+            return pickle.dumps(value)
+
+    def _decode_value(self, payload, load_json):
+        """
+        Decodes a value written by any of the codecs, `load_json` is used for
+        the legacy typed JSON format.
+        """
+        marker = force_bytes(payload[:1])
+        if marker == MSGPACK_MARKER:
+            return load_msgpack_value(force_bytes(payload))
+        elif marker in (b"{", b"["):
+            return load_json(json.loads(force_str(payload)))
+        else:
+            # TODO(dcramer): legacy pickle support - remove in Sentry 9.1
+            return pickle.loads(force_bytes(payload))
+
     @classmethod
     def _load_values(cls, payload):
         result = {}
@@ -231,12 +347,10 @@ class RedisBuffer(Buffer):
 
         pipe = conn.pipeline()
         pipe.hsetnx(key, "m", f"{model.__module__}.{model.__name__}")
-        _validate_json_roundtrip(filters, model)
+        if self.value_codec == "json":
+            _validate_json_roundtrip(filters, model)
 
-        if is_instance_redis_cluster(self.cluster, self.is_redis_cluster):
-            pipe.hsetnx(key, "f", json.dumps(self._dump_values(filters)))
-        else:
-            pipe.hsetnx(key, "f", pickle.dumps(filters))
+        pipe.hsetnx(key, "f", self._encode_values(filters))
 
         for column, amount in columns.items():
             pipe.hincrby(key, "i+" + column, amount)
@@ -245,12 +359,10 @@ class RedisBuffer(Buffer):
             # Group tries to serialize 'score', so we'd need some kind of processing
             # hook here
             # e.g. "update score if last_seen or times_seen is changed"
-            _validate_json_roundtrip(extra, model)
+            if self.value_codec == "json":
+                _validate_json_roundtrip(extra, model)
             for column, value in extra.items():
-                if is_instance_redis_cluster(self.cluster, self.is_redis_cluster):
-                    pipe.hset(key, "e+" + column, json.dumps(self._dump_value(value)))
-                else:
-                    pipe.hset(key, "e+" + column, pickle.dumps(value))
+                pipe.hset(key, "e+" + column, self._encode_value(value))
 
         if signal_only is True:
             pipe.hset(key, "s", "1")
@@ -282,12 +394,12 @@ class RedisBuffer(Buffer):
         if not client.set(lock_key, "1", nx=True, ex=60):
             return
 
-        pending_buffer = PendingBuffer(self.incr_batch_size)
+        pending_buffer = PendingBuffer(self.bulk_flush_batch_size or self.incr_batch_size)
 
         try:
             keycount = 0
             if is_instance_redis_cluster(self.cluster, self.is_redis_cluster):
-                keys = self.cluster.zrange(pending_key, 0, -1)
+                keys = [force_str(key) for key in self.cluster.zrange(pending_key, 0, -1)]
                 keycount += len(keys)
 
                 for key in keys:
@@ -330,6 +442,10 @@ class RedisBuffer(Buffer):
         if key is not None:
             batch_keys = [key]
 
+        if self.bulk_flush_batch_size:
+            self._process_bulk_incr(batch_keys)
+            return
+
         for key in batch_keys:
             self._process_single_incr(key)
 
@@ -361,39 +477,109 @@ class RedisBuffer(Buffer):
             pipe.delete(key)
             values = pipe.execute()[0]
 
-            # XXX(python3): In python2 this isn't as important since redis will
-            # return string tyes (be it, byte strings), but in py3 we get bytes
-            # back, and really we just want to deal with keys as strings.
-            values = {force_str(k): v for k, v in values.items()}
-
-            if not values:
-                metrics.incr("buffer.revoked", tags={"reason": "empty"}, skip_internal=False)
-                logger.debug("buffer.revoked.empty", extra={"redis_key": key})
+            entry = self._load_buffered_incr(key, values)
+            if entry is None:
                 return
 
-            model = import_string(force_str(values.pop("m")))
-
-            if values["f"].startswith(b"{" if not self.is_redis_cluster else "{"):
-                filters = self._load_values(json.loads(force_str(values.pop("f"))))
-            else:
-                # TODO(dcramer): legacy pickle support - remove in Sentry 9.1
-                filters = pickle.loads(force_bytes(values.pop("f")))
-
-            incr_values = {}
-            extra_values = {}
-            signal_only = None
-            for k, v in values.items():
-                if k.startswith("i+"):
-                    incr_values[k[2:]] = int(v)
-                elif k.startswith("e+"):
-                    if v.startswith(b"[" if not self.is_redis_cluster else "["):
-                        extra_values[k[2:]] = self._load_value(json.loads(force_str(v)))
-                    else:
-                        # TODO(dcramer): legacy pickle support - remove in Sentry 9.1
-                        extra_values[k[2:]] = pickle.loads(force_bytes(v))
-                elif k == "s":
-                    signal_only = bool(int(v))  # Should be 1 if set
-
-            self._process(model, incr_values, filters, extra_values, signal_only)
+            self._process(*entry)
         finally:
             client.delete(lock_key)
+
+    def _load_buffered_incr(self, key, values):
+        """
+        Decodes the hash stored by `incr` into the arguments of `Buffer.process`.
+        Returns `None` when the hash was already flushed.
+        """
+        # XXX(python3): In python2 this isn't as important since redis will
+        # return string tyes (be it, byte strings), but in py3 we get bytes
+        # back, and really we just want to deal with keys as strings.
+        values = {force_str(k): v for k, v in values.items()}
+
+        if not values:
+            metrics.incr("buffer.revoked", tags={"reason": "empty"}, skip_internal=False)
+            logger.debug("buffer.revoked.empty", extra={"redis_key": key})
+            return None
+
+        model = import_string(force_str(values.pop("m")))
+
+        filters = self._decode_value(values.pop("f"), self._load_values)
+
+        incr_values = {}
+        extra_values = {}
+        signal_only = None
+        for k, v in values.items():
+            if k.startswith("i+"):
+                incr_values[k[2:]] = int(v)
+            elif k.startswith("e+"):
+                extra_values[k[2:]] = self._decode_value(v, self._load_value)
+            elif k == "s":
+                signal_only = bool(int(v))  # Should be 1 if set
+
+        return model, incr_values, filters, extra_values, signal_only
+
+    def _pipelines(
+        self, keys: list[str], route: Callable[[str], str] = lambda key: key
+    ) -> Iterator[tuple[object, list[str]]]:
+        """
+        Groups keys by the Redis host `route(key)` lives on and yields a
+        pipeline for each of those hosts along with its keys.
+        """
+        if is_instance_redis_cluster(self.cluster, self.is_redis_cluster):
+            yield self.cluster.pipeline(transaction=False), keys
+        elif is_instance_rb_cluster(self.cluster, self.is_redis_cluster):
+            router = self.cluster.get_router()
+            hosts = defaultdict(list)
+            for key in keys:
+                hosts[router.get_host_for_key(route(key))].append(key)
+            for host, host_keys in hosts.items():
+                yield self.cluster.get_local_client(host).pipeline(), host_keys
+        else:
+            raise AssertionError("unreachable")
+
+    def _process_bulk_incr(self, keys):
+        start = time()
+
+        locked = []
+        for pipe, host_keys in self._pipelines(keys, route=self._make_lock_key):
+            for key in host_keys:
+                pipe.set(self._make_lock_key(key), "1", nx=True, ex=10)
+            locked.extend(key for key, acquired in zip(host_keys, pipe.execute()) if acquired)
+
+        if len(locked) < len(keys):
+            metrics.incr(
+                "buffer.revoked",
+                amount=len(keys) - len(locked),
+                tags={"reason": "locked"},
+                skip_internal=False,
+            )
+
+        try:
+            entries = []
+            for pipe, host_keys in self._pipelines(locked):
+                for key in host_keys:
+                    pipe.hgetall(key)
+                    pipe.zrem(self._make_pending_key_from_key(key), key)
+                    pipe.delete(key)
+                results = pipe.execute()
+                for key, values in zip(host_keys, results[::3]):
+                    entry = self._load_buffered_incr(key, values)
+                    if entry is not None:
+                        entries.append(entry)
+
+            failed = self.process_batch(entries)
+            # The hashes of the entries are gone, buffer the failed ones again
+            for entry in failed:
+                self.incr(*entry)
+            if failed:
+                metrics.incr("buffer.bulk-flush.requeued", amount=len(failed))
+        finally:
+            for pipe, host_keys in self._pipelines(locked, route=self._make_lock_key):
+                for key in host_keys:
+                    pipe.delete(self._make_lock_key(key))
+                pipe.execute()
+
+        duration = time() - start
+        metrics.distribution("buffer.bulk-flush.keys", len(locked))
+        metrics.timing("buffer.bulk-flush.duration", duration)
+        if duration > 0:
+            metrics.gauge("buffer.bulk-flush.keys-per-second", len(locked) / duration)
@@ -2233,11 +2233,41 @@ SENTRY_DEFAULT_MAX_EVENTS_PER_MINUTE = "90%"
 SENTRY_SNUBA = os.environ.get("SNUBA", "http://127.0.0.1:1218")
 SENTRY_SNUBA_TIMEOUT = 30
 SENTRY_SNUBA_CACHE_TTL_SECONDS = 60
+# Results of cached queries whose time range ended more than
+# SENTRY_SNUBA_CACHE_SETTLED_SECONDS ago are fresh for
+# SENTRY_SNUBA_CACHE_HISTORICAL_TTL_SECONDS, and are then served for up to
+# SENTRY_SNUBA_CACHE_STALE_TTL_SECONDS longer while they're refreshed.
+SENTRY_SNUBA_CACHE_SETTLED_SECONDS = 300
+SENTRY_SNUBA_CACHE_HISTORICAL_TTL_SECONDS = 600
+SENTRY_SNUBA_CACHE_STALE_TTL_SECONDS = 3600
+# Overrides how long results of cached queries are fresh, by referrer
+SENTRY_SNUBA_CACHE_REFERRER_TTL_SECONDS: dict[str, int] = {}
+# Bounds of the number of concurrent Snuba queries per process. The limit
+# shrinks while queries take longer than SENTRY_SNUBA_TARGET_QUERY_LATENCY
+# seconds or are rate limited, see `sentry.utils.snuba_scheduler`.
+SENTRY_SNUBA_MAX_CONCURRENT_QUERIES = 10
+SENTRY_SNUBA_MIN_CONCURRENT_QUERIES = 2
+SENTRY_SNUBA_TARGET_QUERY_LATENCY = 5.0
+# Concurrent queries shared by all referrers starting with a prefix
+SENTRY_SNUBA_REFERRER_CONCURRENCY_LIMITS: dict[str, int] = {}
+# Share of the concurrent queries any other single referrer may take
+SENTRY_SNUBA_REFERRER_CONCURRENCY_SHARE = 0.5
+# Priorities of queries waiting for a slot by referrer prefix, higher first
+SENTRY_SNUBA_REFERRER_PRIORITIES: dict[str, int] = {}
 
 # Node storage backend
 SENTRY_NODESTORE = "sentry.nodestore.django.DjangoNodeStorage"
 SENTRY_NODESTORE_OPTIONS: dict[str, Any] = {}
 
+# In-process LRU cache in front of the "nodedata" cache, disabled unless
+# `max_items` is set. Other keys: `max_bytes`, `ttl` and `negative_ttl`
+# (seconds to remember ids which were not found, 0 to disable).
+SENTRY_NODESTORE_LOCAL_CACHE_OPTIONS: dict[str, Any] = {}
+
+# Directory of trained zstd dictionaries (`<platform>.<version>.zdict`) used to
+# compress event payloads, see `sentry.nodestore.compression`. Disabled if unset.
+SENTRY_NODESTORE_COMPRESSION_DICTIONARIES: str | None = None
+
 # Node storage backend used for ArtifactBundle indexing (aka FlatFileIndex aka BundleIndex)
 SENTRY_INDEXSTORE = "sentry.nodestore.django.DjangoNodeStorage"
 SENTRY_INDEXSTORE_OPTIONS: dict[str, Any] = {}
@@ -2287,6 +2317,12 @@ SENTRY_METRICS_DISALLOW_BAD_TAGS = IS_DEV
 SENTRY_METRICS_INDEXER = "sentry.sentry_metrics.indexer.postgres.postgres_v2.PostgresIndexer"
 SENTRY_METRICS_INDEXER_OPTIONS: dict[str, Any] = {}
 SENTRY_METRICS_INDEXER_CACHE_TTL = 3600 * 2
+# The number of entries in the cache of indexer results shared by the processes
+# of a host, which is looked up before SENTRY_STRING_INDEXER_CACHE_OPTIONS.
+# 0 disables it.
+SENTRY_METRICS_INDEXER_SHARED_CACHE_SIZE = 0
+# The path prefix of the files holding the shared cache, should be on a tmpfs.
+SENTRY_METRICS_INDEXER_SHARED_CACHE_PATH = "/dev/shm/sentry-metrics-indexer"
 SENTRY_METRICS_INDEXER_TRANSACTIONS_SAMPLE_RATE = 0.1
 
 SENTRY_METRICS_INDEXER_SPANNER_OPTIONS: dict[str, Any] = {}
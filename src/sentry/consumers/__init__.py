@@ -29,13 +29,10 @@ def convert_max_batch_time(ctx, param, value):
     return int(value / 1000.0)
 
 
-def multiprocessing_options(
+def batching_options(
     default_max_batch_size: int | None = None, default_max_batch_time_ms: int | None = 1000
-):
+) -> list[click.Option]:
     return [
-        click.Option(["--processes", "num_processes"], default=1, type=int),
-        click.Option(["--input-block-size"], type=int, default=None),
-        click.Option(["--output-block-size"], type=int, default=None),
         click.Option(
             ["--max-batch-size"],
             default=default_max_batch_size,
@@ -52,6 +49,17 @@ def multiprocessing_options(
     ]
 
 
+def multiprocessing_options(
+    default_max_batch_size: int | None = None, default_max_batch_time_ms: int | None = 1000
+):
+    return [
+        click.Option(["--processes", "num_processes"], default=1, type=int),
+        click.Option(["--input-block-size"], type=int, default=None),
+        click.Option(["--output-block-size"], type=int, default=None),
+        *batching_options(default_max_batch_size, default_max_batch_time_ms),
+    ]
+
+
 def ingest_replay_recordings_options() -> list[click.Option]:
     """Return a list of ingest-replay-recordings options."""
     options = multiprocessing_options(default_max_batch_size=10)
@@ -81,6 +89,20 @@ def ingest_replay_recordings_buffered_options() -> list[click.Option]:
     return options
 
 
+def ingest_events_options() -> list[click.Option]:
+    """Return a list of ingest-events and ingest-transactions options."""
+    options = multiprocessing_options(default_max_batch_size=100)
+    options.append(
+        click.Option(
+            ["--batched", "batched"],
+            is_flag=True,
+            default=False,
+            help="Process events in batches of up to --max-batch-size messages.",
+        )
+    )
+    return options
+
+
 def ingest_monitors_options() -> list[click.Option]:
     """Return a list of ingest-monitors options."""
     options = [
@@ -106,6 +128,19 @@ def ingest_monitors_options() -> list[click.Option]:
     return options
 
 
+def process_spans_options() -> list[click.Option]:
+    """Return a list of process-spans options."""
+    return [
+        click.Option(
+            ["--batched", "batched"],
+            is_flag=True,
+            default=False,
+            help="Write spans to the buffer in batches of up to --max-batch-size messages.",
+        ),
+        *batching_options(default_max_batch_size=1000),
+    ]
+
+
 _METRICS_INDEXER_OPTIONS = [
     click.Option(["--input-block-size"], type=int, default=None),
     click.Option(["--output-block-size"], type=int, default=None),
@@ -243,7 +278,7 @@ KAFKA_CONSUMERS: Mapping[str, ConsumerDefinition] = {
     "ingest-events": {
         "topic": settings.KAFKA_INGEST_EVENTS,
         "strategy_factory": "sentry.ingest.consumer.factory.IngestStrategyFactory",
-        "click_options": multiprocessing_options(default_max_batch_size=100),
+        "click_options": ingest_events_options(),
         "static_args": {
             "consumer_type": "events",
         },
@@ -259,7 +294,7 @@ KAFKA_CONSUMERS: Mapping[str, ConsumerDefinition] = {
     "ingest-transactions": {
         "topic": settings.KAFKA_INGEST_TRANSACTIONS,
         "strategy_factory": "sentry.ingest.consumer.factory.IngestStrategyFactory",
-        "click_options": multiprocessing_options(default_max_batch_size=100),
+        "click_options": ingest_events_options(),
         "static_args": {
             "consumer_type": "transactions",
         },
@@ -326,6 +361,7 @@ KAFKA_CONSUMERS: Mapping[str, ConsumerDefinition] = {
     "process-spans": {
         "topic": settings.KAFKA_SNUBA_SPANS,
         "strategy_factory": "sentry.spans.consumers.process.factory.ProcessSpansStrategyFactory",
+        "click_options": process_spans_options(),
     },
     **settings.SENTRY_KAFKA_CONSUMERS,
 }
@@ -48,6 +48,14 @@ class DiscoverProcessor:
             sort=discover_query.get("sort"),
             dataset=discover_query.get("dataset"),
         )
+        self.stream_fn = self.get_stream_fn(
+            fields=discover_query["field"],
+            equations=equations,
+            query=discover_query["query"],
+            params=self.params,
+            sort=discover_query.get("sort"),
+            dataset=discover_query.get("dataset"),
+        )
 
     @staticmethod
     def get_projects(organization_id, query):
@@ -100,6 +108,32 @@ class DiscoverProcessor:
 
         return data_fn
 
+    @staticmethod
+    def get_stream_fn(fields, equations, query, params, sort, dataset):
+        """
+        Returns a function streaming the rows of a page of the export, or None
+        if the dataset can only be queried with `data_fn`.
+        """
+        if get_dataset(dataset) not in (None, discover):
+            return None
+
+        def stream_fn(offset, limit):
+            return discover.stream_query(
+                selected_columns=fields,
+                equations=equations,
+                query=query,
+                params=params,
+                offset=offset,
+                orderby=sort,
+                limit=limit,
+                referrer="data_export.tasks.discover",
+                auto_fields=True,
+                auto_aggregations=True,
+                use_aggregate_conditions=True,
+            )
+
+        return stream_fn
+
     def handle_fields(self, result_list):
         # Find issue short_id if present
         # (originally in `/api/bases/organization_events.py`)
@@ -252,8 +252,16 @@ def process_issues_by_tag(processor, limit, offset):
 
 @handle_snuba_errors(logger)
 def process_discover(processor, limit, offset):
-    raw_data_unicode = processor.data_fn(limit=limit, offset=offset)["data"]
-    return processor.handle_fields(raw_data_unicode)
+    if processor.stream_fn is None:
+        raw_data_unicode = processor.data_fn(limit=limit, offset=offset)["data"]
+        return processor.handle_fields(raw_data_unicode)
+
+    # Only hold one chunk of the raw rows in memory at a time
+    rows = []
+    with processor.stream_fn(limit=limit, offset=offset) as chunks:
+        for chunk in chunks:
+            rows.extend(processor.handle_fields(chunk))
+    return rows
 
 
 class ExportDataFileTooBig(Exception):
@@ -1,17 +1,20 @@
 from __future__ import annotations
 
 import itertools
+from collections.abc import Mapping, Sequence
 from functools import reduce
 from typing import Any
 
-from django.db import IntegrityError, router, transaction
+from django.db import IntegrityError, connections, router, transaction
 from django.db.models import Model, Q
 from django.db.models.expressions import CombinedExpression
 from django.db.models.signals import post_save
+from psycopg2.extras import execute_values
 
 from .utils import resolve_combined_expression
 
 __all__ = (
+    "bulk_increment",
     "create_or_update",
     "update",
     "update_or_create",
@@ -173,6 +176,98 @@ def create_or_update(
     return affected, False
 
 
+def bulk_increment(
+    model: type[Model],
+    filter_columns: Sequence[str],
+    increment_columns: Sequence[str],
+    set_columns: Sequence[str],
+    rows: Sequence[Sequence[Any]],
+    expressions: Mapping[str, str] | None = None,
+    using: str | None = None,
+) -> list[tuple[Any, ...]]:
+    """
+    Increments counters on many existing rows with a single
+    ``UPDATE ... FROM (VALUES ...)`` statement.
+
+    Each row holds the values for `filter_columns`, then the amounts for
+    `increment_columns`, then the values for `set_columns` (last write
+    wins), in that order. `expressions` maps additional columns to raw SQL
+    which can refer to the updated table by its name and to the row values
+    as ``data.<column>``.
+
+    Rows are never created. The filter values of all rows which were
+    updated are returned, so callers can fall back to `create_or_update`
+    for the remainder.
+
+    >>> bulk_increment(Group, ["id"], ["times_seen"], ["last_seen"], [
+    >>>     (1, 3, timezone.now()),
+    >>>     (2, 1, timezone.now()),
+    >>> ])
+    """
+    if not rows:
+        return []
+
+    if not using:
+        using = router.db_for_write(model)
+
+    connection = connections[using]
+    quote_name = connection.ops.quote_name
+    opts = model._meta
+
+    columns = [*filter_columns, *increment_columns, *set_columns]
+    fields = [opts.pk if column == "pk" else opts.get_field(column) for column in columns]
+    names = [quote_name(field.column) for field in fields]
+    filter_names = names[: len(filter_columns)]
+    table = quote_name(opts.db_table)
+
+    assignments = [
+        f"{name} = {table}.{name} + data.{name}"
+        for name in names[len(filter_columns) : len(filter_columns) + len(increment_columns)]
+    ]
+    assignments.extend(
+        f"{name} = data.{name}" for name in names[len(filter_columns) + len(increment_columns) :]
+    )
+    for column, sql in (expressions or {}).items():
+        assignments.append(f"{quote_name(opts.get_field(column).column)} = {sql}")
+
+    query = """
+        UPDATE {table}
+        SET {assignments}
+        FROM (VALUES %s) AS data ({names})
+        WHERE {where}
+        RETURNING {returning}
+    """.format(
+        table=table,
+        assignments=", ".join(assignments),
+        names=", ".join(names),
+        where=" AND ".join(f"{table}.{name} = data.{name}" for name in filter_names),
+        returning=", ".join(f"{table}.{name}" for name in filter_names),
+    )
+    # VALUES lists are untyped, so cast every value to its column type.
+    # Primary keys use their referencing type to avoid casting to `serial`.
+    template = "({})".format(
+        ", ".join(
+            "%s::{}".format(
+                field.rel_db_type(connection) if field.primary_key else field.db_type(connection)
+            )
+            for field in fields
+        )
+    )
+    values = [
+        tuple(
+            field.get_db_prep_save(value.pk if isinstance(value, Model) else value, connection)
+            for field, value in zip(fields, row)
+        )
+        for row in rows
+    ]
+
+    with connection.cursor() as cursor:
+        updated = execute_values(
+            cursor, query, values, template=template, page_size=len(values), fetch=True
+        )
+    return [tuple(row) for row in updated]
+
+
 def in_iexact(column: str, values: Any) -> Q:
     """Operator to test if any of the given values are (case-insensitive)
     matching to values in the given column."""
@@ -150,6 +150,10 @@ def rewrite_record(
         logger.debug("%s could not be associated with a group.", record)
         return None
 
+    # The project isn't pickled with the event either, reattach it as well so
+    # that rendering the digest doesn't load it again for every event.
+    event.project = project
+
     return Record(
         record.key,
         Notification(
@@ -15,7 +15,7 @@ from sentry.models.projectownership import ProjectOwnership
 from sentry.models.rule import Rule
 from sentry.models.rulesnooze import RuleSnooze
 from sentry.notifications.types import ActionTargetType, FallthroughChoiceType
-from sentry.notifications.utils.participants import get_send_to
+from sentry.notifications.utils.participants import get_send_to_by_event
 from sentry.services.hybrid_cloud.actor import RpcActor
 from sentry.types.integrations import ExternalProviders
 
@@ -86,12 +86,20 @@ def get_personalized_digests(
     participants_by_provider_by_event: Mapping[Event, Mapping[ExternalProviders, set[RpcActor]]],
 ) -> Mapping[RpcActor, Digest]:
     events_by_participant = get_events_by_participant(participants_by_provider_by_event)
+    snoozed_rule_ids_by_user = get_snoozed_rule_ids_by_user(
+        digest, [participant.id for participant in events_by_participant if participant is not None]
+    )
 
     actor_to_digest = {}
 
     for participant, events in events_by_participant.items():
         if participant is not None:
-            custom_digest = build_custom_digest(digest, events, participant)
+            custom_digest = build_custom_digest(
+                digest,
+                events,
+                participant,
+                snoozed_rule_ids_by_user[None] | snoozed_rule_ids_by_user[participant.id],
+            )
             if custom_digest:
                 actor_to_digest[participant] = custom_digest
 
@@ -107,15 +115,33 @@ def get_event_from_groups_in_digest(digest: Digest) -> Iterable[Event]:
     }
 
 
+def get_snoozed_rule_ids_by_user(
+    digest: Digest, user_ids: Iterable[int]
+) -> defaultdict[int | None, set[int]]:
+    """
+    Returns the ids of the rules of a digest which are snoozed for each of the
+    users, and under `None` the ones which are snoozed for everyone.
+    """
+    rule_snoozes = RuleSnooze.objects.filter(
+        Q(user_id__in=user_ids) | Q(user_id__isnull=True), rule__in=digest.keys()
+    ).values_list("user_id", "rule")
+    snoozed_rule_ids_by_user: defaultdict[int | None, set[int]] = defaultdict(set)
+    for user_id, rule_id in rule_snoozes:
+        snoozed_rule_ids_by_user[user_id].add(rule_id)
+    return snoozed_rule_ids_by_user
+
+
 def build_custom_digest(
-    original_digest: Digest, events: Iterable[Event], participant: RpcActor
+    original_digest: Digest,
+    events: Iterable[Event],
+    participant: RpcActor,
+    snoozed_rule_ids: set[int] | None = None,
 ) -> Digest:
     """Given a digest and a set of events, filter the digest to only records that include the events."""
     user_digest: Digest = {}
-    rule_snoozes = RuleSnooze.objects.filter(
-        Q(user_id=participant.id) | Q(user_id__isnull=True), rule__in=original_digest.keys()
-    ).values_list("rule", flat=True)
-    snoozed_rule_ids = {rule for rule in rule_snoozes}
+    if snoozed_rule_ids is None:
+        snoozed_rule_ids_by_user = get_snoozed_rule_ids_by_user(original_digest, [participant.id])
+        snoozed_rule_ids = snoozed_rule_ids_by_user[None] | snoozed_rule_ids_by_user[participant.id]
 
     for rule, rule_groups in original_digest.items():
         if rule.id in snoozed_rule_ids:
@@ -140,20 +166,17 @@ def get_participants_by_event(
     fallthrough_choice: FallthroughChoiceType | None = None,
 ) -> Mapping[Event, Mapping[ExternalProviders, set[RpcActor]]]:
     """
-    This is probably the slowest part in sending digests because we do a lot of
-    DB calls while we iterate over every event. It would be great if we could
-    combine some queries.
+    This is probably the slowest part in sending digests: the owners of every
+    event are still determined one by one, but the notification settings are
+    only looked up once per distinct set of owners.
     """
-    return {
-        event: get_send_to(
-            project=project,
-            target_type=target_type,
-            target_identifier=target_identifier,
-            event=event,
-            fallthrough_choice=fallthrough_choice,
-        )
-        for event in get_event_from_groups_in_digest(digest)
-    }
+    return get_send_to_by_event(
+        project=project,
+        target_type=target_type,
+        events=get_event_from_groups_in_digest(digest),
+        target_identifier=target_identifier,
+        fallthrough_choice=fallthrough_choice,
+    )
 
 
 def sort_records(records: Sequence[Record]) -> Sequence[Record]:
@@ -1,8 +1,10 @@
+from collections.abc import Sequence
 from datetime import timedelta
 from typing import Any
 
 import sentry_sdk
 
+from sentry.utils import json
 from sentry.utils.cache import cache_key_for_event
 from sentry.utils.kvstore.abstract import KVStorage
 from sentry.utils.services import Service
@@ -24,10 +26,15 @@ class EventProcessingStore(Service):
 
     Separating processing store from the cache allows use of different
     implementations.
+
+    Backends which store events as JSON can pass the storage underneath their
+    JSON codec as `raw_inner`, so that already encoded events can be stored
+    as they are with `store_raw`.
     """
 
-    def __init__(self, inner: KVStorage[str, Event]):
+    def __init__(self, inner: KVStorage[str, Event], raw_inner: KVStorage[str, Any] | None = None):
         self.inner = inner
+        self.raw_inner = raw_inner
         self.timeout = timedelta(seconds=DEFAULT_TIMEOUT)
 
     def __get_unprocessed_key(self, key: str) -> str:
@@ -41,6 +48,45 @@ class EventProcessingStore(Service):
             self.inner.set(key, event, self.timeout)
             return key
 
+    def store_many(self, events: Sequence[Event]) -> list[str]:
+        """
+        Stores multiple events with a single write to the backend and returns
+        their keys in the same order.
+        """
+        with sentry_sdk.start_span(op="eventstore.processing.store_many"):
+            keys = [cache_key_for_event(event) for event in events]
+            self.inner.set_many(list(zip(keys, events)), self.timeout)
+            return keys
+
+    def store_raw(self, event_id: str, project_id: int, payload: bytes) -> str:
+        """
+        Stores the JSON encoded payload of an event without decoding and
+        encoding it again, if the backend supports it. `get` returns the
+        event decoded like any other.
+        """
+        return self.store_many_raw([(event_id, project_id, payload)])[0]
+
+    def store_many_raw(self, events: Sequence[tuple[str, int, bytes]]) -> list[str]:
+        """
+        Like `store_raw` for multiple `(event_id, project_id, payload)`
+        tuples, with a single write to the backend.
+        """
+        with sentry_sdk.start_span(op="eventstore.processing.store_many_raw"):
+            keys = [
+                cache_key_for_event({"event_id": event_id, "project": project_id})
+                for event_id, project_id, _ in events
+            ]
+            if self.raw_inner is None:
+                self.inner.set_many(
+                    [(key, json.loads(payload)) for key, (_, _, payload) in zip(keys, events)],
+                    self.timeout,
+                )
+            else:
+                self.raw_inner.set_many(
+                    [(key, payload) for key, (_, _, payload) in zip(keys, events)], self.timeout
+                )
+            return keys
+
     def get(self, key: str, unprocessed: bool = False) -> Event | None:
         with sentry_sdk.start_span(op="eventstore.processing.get"):
             if unprocessed:
@@ -14,9 +14,11 @@ class BigtableEventProcessingStore(EventProcessingStore):
     """
 
     def __init__(self, **options):
+        inner = BigtableKVStorage(**options)
         super().__init__(
             KVStorageCodecWrapper(
-                BigtableKVStorage(**options),
+                inner,
                 JSONCodec() | BytesCodec(),  # maintains functional parity with cache backend
-            )
+            ),
+            raw_inner=inner,
         )
@@ -1,4 +1,5 @@
 import hashlib
+from collections.abc import Sequence
 from datetime import timedelta
 from typing import TypeVar
 
@@ -25,7 +26,7 @@ class MultiRedisProcessingStore(EventProcessingStore):
             old_cluster=redis_clusters.get(options["old_cluster"]),
             new_cluster=redis_clusters.get(options["new_cluster"]),
         )
-        super().__init__(KVStorageCodecWrapper(inner, JSONCodec()))
+        super().__init__(KVStorageCodecWrapper(inner, JSONCodec()), raw_inner=inner)
 
 
 class MultiRedisKVStorage(RedisKVStorage[T]):
@@ -58,6 +59,16 @@ class MultiRedisKVStorage(RedisKVStorage[T]):
         else:
             self.old_cluster.set(bkey, value, ex=ttl)
 
+    def set_many(self, items: Sequence[tuple[str, T]], ttl: timedelta | None = None) -> None:
+        with self.new_cluster.pipeline(transaction=False) as new_pipeline:
+            with self.old_cluster.pipeline(transaction=False) as old_pipeline:
+                for key, value in items:
+                    bkey = key.encode("utf8")
+                    pipeline = new_pipeline if self.use_new(bkey) else old_pipeline
+                    pipeline.set(bkey, value, ex=ttl)
+                new_pipeline.execute()
+                old_pipeline.execute()
+
     def delete(self, key: str) -> None:
         bkey = key.encode("utf8")
         self.new_cluster.delete(bkey)
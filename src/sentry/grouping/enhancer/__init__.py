@@ -4,6 +4,8 @@ import base64
 import logging
 import os
 import random
+import threading
+import time
 import zlib
 from collections.abc import Sequence
 from hashlib import md5
@@ -12,6 +14,7 @@ from typing import Any, Literal
 import msgpack
 import sentry_sdk
 import zstandard
+from cachetools import LRUCache
 from django.core.cache import cache
 from parsimonious.exceptions import ParseError
 from parsimonious.grammar import Grammar
@@ -46,6 +49,17 @@ logger = logging.getLogger(__name__)
 # So this leaves quite a bit of headroom for custom enhancement rules as well.
 RUST_CACHE = RustCache(1_000)
 
+# Results of applying runs of frame-local modifier rules to a single frame, see
+# `Enhancements._apply_local_rules`. Library frames are shared between a huge
+# number of different stack traces, so they only have to be matched once.
+FRAME_CACHE_SIZE = 100_000
+FRAME_CACHE: LRUCache[tuple[Any, ...], tuple[str | None, Any, Any]] = LRUCache(FRAME_CACHE_SIZE)
+FRAME_CACHE_LOCK = threading.Lock()
+
+# The fields of a match frame, see `create_match_frame`.
+MATCH_FRAME_FIELDS = ("category", "family", "function", "in_app", "module", "package", "path")
+EXCEPTION_FIELD_PATHS = (("type",), ("value",), ("mechanism", "type"))
+
 # Grammar is defined in EBNF syntax.
 enhancements_grammar = Grammar(
     r"""
@@ -283,6 +297,17 @@ class Enhancements:
             if updater_rule := rule._as_updater_rule():
                 self._updater_rules.append(updater_rule)
 
+        # Consecutive modifier rules grouped by whether they only look at and
+        # modify the frame they match.
+        self._modifier_rule_runs: list[tuple[bool, list[Rule]]] = []
+        for rule in self._modifier_rules:
+            is_local = rule._is_frame_local
+            if self._modifier_rule_runs and self._modifier_rule_runs[-1][0] == is_local:
+                self._modifier_rule_runs[-1][1].append(rule)
+            else:
+                self._modifier_rule_runs.append((is_local, [rule]))
+        self._frame_cache_key: str | None = None
+
     def apply_modifications_to_frame(
         self,
         frames: Sequence[dict[str, Any]],
@@ -325,21 +350,119 @@ class Enhancements:
                 return
 
         with sentry_sdk.start_span(op="stacktrace_processing", description="apply_rules_to_frames"):
-            for rule in self._modifier_rules:
-                for idx, action in rule.get_matching_frame_actions(
-                    match_frames, exception_data, in_memory_cache
-                ):
-                    # Both frames and match_frames are updated
-                    action.apply_modifications_to_frame(frames, match_frames, idx, rule=rule)
+            start = time.monotonic()
+            hits = 0
+            for run_idx, (is_local, rules) in enumerate(self._modifier_rule_runs):
+                if is_local:
+                    hits += self._apply_local_rules(
+                        run_idx,
+                        rules,
+                        frames,
+                        match_frames,
+                        exception_data,
+                        in_memory_cache,
+                        extra_fingerprint,
+                    )
+                else:
+                    _apply_modifier_rules(
+                        rules, frames, match_frames, exception_data, in_memory_cache
+                    )
             for frame, match_frame in zip(frames, match_frames):
                 if (in_app := match_frame["in_app"]) is not None:
                     set_in_app(frame, in_app)
 
+            lookups = len(frames) * sum(is_local for is_local, _ in self._modifier_rule_runs)
+            if hits:
+                metrics.incr(
+                    f"{DATADOG_KEY}.frame_cache",
+                    amount=hits,
+                    tags={"result": "hit", "platform": platform},
+                )
+            if lookups > hits:
+                metrics.incr(
+                    f"{DATADOG_KEY}.frame_cache",
+                    amount=lookups - hits,
+                    tags={"result": "miss", "platform": platform},
+                )
+            metrics.timing(
+                f"{DATADOG_KEY}.apply_rules_to_frames",
+                time.monotonic() - start,
+                tags={"platform": platform},
+            )
+
         if use_cache:
             _cache_changed_frame_values(frames, cache_key, platform)
 
         compare_rust_enhancers(frames, rust_enhanced_frames)
 
+    def _apply_local_rules(
+        self,
+        run_idx: int,
+        rules: Sequence[Rule],
+        frames: Sequence[dict[str, Any]],
+        match_frames: Sequence[dict[str, Any]],
+        exception_data: dict[str, Any],
+        in_memory_cache: dict[str, str],
+        extra_fingerprint: str = "",
+    ) -> int:
+        """
+        Applies a run of frame-local modifier rules to every frame. The result
+        for a frame only depends on its match frame (and the exception for
+        exception matchers), so it is memoized in `FRAME_CACHE` across stack
+        traces. Returns the number of cache hits.
+        """
+        if self._frame_cache_key is None:
+            # The extra fingerprint already contains the serialized rules
+            fingerprint = extra_fingerprint or self.dumps()
+            self._frame_cache_key = md5(fingerprint.encode("utf-8")).hexdigest()
+
+        exception_key = None
+        if any(rule._exception_matchers for rule in rules):
+            exception_key = tuple(
+                get_path(exception_data or {}, *field) for field in EXCEPTION_FIELD_PATHS
+            )
+            try:
+                hash(exception_key)
+            except TypeError:
+                _apply_modifier_rules(rules, frames, match_frames, exception_data, in_memory_cache)
+                return 0
+
+        hits = 0
+        for frame, match_frame in zip(frames, match_frames):
+            key = (
+                self._frame_cache_key,
+                run_idx,
+                exception_key,
+                tuple(match_frame[field] for field in MATCH_FRAME_FIELDS),
+            )
+            with FRAME_CACHE_LOCK:
+                result = FRAME_CACHE.get(key)
+
+            if result is None:
+                # Apply the rules to a copy of the frame to record their effect
+                result_frame: dict[str, Any] = {}
+                result_match_frame = dict(match_frame)
+                _apply_modifier_rules(
+                    rules, [result_frame], [result_match_frame], exception_data, in_memory_cache
+                )
+                result = (
+                    get_path(result_frame, "data", "category"),
+                    result_match_frame["category"],
+                    result_match_frame["in_app"],
+                )
+                with FRAME_CACHE_LOCK:
+                    FRAME_CACHE[key] = result
+            else:
+                hits += 1
+
+            category, match_category, in_app = result
+            if category is not None:
+                set_path(frame, "data", "category", value=category)
+            match_frame["category"] = match_category
+            match_frame["in_app"] = in_app
+
+        return hits
+
     def update_frame_components_contributions(self, components, frames, platform, exception_data):
         in_memory_cache: dict[str, str] = {}
 
@@ -513,6 +636,10 @@ class Rule:
         self.actions = actions
         self._is_updater = any(action.is_updater for action in actions)
         self._is_modifier = any(action.is_modifier for action in actions)
+        # Whether the rule only looks at and modifies the frame it matches
+        self._is_frame_local = all(isinstance(m, FrameMatch) for m in matchers) and all(
+            action.range is None for action in actions
+        )
 
     @property
     def matcher_description(self):
@@ -671,6 +798,21 @@ class EnhancementsVisitor(NodeVisitor):
         return node.match.groups()[0].lstrip("!")
 
 
+def _apply_modifier_rules(
+    rules: Sequence[Rule],
+    frames: Sequence[dict[str, Any]],
+    match_frames: Sequence[dict[str, Any]],
+    exception_data: dict[str, Any],
+    in_memory_cache: dict[str, str],
+) -> None:
+    for rule in rules:
+        for idx, action in rule.get_matching_frame_actions(
+            match_frames, exception_data, in_memory_cache
+        ):
+            # Both frames and match_frames are updated
+            action.apply_modifications_to_frame(frames, match_frames, idx, rule=rule)
+
+
 def _update_frames_from_cached_values(
     frames: Sequence[dict[str, Any]], cache_key: str, platform: str
 ) -> bool:
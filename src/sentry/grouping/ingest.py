@@ -9,6 +9,7 @@ from typing import TYPE_CHECKING, Any
 import sentry_sdk
 from django.conf import settings
 from django.core.cache import cache
+from django.db import IntegrityError, router, transaction
 
 from sentry.exceptions import HashDiscarded
 from sentry.features.rollout import in_random_rollout
@@ -400,6 +401,57 @@ def find_existing_grouphash_new(
     return None
 
 
+def get_or_create_grouphashes(project: Project, hashes: Sequence[str]) -> list[GroupHash]:
+    """
+    Returns the `GroupHash` rows of `hashes`, in the same order. Existing rows
+    of several hashes are looked up with a single query, and only genuinely
+    new hashes are created.
+    """
+    if len(hashes) <= 1:
+        # There's no lookup to share, so `get_or_create` is as cheap as it gets
+        grouphashes = []
+        for hash in hashes:
+            grouphash, created = GroupHash.objects.get_or_create(project=project, hash=hash)
+            metrics.incr(
+                "grouping.grouphashes.created" if created else "grouping.grouphashes.resolved"
+            )
+            grouphashes.append(grouphash)
+        return grouphashes
+
+    existing = {
+        grouphash.hash: grouphash
+        for grouphash in GroupHash.objects.filter(project=project, hash__in=hashes)
+    }
+
+    grouphashes = []
+    created = 0
+    for hash in hashes:
+        grouphash = existing.get(hash)
+        if grouphash is None:
+            grouphash, was_created = _create_grouphash(project, hash)
+            existing[hash] = grouphash
+            created += was_created
+        grouphashes.append(grouphash)
+
+    metrics.incr("grouping.grouphashes.resolved", amount=len(hashes) - created)
+    if created:
+        metrics.incr("grouping.grouphashes.created", amount=created)
+    return grouphashes
+
+
+def _create_grouphash(project: Project, hash: str) -> tuple[GroupHash, bool]:
+    """
+    Creates a hash which was just looked up and not found, without repeating
+    the lookup like `get_or_create` would.
+    """
+    try:
+        with transaction.atomic(router.db_for_write(GroupHash)):
+            return GroupHash.objects.create(project=project, hash=hash), True
+    except IntegrityError:
+        # Created concurrently since it was looked up
+        return GroupHash.objects.get(project=project, hash=hash), False
+
+
 def get_hash_values(
     project: Project,
     job: Job,
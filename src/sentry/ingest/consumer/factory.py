@@ -16,6 +16,7 @@ from arroyo.processing.strategies import (
     ProcessingStrategyFactory,
     RunTask,
 )
+from arroyo.processing.strategies.batching import BatchStep
 from arroyo.types import Commit, FilteredPayload, Message, Partition
 from django.conf import settings
 
@@ -25,7 +26,7 @@ from sentry.utils import kafka_config
 from sentry.utils.arroyo import MultiprocessingPool, RunTaskWithMultiprocessing
 
 from .attachment_event import decode_and_process_chunks, process_attachments_and_events
-from .simple_event import process_simple_event_message
+from .simple_event import process_simple_event_batch, process_simple_event_message
 
 
 class MultiProcessConfig(NamedTuple):
@@ -73,10 +74,19 @@ class IngestStrategyFactory(ProcessingStrategyFactory[KafkaPayload]):
         max_batch_time: int,
         input_block_size: int | None,
         output_block_size: int | None,
+        batched: bool = False,
     ):
         self.consumer_type = consumer_type
         self.is_attachment_topic = consumer_type == ConsumerType.Attachments
 
+        # Batched mode processes events in batches of up to `max_batch_size`
+        # messages, sharing the round trips to the cache and the processing
+        # store between the events of a batch. It's not supported for the
+        # attachments topic, whose chunks have to be processed in order.
+        self.batched = batched and not self.is_attachment_topic
+        self.max_batch_size = max_batch_size
+        self.max_batch_time = max_batch_time
+
         self.multi_process = None
         self._pool = MultiprocessingPool(num_processes)
 
@@ -87,8 +97,16 @@ class IngestStrategyFactory(ProcessingStrategyFactory[KafkaPayload]):
         else:
             self._attachments_pool = None
         if num_processes > 1:
+            # In batched mode, every message handed to the pool already is a
+            # batch of up to `max_batch_size` events. Hand those over one at a
+            # time, so that a batch of the pool doesn't hold `max_batch_size`
+            # times as many events.
             self.multi_process = MultiProcessConfig(
-                num_processes, max_batch_size, max_batch_time, input_block_size, output_block_size
+                num_processes,
+                1 if self.batched else max_batch_size,
+                max_batch_time,
+                input_block_size,
+                output_block_size,
             )
 
         self.health_checker = HealthChecker("ingest")
@@ -102,6 +120,15 @@ class IngestStrategyFactory(ProcessingStrategyFactory[KafkaPayload]):
 
         final_step = CommitOffsets(commit)
 
+        if self.batched:
+            batch_function = partial(process_simple_event_batch, consumer_type=self.consumer_type)
+            next_step = BatchStep(
+                max_batch_size=self.max_batch_size,
+                max_batch_time=self.max_batch_time,
+                next_step=maybe_multiprocess_step(mp, batch_function, final_step, self._pool),
+            )
+            return create_backpressure_step(health_checker=self.health_checker, next_step=next_step)
+
         if not self.is_attachment_topic:
             event_function = partial(process_simple_event_message, consumer_type=self.consumer_type)
             next_step = maybe_multiprocess_step(mp, event_function, final_step, self._pool)
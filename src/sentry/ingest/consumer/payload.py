@@ -0,0 +1,100 @@
+"""
+Cheap access to the top-level fields of JSON event payloads.
+
+The ingest consumer only needs a couple of fields of some events (e.g. the
+`type` of transactions) before it hands their payload over to the processing
+store. Relay serializes these fields at the start of the payload, so they can
+be read from there without parsing the rest of a possibly large event.
+"""
+
+from __future__ import annotations
+
+import re
+from collections.abc import Collection, Iterator, Mapping
+from typing import Any
+
+from sentry.utils import json
+
+# A string, a structural character or any other scalar, after whitespace.
+_TOKEN_RE = re.compile(rb'\s*("(?:[^"\\]|\\.)*"|[{}\[\]:,]|[^\s"{}\[\]:,]+)', re.DOTALL)
+
+# How far into a payload to look for the header fields.
+HEADER_SCAN_LIMIT = 4096
+
+
+def scan_header(
+    payload: bytes, keys: Collection[str], limit: int = HEADER_SCAN_LIMIT
+) -> dict[str, str]:
+    """
+    Returns the string values of `keys` in the top level of the JSON object
+    `payload`, looking only at the tokens starting in its first `limit`
+    bytes. Keys which are not found there, or whose value is not a string,
+    are missing from the result.
+    """
+    wanted = {json.dumps(key).encode("utf-8"): key for key in keys}
+    found: dict[str, str] = {}
+    depth = 0
+    key: bytes | None = None
+    after_colon = False
+
+    position = 0
+    while position < limit and len(found) < len(wanted):
+        match = _TOKEN_RE.match(payload, position)
+        if match is None:
+            break
+        position = match.end()
+        token = match.group(1)
+
+        if token in (b"{", b"["):
+            if depth == 0 and token != b"{":
+                break
+            depth += 1
+            after_colon = False
+        elif token in (b"}", b"]"):
+            depth -= 1
+            if depth <= 0:
+                break
+        elif depth != 1:
+            continue
+        elif token == b":":
+            after_colon = True
+        elif token == b",":
+            key = None
+            after_colon = False
+        elif after_colon:
+            if key in wanted and token.startswith(b'"'):
+                found[wanted[key]] = json.loads(token)
+            after_colon = False
+        elif token.startswith(b'"'):
+            key = token
+
+    return found
+
+
+class LazyPayload(Mapping[str, Any]):
+    """
+    A read-only event payload which is only parsed once something other than
+    the fields in `header` is accessed.
+    """
+
+    def __init__(self, payload: bytes | str, header: Mapping[str, Any]) -> None:
+        self.payload = payload
+        self.header = header
+        self._data: Mapping[str, Any] | None = None
+
+    @property
+    def data(self) -> Mapping[str, Any]:
+        if self._data is None:
+            self._data = json.loads(self.payload, use_rapid_json=True, skip_trace=True)
+        return self._data
+
+    def __getitem__(self, key: str) -> Any:
+        if self._data is None and key in self.header:
+            return self.header[key]
+        return self.data[key]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.data)
+
+    def __len__(self) -> int:
+        return len(self.data)
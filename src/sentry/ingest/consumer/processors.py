@@ -1,7 +1,7 @@
 import functools
 import logging
 import random
-from collections.abc import Mapping
+from collections.abc import Mapping, Sequence
 from typing import Any
 
 import sentry_sdk
@@ -13,7 +13,9 @@ from sentry import eventstore, features
 from sentry.attachments import CachedAttachment, attachment_cache
 from sentry.event_manager import save_attachment
 from sentry.eventstore.processing import event_processing_store
+from sentry.features.rollout import in_random_rollout
 from sentry.feedback.usecases.create_feedback import FeedbackCreationSource
+from sentry.ingest.consumer.payload import LazyPayload, scan_header
 from sentry.ingest.userreport import Conflict, save_userreport
 from sentry.killswitches import killswitch_matches_context
 from sentry.models.project import Project
@@ -47,48 +49,31 @@ def trace_func(**span_kwargs):
     return wrapper
 
 
-@trace_func(name="ingest_consumer.process_event")
-@metrics.wraps("ingest_consumer.process_event")
-def process_event(message: IngestMessage, project: Project) -> None:
+def _get_deduplication_key(message: IngestMessage) -> str:
+    return f"ev:{int(message['project_id'])}:{message['event_id']}"
+
+
+def _log_duplicate(message: IngestMessage) -> None:
+    logger.warning(
+        "pre-process-forwarder detected a duplicated event" " with id:%s for project:%s.",
+        message["event_id"],
+        int(message["project_id"]),
+    )
+
+
+def _parse_event(
+    message: IngestMessage, project: Project, raw: bool = False
+) -> Mapping[str, Any] | None:
     """
-    Perform some initial filtering and deserialize the message payload.
+    Deserialize the message payload, returns `None` if the event was shed.
+
+    With `raw`, the payload of transactions is only parsed lazily as the
+    consumer just needs their type, which Relay puts at the start of it.
     """
-    payload = message["payload"]
-    start_time = float(message["start_time"])
     event_id = message["event_id"]
     project_id = int(message["project_id"])
-    remote_addr = message.get("remote_addr")
     attachments = message.get("attachments") or ()
 
-    sentry_sdk.set_extra("event_id", event_id)
-    sentry_sdk.set_extra("len_attachments", len(attachments))
-
-    if project_id == settings.SENTRY_PROJECT:
-        metrics.incr("internal.captured.ingest_consumer.unparsed")
-
-    # check that we haven't already processed this event (a previous instance of the forwarder
-    # died before it could commit the event queue offset)
-    #
-    # XXX(markus): I believe this code is extremely broken:
-    #
-    # * it practically uses memcached in prod which has no consistency
-    #   guarantees (no idea how we don't run into issues there)
-    #
-    # * a TTL of 1h basically doesn't guarantee any deduplication at all. It
-    #   just guarantees a good error message... for one hour.
-    #
-    # This code has been ripped from the old python store endpoint. We're
-    # keeping it around because it does provide some protection against
-    # reprocessing good events if a single consumer is in a restart loop.
-    deduplication_key = f"ev:{project_id}:{event_id}"
-    if cache.get(deduplication_key) is not None:
-        logger.warning(
-            "pre-process-forwarder detected a duplicated event" " with id:%s for project:%s.",
-            event_id,
-            project_id,
-        )
-        return  # message already processed do not reprocess
-
     if killswitch_matches_context(
         "store.load-shed-pipeline-projects",
         {
@@ -99,14 +84,22 @@ def process_event(message: IngestMessage, project: Project) -> None:
     ):
         # This killswitch is for the worst of scenarios and should probably not
         # cause additional load on our logging infrastructure
-        return
+        return None
 
     # Parse the JSON payload. This is required to compute the cache key and
     # call process_event. The payload will be put into Kafka raw, to avoid
     # serializing it again.
     # XXX: Do not use CanonicalKeyDict here. This may break preprocess_event
     # which assumes that data passed in is a raw dictionary.
-    data = json.loads(payload, use_rapid_json=True, skip_trace=True)
+    data: Mapping[str, Any] | None = None
+    if raw:
+        # Transactions are not passed to preprocess_event, so their payload
+        # doesn't need to be parsed if their type can be read cheaply.
+        header = scan_header(_get_raw_payload(message), ("type",))
+        if header.get("type") == "transaction":
+            data = LazyPayload(message["payload"], header)
+    if data is None:
+        data = json.loads(message["payload"], use_rapid_json=True, skip_trace=True)
     if project_id == settings.SENTRY_PROJECT:
         metrics.incr(
             "internal.captured.ingest_consumer.parsed",
@@ -123,10 +116,48 @@ def process_event(message: IngestMessage, project: Project) -> None:
             "event_id": event_id,
         },
     ):
-        return
+        return None
+
+    return data
+
+
+def _get_raw_payload(message: IngestMessage) -> bytes:
+    payload = message["payload"]
+    return payload.encode("utf-8") if isinstance(payload, str) else payload
 
+
+def _store_events(
+    events: Sequence[tuple[IngestMessage, Mapping[str, Any]]], raw: bool
+) -> list[str]:
+    """
+    Stores the payloads of events in the processing store, as received with
+    `raw` rather than encoded again from their parsed data.
+    """
     with metrics.timer("ingest_consumer._store_event"):
-        cache_key = event_processing_store.store(data)
+        if raw:
+            return event_processing_store.store_many_raw(
+                [
+                    (message["event_id"], int(message["project_id"]), _get_raw_payload(message))
+                    for message, _ in events
+                ]
+            )
+        if len(events) == 1:
+            return [event_processing_store.store(events[0][1])]
+        return event_processing_store.store_many([data for _, data in events])
+
+
+def _submit_event(
+    message: IngestMessage, project: Project, data: Mapping[str, Any], cache_key: str
+) -> None:
+    """
+    Spawn the follow-up tasks of an event whose payload is in the processing
+    store under `cache_key`.
+    """
+    payload = message["payload"]
+    start_time = float(message["start_time"])
+    event_id = message["event_id"]
+    project_id = int(message["project_id"])
+    attachments = message.get("attachments") or ()
 
     try:
         # Records rc-processing usage broken down by
@@ -186,11 +217,110 @@ def process_event(message: IngestMessage, project: Project) -> None:
                 has_attachments=bool(attachments),
             )
 
+
+@trace_func(name="ingest_consumer.process_event")
+@metrics.wraps("ingest_consumer.process_event")
+def process_event(message: IngestMessage, project: Project) -> None:
+    """
+    Perform some initial filtering and deserialize the message payload.
+    """
+    event_id = message["event_id"]
+    project_id = int(message["project_id"])
+    attachments = message.get("attachments") or ()
+
+    sentry_sdk.set_extra("event_id", event_id)
+    sentry_sdk.set_extra("len_attachments", len(attachments))
+
+    if project_id == settings.SENTRY_PROJECT:
+        metrics.incr("internal.captured.ingest_consumer.unparsed")
+
+    # check that we haven't already processed this event (a previous instance of the forwarder
+    # died before it could commit the event queue offset)
+    #
+    # XXX(markus): I believe this code is extremely broken:
+    #
+    # * it practically uses memcached in prod which has no consistency
+    #   guarantees (no idea how we don't run into issues there)
+    #
+    # * a TTL of 1h basically doesn't guarantee any deduplication at all. It
+    #   just guarantees a good error message... for one hour.
+    #
+    # This code has been ripped from the old python store endpoint. We're
+    # keeping it around because it does provide some protection against
+    # reprocessing good events if a single consumer is in a restart loop.
+    deduplication_key = _get_deduplication_key(message)
+    if cache.get(deduplication_key) is not None:
+        _log_duplicate(message)
+        return  # message already processed do not reprocess
+
+    raw = in_random_rollout("store.ingest-consumer-raw-payload-rate")
+    data = _parse_event(message, project, raw)
+    if data is None:
+        return
+
+    [cache_key] = _store_events([(message, data)], raw)
+
+    _submit_event(message, project, data, cache_key)
+
     # remember for an 1 hour that we saved this event (deduplication protection)
     cache.set(deduplication_key, "", CACHE_TIMEOUT)
 
     # emit event_accepted once everything is done
-    event_accepted.send_robust(ip=remote_addr, data=data, project=project, sender=process_event)
+    event_accepted.send_robust(
+        ip=message.get("remote_addr"), data=data, project=project, sender=process_event
+    )
+
+
+@trace_func(name="ingest_consumer.process_event_batch")
+@metrics.wraps("ingest_consumer.process_event_batch")
+def process_event_batch(batch: Sequence[tuple[IngestMessage, Project]]) -> None:
+    """
+    Like `process_event` for every message of the batch, but the deduplication
+    keys are read and written, and the payloads stored in the processing
+    store, with one round trip for the whole batch.
+    """
+    metrics.distribution("ingest_consumer.process_event_batch.size", len(batch))
+
+    raw = in_random_rollout("store.ingest-consumer-raw-payload-rate")
+    deduplication_keys = [_get_deduplication_key(message) for message, _ in batch]
+    seen = set(cache.get_many(deduplication_keys))
+
+    events = []
+    for (message, project), deduplication_key in zip(batch, deduplication_keys):
+        if int(message["project_id"]) == settings.SENTRY_PROJECT:
+            metrics.incr("internal.captured.ingest_consumer.unparsed")
+
+        # The batch may contain the same event twice as well
+        if deduplication_key in seen:
+            _log_duplicate(message)
+            continue
+
+        data = _parse_event(message, project, raw)
+        if data is not None:
+            seen.add(deduplication_key)
+            events.append((message, project, data, deduplication_key))
+
+    if not events:
+        return
+
+    cache_keys = _store_events([(message, data) for message, _, data, _ in events], raw)
+
+    submitted = {}
+    try:
+        for (message, project, data, deduplication_key), cache_key in zip(events, cache_keys):
+            _submit_event(message, project, data, cache_key)
+            submitted[deduplication_key] = ""
+    finally:
+        # remember for an 1 hour that we saved these events (deduplication
+        # protection), including the ones submitted before a failure
+        if submitted:
+            cache.set_many(submitted, CACHE_TIMEOUT)
+
+    # emit event_accepted once everything is done
+    for message, project, data, _ in events:
+        event_accepted.send_robust(
+            ip=message.get("remote_addr"), data=data, project=project, sender=process_event
+        )
 
 
 @trace_func(name="ingest_consumer.process_attachment_chunk")
@@ -2,12 +2,13 @@ import logging
 
 import msgpack
 from arroyo.backends.kafka.consumer import KafkaPayload
+from arroyo.processing.strategies.batching import ValuesBatch
 from arroyo.types import Message
 
 from sentry.models.project import Project
 from sentry.utils import metrics
 
-from .processors import IngestMessage, process_event
+from .processors import IngestMessage, process_event, process_event_batch
 
 logger = logging.getLogger(__name__)
 
@@ -27,7 +28,50 @@ def process_simple_event_message(raw_message: Message[KafkaPayload], consumer_ty
       `symbolicate_event` or `process_event`.
     """
 
-    raw_payload = raw_message.payload.value
+    message = _decode_message(raw_message.payload, consumer_type)
+
+    try:
+        with metrics.timer("ingest_consumer.fetch_project"):
+            project = Project.objects.get_from_cache(id=message["project_id"])
+    except Project.DoesNotExist:
+        logger.exception("Project for ingested event does not exist: %s", message["project_id"])
+        return
+
+    return process_event(message, project)
+
+
+def process_simple_event_batch(
+    raw_message: Message[ValuesBatch[KafkaPayload]], consumer_type: str
+) -> None:
+    """
+    Processes a batch of Kafka Messages containing "simple" Event payloads,
+    like `process_simple_event_message` but with the projects fetched and
+    the payloads stored in bulk.
+    """
+    messages = [_decode_message(value.payload, consumer_type) for value in raw_message.payload]
+
+    with metrics.timer("ingest_consumer.fetch_project"):
+        projects = {
+            project.id: project
+            for project in Project.objects.get_many_from_cache(
+                {message["project_id"] for message in messages}
+            )
+        }
+
+    batch = []
+    for message in messages:
+        project = projects.get(message["project_id"])
+        if project is None:
+            logger.error("Project for ingested event does not exist: %s", message["project_id"])
+            continue
+        batch.append((message, project))
+
+    if batch:
+        process_event_batch(batch)
+
+
+def _decode_message(payload: KafkaPayload, consumer_type: str) -> IngestMessage:
+    raw_payload = payload.value
     metrics.distribution(
         "ingest_consumer.payload_size",
         len(raw_payload),
@@ -37,16 +81,7 @@ def process_simple_event_message(raw_message: Message[KafkaPayload], consumer_ty
     message: IngestMessage = msgpack.unpackb(raw_payload, use_list=False)
 
     message_type = message["type"]
-    project_id = message["project_id"]
-
     if message_type != "event":
         raise ValueError(f"Unsupported message type: {message_type}")
 
-    try:
-        with metrics.timer("ingest_consumer.fetch_project"):
-            project = Project.objects.get_from_cache(id=project_id)
-    except Project.DoesNotExist:
-        logger.exception("Project for ingested event does not exist: %s", project_id)
-        return
-
-    return process_event(message, project)
+    return message
@@ -2,11 +2,11 @@ from __future__ import annotations
 
 import enum
 import logging
-from collections.abc import Mapping, Sequence
+from collections.abc import Hashable, Mapping, Sequence
 from typing import TYPE_CHECKING, Any
 
 from django.db import models
-from django.db.models.signals import post_delete, post_save
+from django.db.models.signals import post_delete, post_save, pre_save
 from django.utils import timezone
 
 from sentry.backup.scopes import RelocationScope
@@ -17,7 +17,7 @@ from sentry.models.activity import Activity
 from sentry.models.actor import ActorTuple
 from sentry.models.group import Group
 from sentry.models.groupowner import OwnerRuleType
-from sentry.ownership.grammar import Rule, load_schema, resolve_actors
+from sentry.ownership.grammar import Rule, compile_schema, resolve_actors
 from sentry.types.activity import ActivityType
 from sentry.utils import metrics
 from sentry.utils.cache import cache
@@ -126,7 +126,11 @@ class ProjectOwnership(Model):
         codeowners = ProjectCodeOwners.get_codeowners_cached(project_id)
         ownership.schema = cls.get_combined_schema(ownership, codeowners)
 
-        rules = cls._matching_ownership_rules(ownership, data)
+        revision = (
+            cls._schema_revision(ownership),
+            cls._schema_revision(codeowners) if codeowners and codeowners.schema else None,
+        )
+        rules = cls._matching_ownership_rules(ownership, data, revision)
 
         if not rules:
             return [], None
@@ -187,8 +191,14 @@ class ProjectOwnership(Model):
             if not ownership:
                 ownership = cls(project_id=project_id)
 
-            ownership_rules = cls._matching_ownership_rules(ownership, data)
-            codeowners_rules = cls._matching_ownership_rules(codeowners, data) if codeowners else []
+            ownership_rules = cls._matching_ownership_rules(
+                ownership, data, cls._schema_revision(ownership)
+            )
+            codeowners_rules = (
+                cls._matching_ownership_rules(codeowners, data, cls._schema_revision(codeowners))
+                if codeowners
+                else []
+            )
 
             if not (codeowners_rules or ownership_rules):
                 return []
@@ -365,20 +375,31 @@ class ProjectOwnership(Model):
                     },
                 )
 
+    @classmethod
+    def _schema_revision(
+        cls, ownership: ProjectOwnership | ProjectCodeOwners
+    ) -> tuple[str, int, Any] | None:
+        """
+        Identifies the revision of the schema of saved ownership rules or
+        CODEOWNERS, which changes whenever they are updated.
+        """
+        if ownership.id is None:
+            return None
+        if isinstance(ownership, ProjectOwnership):
+            return ("ownership", ownership.id, ownership.last_updated)
+        return ("codeowners", ownership.id, ownership.date_updated)
+
     @classmethod
     def _matching_ownership_rules(
         cls,
         ownership: ProjectOwnership | ProjectCodeOwners,
         data: Mapping[str, Any],
+        revision: Hashable | None = None,
     ) -> Sequence[Rule]:
-        rules = []
+        if ownership.schema is None:
+            return []
 
-        if ownership.schema is not None:
-            for rule in load_schema(ownership.schema):
-                if rule.test(data):
-                    rules.append(rule)
-
-        return rules
+        return compile_schema(ownership.schema, revision).matching_rules(data)
 
 
 def process_resource_change(instance, change, **kwargs):
@@ -397,6 +418,21 @@ def process_resource_change(instance, change, **kwargs):
     GroupOwner.invalidate_debounce_issue_owners_evaluation_cache(instance.project_id)
 
 
+def modify_last_updated(instance, update_fields=None, **kwargs):
+    # Compiled rules are cached by `last_updated`, see `_schema_revision`
+    if instance.id is None:
+        return
+    if update_fields is not None and "last_updated" not in update_fields:
+        return
+    instance.last_updated = timezone.now()
+
+
+pre_save.connect(
+    modify_last_updated,
+    sender=ProjectOwnership,
+    dispatch_uid="projectownership_modify_last_updated",
+    weak=False,
+)
 # Signals update the cached reads used in post_processing
 post_save.connect(
     lambda instance, **kwargs: process_resource_change(instance, "updated", **kwargs),
@@ -92,16 +92,20 @@ class Rule(Model):
 
     def delete(self, *args, **kwargs):
         rv = super().delete(*args, **kwargs)
-        cache_key = f"project:{self.project_id}:rules"
-        cache.delete(cache_key)
+        self._invalidate_project_rules()
         return rv
 
     def save(self, *args, **kwargs):
         rv = super().save(*args, **kwargs)
-        cache_key = f"project:{self.project_id}:rules"
-        cache.delete(cache_key)
+        self._invalidate_project_rules()
         return rv
 
+    def _invalidate_project_rules(self):
+        # `sentry.rules.index.RuleIndex` is cached next to the rule list
+        cache.delete_many(
+            [f"project:{self.project_id}:rules", f"project:{self.project_id}:rule_index"]
+        )
+
     def get_audit_log_data(self):
         return {
             "label": self.label,
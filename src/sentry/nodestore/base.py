@@ -1,10 +1,15 @@
 from __future__ import annotations
 
+import threading
 from threading import local
+from weakref import WeakKeyDictionary
 
 import sentry_sdk
+from django.conf import settings
 from django.core.cache import InvalidCacheBackendError, caches
 
+from sentry.nodestore.compression import ZSTD_MAGIC, get_registry
+from sentry.nodestore.lru import MISSING, LocalNodeCache
 from sentry.utils import json
 from sentry.utils.cache import memoize
 from sentry.utils.services import Service
@@ -24,6 +29,11 @@ json_dumps = json.JSONEncoder(
 
 json_loads = json.loads
 
+# `NodeStorage` is thread-local, the in-process cache tier is shared between
+# all threads of a storage instance.
+_local_caches: WeakKeyDictionary[NodeStorage, LocalNodeCache | None] = WeakKeyDictionary()
+_local_caches_lock = threading.Lock()
+
 
 class NodeStorage(local, Service):
     """
@@ -96,6 +106,7 @@ class NodeStorage(local, Service):
         if value is None:
             return None
 
+        value = self._decompress(value)
         lines_iter = iter(value.splitlines())
         try:
             if subkey is not None:
@@ -133,11 +144,24 @@ class NodeStorage(local, Service):
         """
         with sentry_sdk.start_span(op="nodestore.get") as span:
             span.set_tag("node_id", id)
+            local_cache = self.local_cache
+            if local_cache is not None:
+                local_items = local_cache.get_many([id], subkey)
+                if id in local_items:
+                    span.set_tag("origin", "from_local_cache")
+                    payload = local_items[id]
+                    span.set_tag("found", payload is not MISSING)
+                    return json_loads(payload) if payload is not MISSING else None
+
             if subkey is None:
                 item_from_cache = self._get_cache_item(id)
                 if item_from_cache:
                     span.set_tag("origin", "from_cache")
                     span.set_tag("found", bool(item_from_cache))
+                    if local_cache is not None:
+                        local_cache.set_many(
+                            {id: self._encode_local_payload(item_from_cache)}, None
+                        )
                     return item_from_cache
 
             span.set_tag("subkey", str(subkey))
@@ -146,6 +170,8 @@ class NodeStorage(local, Service):
             if subkey is None:
                 # set cache item only after we know decoding did not fail
                 self._set_cache_item(id, rv)
+            if local_cache is not None:
+                local_cache.set_many({id: self._encode_local_payload(rv)}, subkey)
 
             span.set_tag("result", "from_service")
             if bytes_data:
@@ -176,10 +202,28 @@ class NodeStorage(local, Service):
             span.set_tag("subkey", str(subkey))
             span.set_tag("num_ids", len(id_list))
 
+            local_cache = self.local_cache
+            local_items = {}
+            if local_cache is not None:
+                local_items = {
+                    id: json_loads(payload) if payload is not MISSING else None
+                    for id, payload in local_cache.get_many(id_list, subkey).items()
+                }
+                if len(local_items) == len(id_list):
+                    span.set_tag("result", "from_local_cache")
+                    return local_items
+                id_list = [id for id in id_list if id not in local_items]
+
             if subkey is None:
                 cache_items = self._get_cache_items(id_list)
+                if local_cache is not None and cache_items:
+                    local_cache.set_many(
+                        {id: self._encode_local_payload(item) for id, item in cache_items.items()},
+                        None,
+                    )
                 if len(cache_items) == len(id_list):
                     span.set_tag("result", "from_cache")
+                    cache_items.update(local_items)
                     return cache_items
 
                 uncached_ids = [id for id in id_list if id not in cache_items]
@@ -190,9 +234,14 @@ class NodeStorage(local, Service):
                 id: self._decode(value, subkey=subkey)
                 for id, value in self._get_bytes_multi(uncached_ids).items()
             }
+            if local_cache is not None:
+                local_cache.set_many(
+                    {id: self._encode_local_payload(item) for id, item in items.items()}, subkey
+                )
             if subkey is None:
                 self._set_cache_items(items)
                 items.update(cache_items)
+            items.update(local_items)
 
             span.set_tag("result", "from_service")
             span.set_tag("found", len(items))
@@ -208,12 +257,44 @@ class NodeStorage(local, Service):
         >>> _encode({"unprocessed": {}, None: {"stacktrace": {}}})
         b'{"stacktrace": {}}\nunprocessed\n{}'
         """
+        platform = self._get_platform(data.get(None))
+        return self._compress(b"\n".join(self._encode_lines(data)), platform)
+
+    def _encode_lines(self, data):
         lines = [json_dumps(data.pop(None)).encode("utf8")]
         for key, value in data.items():
             lines.append(key.encode("ascii"))
             lines.append(json_dumps(value).encode("utf8"))
 
-        return b"\n".join(lines)
+        return lines
+
+    def _get_platform(self, data):
+        if isinstance(data, dict):
+            platform = data.get("platform")
+            if isinstance(platform, str):
+                return platform
+        return None
+
+    def _compress(self, value, platform):
+        """
+        Compresses an encoded payload with the trained dictionary of its
+        platform, if there is one. The zstd frame references the dictionary by
+        id, so `_decompress` does not need to know the platform.
+        """
+        registry = get_registry()
+        if not registry:
+            return value
+        return registry.compress(value, platform)
+
+    def _decompress(self, value):
+        if value.startswith(ZSTD_MAGIC):
+            return get_registry().decompress(value)
+        return value
+
+    def _encode_local_payload(self, item):
+        if item is None:
+            return MISSING
+        return json_dumps(item).encode("utf8")
 
     def set_bytes(self, id, data, ttl=None):
         """
@@ -252,10 +333,16 @@ class NodeStorage(local, Service):
             span.set_tag("node_id", id)
             span.set_data("subkeys_count", len(data))
             cache_item = data.get(None)
-            bytes_data = self._encode(data)
+            subkeys = [None, *(key for key in data if key is not None)]
+            lines = self._encode_lines(data)
+            bytes_data = self._compress(b"\n".join(lines), self._get_platform(cache_item))
             self._set_bytes(id, bytes_data, ttl=ttl)
             # set cache only after encoding and write to nodestore has succeeded
             self._set_cache_item(id, cache_item)
+            if self.local_cache is not None:
+                # the default payload comes first, followed by alternating
+                # subkey and payload lines
+                self.local_cache.set_subkeys(id, dict(zip(subkeys, lines[::2])))
 
     def cleanup(self, cutoff_timestamp):
         raise NotImplementedError
@@ -283,10 +370,14 @@ class NodeStorage(local, Service):
     def _delete_cache_item(self, id):
         if self.cache:
             self.cache.delete(id)
+        if self.local_cache is not None:
+            self.local_cache.delete_many([id])
 
     def _delete_cache_items(self, id_list):
         if self.cache:
             self.cache.delete_many([id for id in id_list])
+        if self.local_cache is not None:
+            self.local_cache.delete_many(id_list)
 
     @memoize
     def cache(self):
@@ -294,3 +385,30 @@ class NodeStorage(local, Service):
             return caches["nodedata"]
         except InvalidCacheBackendError:
             return None
+
+    @property
+    def local_cache(self) -> LocalNodeCache | None:
+        """
+        The in-process cache tier in front of `cache`, configured through
+        `SENTRY_NODESTORE_LOCAL_CACHE_OPTIONS`. Disabled unless `max_items`
+        is set.
+        """
+        try:
+            return _local_caches[self]
+        except KeyError:
+            pass
+
+        with _local_caches_lock:
+            if self not in _local_caches:
+                options = settings.SENTRY_NODESTORE_LOCAL_CACHE_OPTIONS
+                _local_caches[self] = (
+                    LocalNodeCache(
+                        max_items=options["max_items"],
+                        max_bytes=options.get("max_bytes", 64 * 1024 * 1024),
+                        ttl=options.get("ttl", 60),
+                        negative_ttl=options.get("negative_ttl", 0),
+                    )
+                    if options.get("max_items")
+                    else None
+                )
+            return _local_caches[self]
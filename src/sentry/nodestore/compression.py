@@ -0,0 +1,128 @@
+"""
+Compression of nodestore payloads with trained zstd dictionaries.
+
+Event payloads of the same platform share most of their keys, SDK metadata,
+frames and contexts, which generic compression of a single payload cannot
+take advantage of. Dictionaries are trained offline from sample payloads
+(see `train_dictionary`) and stored as files named
+``<platform>.<version>.zdict`` in the directory configured by
+`SENTRY_NODESTORE_COMPRESSION_DICTIONARIES`. Payloads are compressed with
+the highest version for their platform. Every zstd frame records the id of
+the dictionary it was compressed with, so older dictionaries must be kept
+around for as long as payloads compressed with them are stored.
+"""
+
+from __future__ import annotations
+
+import os
+import re
+import threading
+from collections.abc import Sequence
+
+import zstandard
+
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+DEFAULT_DICTIONARY_SIZE = 110 * 1024
+COMPRESSION_LEVEL = 3
+
+_filename_re = re.compile(r"^(?P<platform>[\w-]+)\.(?P<version>\d+)\.zdict$")
+
+
+class UnknownDictionary(Exception):
+    pass
+
+
+class DictionaryRegistry:
+    """
+    Trained dictionaries by platform (latest version only) and by id (all
+    versions).
+    """
+
+    def __init__(self, dictionaries: Sequence[tuple[str, int, bytes]] = ()):
+        self._by_platform: dict[str, tuple[int, zstandard.ZstdCompressionDict]] = {}
+        self._by_id: dict[int, zstandard.ZstdCompressionDict] = {}
+        for platform, version, data in dictionaries:
+            self.add(platform, version, data)
+
+    @classmethod
+    def from_path(cls, path: str) -> DictionaryRegistry:
+        dictionaries = []
+        for filename in sorted(os.listdir(path)):
+            match = _filename_re.match(filename)
+            if match is None:
+                continue
+            with open(os.path.join(path, filename), "rb") as f:
+                dictionaries.append((match["platform"], int(match["version"]), f.read()))
+        return cls(dictionaries)
+
+    def add(self, platform: str, version: int, data: bytes) -> None:
+        dictionary = zstandard.ZstdCompressionDict(data)
+        dictionary.precompute_compress(level=COMPRESSION_LEVEL)
+        self._by_id[dictionary.dict_id()] = dictionary
+        current = self._by_platform.get(platform)
+        if current is None or current[0] < version:
+            self._by_platform[platform] = (version, dictionary)
+
+    def __bool__(self) -> bool:
+        return bool(self._by_id)
+
+    def compress(self, data: bytes, platform: str | None) -> bytes:
+        """
+        Compresses `data` with the dictionary of `platform`. Data of platforms
+        without a dictionary is returned as is.
+        """
+        entry = self._by_platform.get(platform) if platform else None
+        if entry is None:
+            return data
+        compressor = zstandard.ZstdCompressor(dict_data=entry[1], write_dict_id=True)
+        return compressor.compress(data)
+
+    def decompress(self, data: bytes) -> bytes:
+        dict_id = zstandard.get_frame_parameters(data).dict_id
+        if not dict_id:
+            return zstandard.ZstdDecompressor().decompress(data)
+        try:
+            dictionary = self._by_id[dict_id]
+        except KeyError:
+            raise UnknownDictionary(dict_id)
+        return zstandard.ZstdDecompressor(dict_data=dictionary).decompress(data)
+
+
+def train_dictionary(samples: Sequence[bytes], dict_size: int = DEFAULT_DICTIONARY_SIZE) -> bytes:
+    """
+    Trains a dictionary from encoded sample payloads of a single platform.
+    """
+    return zstandard.train_dictionary(dict_size, list(samples)).as_bytes()
+
+
+def save_dictionary(path: str, platform: str, version: int, data: bytes) -> str:
+    filename = os.path.join(path, f"{platform}.{version}.zdict")
+    with open(filename, "wb") as f:
+        f.write(data)
+    return filename
+
+
+_registry: tuple[str | None, DictionaryRegistry] | None = None
+_registry_lock = threading.Lock()
+
+
+def get_registry() -> DictionaryRegistry:
+    """
+    Returns the registry of the configured dictionary directory, loading it
+    on first use.
+    """
+    global _registry
+
+    from django.conf import settings
+
+    path = settings.SENTRY_NODESTORE_COMPRESSION_DICTIONARIES
+    registry = _registry
+    if registry is None or registry[0] != path:
+        with _registry_lock:
+            registry = _registry
+            if registry is None or registry[0] != path:
+                registry = _registry = (
+                    path,
+                    DictionaryRegistry.from_path(path) if path else DictionaryRegistry(),
+                )
+    return registry[1]
@@ -25,6 +25,7 @@ class DjangoNodeStorage(NodeStorage):
             return None
 
         try:
+            value = self._decompress(value)
             if value.startswith(b"{"):
                 return NodeStorage._decode(self, value, subkey=subkey)
 
@@ -0,0 +1,166 @@
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from collections.abc import Iterable, Mapping
+from time import monotonic
+
+from sentry.utils import metrics
+
+# Node payloads which are known to not exist. Stored like regular payloads so
+# that they take part in LRU eviction.
+MISSING = None
+
+
+class LocalNodeCache:
+    """
+    A bounded, thread-safe, in-process LRU cache of encoded node payloads.
+
+    Entries are keyed by `(id, subkey)` and hold the JSON encoded payload of
+    that subkey, so every hit is decoded into a fresh object that callers are
+    free to mutate. An entry holding `MISSING` records that a node does not
+    exist (negative caching), e.g. because it was deleted by this process.
+
+    The cache is bounded both by the number of entries and by the total size
+    of the stored payloads, and entries expire after `ttl` seconds since
+    other processes may overwrite or delete nodes.
+    """
+
+    def __init__(
+        self,
+        max_items: int,
+        max_bytes: int,
+        ttl: float,
+        negative_ttl: float = 0,
+    ):
+        assert max_items > 0
+        assert max_bytes > 0
+        assert ttl > 0
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[
+            tuple[str, str | None], tuple[float, bytes | None]
+        ] = OrderedDict()
+        self._subkeys: dict[str, set[str | None]] = {}
+        self._size = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    def get_many(self, id_list: Iterable[str], subkey: str | None) -> dict[str, bytes | None]:
+        """
+        Returns the cached payloads of all ids which are in the cache, with
+        `MISSING` for nodes that are known to not exist.
+        """
+        now = monotonic()
+        rv = {}
+        expired = 0
+        requested = 0
+        with self._lock:
+            for id in id_list:
+                requested += 1
+                key = (id, subkey)
+                entry = self._entries.get(key)
+                if entry is None:
+                    continue
+                expires_at, payload = entry
+                if expires_at <= now:
+                    self._remove(key)
+                    expired += 1
+                    continue
+                self._entries.move_to_end(key)
+                rv[id] = payload
+
+        negative = sum(1 for payload in rv.values() if payload is MISSING)
+        if len(rv) > negative:
+            metrics.incr("nodestore.local_cache", amount=len(rv) - negative, tags={"result": "hit"})
+        if negative:
+            metrics.incr("nodestore.local_cache", amount=negative, tags={"result": "negative_hit"})
+        if requested > len(rv):
+            metrics.incr(
+                "nodestore.local_cache", amount=requested - len(rv), tags={"result": "miss"}
+            )
+        if expired:
+            metrics.incr("nodestore.local_cache.expired", amount=expired)
+        return rv
+
+    def set_many(self, items: Mapping[str, bytes | None], subkey: str | None) -> None:
+        with self._lock:
+            for id, payload in items.items():
+                self._set((id, subkey), payload)
+            self._evict()
+
+    def set_subkeys(self, id: str, payloads: Mapping[str | None, bytes]) -> None:
+        """
+        Replaces all cached subkeys of `id`, mirroring `NodeStorage.set_subkeys`.
+        """
+        with self._lock:
+            self._remove_node(id)
+            for subkey, payload in payloads.items():
+                self._set((id, subkey), payload)
+            self._evict()
+
+    def delete_many(self, id_list: Iterable[str]) -> None:
+        """
+        Records that the nodes were deleted, so lookups for them don't have to
+        go to the backend until the entries expire.
+        """
+        with self._lock:
+            for id in id_list:
+                subkeys = self._subkeys.get(id, set()) | {None}
+                self._remove_node(id)
+                for subkey in subkeys:
+                    self._set((id, subkey), MISSING, self.ttl)
+            self._evict()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._subkeys.clear()
+            self._size = 0
+
+    def _set(
+        self, key: tuple[str, str | None], payload: bytes | None, ttl: float | None = None
+    ) -> None:
+        if ttl is None:
+            ttl = self.ttl if payload is not MISSING else self.negative_ttl
+        self._remove(key)
+        if ttl <= 0:
+            return
+        self._entries[key] = (monotonic() + ttl, payload)
+        self._subkeys.setdefault(key[0], set()).add(key[1])
+        self._size += len(payload or b"")
+
+    def _remove(self, key: tuple[str, str | None]) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        self._size -= len(entry[1] or b"")
+        subkeys = self._subkeys.get(key[0])
+        if subkeys is not None:
+            subkeys.discard(key[1])
+            if not subkeys:
+                del self._subkeys[key[0]]
+
+    def _remove_node(self, id: str) -> None:
+        for subkey in list(self._subkeys.get(id, ())):
+            self._remove((id, subkey))
+
+    def _evict(self) -> None:
+        evicted = 0
+        while self._entries and (
+            len(self._entries) > self.max_items or self._size > self.max_bytes
+        ):
+            key = next(iter(self._entries))
+            self._remove(key)
+            evicted += 1
+        if evicted:
+            metrics.incr("nodestore.local_cache.evicted", amount=evicted)
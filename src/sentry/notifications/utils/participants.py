@@ -406,6 +406,58 @@ def get_send_to(
     )
 
 
+def get_send_to_by_event(
+    project: Project,
+    target_type: ActionTargetType,
+    events: Iterable[Event],
+    target_identifier: int | None = None,
+    fallthrough_choice: FallthroughChoiceType | None = None,
+) -> Mapping[Event, Mapping[ExternalProviders, set[RpcActor]]]:
+    """
+    Like `get_send_to` for each of `events`, but the notification settings of
+    the recipients are only looked up once for every distinct set of
+    recipients, and the recipients themselves only once unless they are the
+    owners of each event.
+    """
+    recipients_by_event: dict[Event, frozenset[RpcActor]] = {}
+    shared_recipients: frozenset[RpcActor] | None = None
+    for event in events:
+        if target_type == ActionTargetType.ISSUE_OWNERS:
+            recipients_by_event[event] = frozenset(
+                determine_eligible_recipients(
+                    project, target_type, target_identifier, event, fallthrough_choice
+                )
+            )
+        else:
+            if shared_recipients is None:
+                shared_recipients = frozenset(
+                    determine_eligible_recipients(project, target_type, target_identifier)
+                )
+            recipients_by_event[event] = shared_recipients
+
+    send_to_by_recipients = {
+        recipients: _get_recipients_by_provider(
+            project,
+            recipients,
+            target_type=target_type,
+            target_identifier=target_identifier,
+        )
+        for recipients in set(recipients_by_event.values())
+    }
+
+    output: dict[Event, Mapping[ExternalProviders, set[RpcActor]]] = {}
+    for event, recipients in recipients_by_event.items():
+        # Copied so that callers can still modify the sets of each event
+        output[event] = defaultdict(
+            set,
+            {
+                provider: set(actors)
+                for provider, actors in send_to_by_recipients[recipients].items()
+            },
+        )
+    return output
+
+
 def get_fallthrough_recipients(
     project: Project, fallthrough_choice: FallthroughChoiceType | None
 ) -> Iterable[RpcUser]:
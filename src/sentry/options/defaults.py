@@ -586,6 +586,24 @@ register(
     flags=FLAG_AUTOMATOR_MODIFIABLE | FLAG_MODIFIABLE_RATE,
 )
 
+# The fraction of events whose payload the ingest consumer stores in the
+# processing store as it was received, instead of re-encoding the parsed event.
+# Transactions aren't even parsed in the consumer then.
+register(
+    "store.ingest-consumer-raw-payload-rate",
+    default=0.0,
+    flags=FLAG_AUTOMATOR_MODIFIABLE | FLAG_MODIFIABLE_RATE,
+)
+
+# The maximum size in bytes of a segment in the spans buffer. Spans written to
+# a segment at this size are dropped.
+register(
+    "spans.buffer.max-segment-bytes",
+    type=Int,
+    default=10 * 1024 * 1024,
+    flags=FLAG_AUTOMATOR_MODIFIABLE,
+)
+
 # Symbolicator refactors
 # - Disabling minidump stackwalking in endpoints
 register(
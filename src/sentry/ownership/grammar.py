@@ -1,10 +1,12 @@
 from __future__ import annotations
 
 import re
-from collections import namedtuple
-from collections.abc import Callable, Iterable, Mapping, Sequence
+import threading
+from collections import defaultdict, namedtuple
+from collections.abc import Callable, Hashable, Iterable, Mapping, Sequence
 from typing import Any
 
+from cachetools import LRUCache
 from parsimonious.exceptions import ParseError
 from parsimonious.grammar import Grammar
 from parsimonious.nodes import Node, NodeVisitor
@@ -15,12 +17,13 @@ from sentry.models.actor import ActorTuple
 from sentry.models.integrations.repository_project_path_config import RepositoryProjectPathConfig
 from sentry.models.organizationmember import OrganizationMember
 from sentry.services.hybrid_cloud.user.service import user_service
+from sentry.utils import metrics
 from sentry.utils.codeowners import codeowners_match
 from sentry.utils.event_frames import find_stack_frames, get_sdk_name, munged_filename_and_frames
 from sentry.utils.glob import glob_match
 from sentry.utils.safe import PathSearchable, get_path
 
-__all__ = ("parse_rules", "dump_schema", "load_schema")
+__all__ = ("parse_rules", "dump_schema", "load_schema", "compile_schema")
 
 VERSION = 1
 
@@ -29,6 +32,9 @@ PATH = "path"
 MODULE = "module"
 CODEOWNERS = "codeowners"
 
+# Number of compiled rule sets kept per process, see `compile_schema`
+COMPILED_SCHEMA_CACHE_SIZE = 500
+
 # Grammar is defined in EBNF syntax.
 ownership_grammar = Grammar(
     rf"""
@@ -206,6 +212,154 @@ class Matcher(namedtuple("Matcher", "type pattern")):
         return False
 
 
+def _frame_values(frames: Sequence[Mapping[str, Any]], keys: Sequence[str]) -> list[str]:
+    """
+    Collect the distinct, non-empty values of `keys` across all frames, in
+    the order `Matcher.test_frames` would visit them.
+    """
+    values: dict[str, None] = {}
+    for frame in (f for f in frames if isinstance(f, Mapping)):
+        for key in keys:
+            value = frame.get(key)
+            if value:
+                values[value] = None
+    return list(values)
+
+
+def _tag_keys(data: PathSearchable) -> set[str]:
+    keys = set()
+    for tag in get_path(data, "tags", filter=True) or ():
+        if isinstance(tag, (list, tuple)) and len(tag) == 2:
+            keys.add(tag[0])
+    return keys
+
+
+class CompiledRules:
+    """
+    A pre-processed list of Rules which is evaluated against an event in a
+    single pass.
+
+    `Rule.test` re-extracts (and re-munges) the stack frames of the event for
+    every single rule. Here the frames are walked once per event, frame values
+    are deduplicated, identical matchers are only evaluated once, and tag
+    rules are bucketed by tag key so that buckets for tags the event does not
+    carry are skipped entirely.
+
+    Matching semantics are identical to calling `Rule.test` on every rule.
+    """
+
+    def __init__(self, rules: Sequence[Rule]) -> None:
+        self.rules = list(rules)
+        # Each bucket maps a unique matcher to the indexes of the rules using it
+        self._url: dict[Matcher, list[int]] = defaultdict(list)
+        self._path: dict[Matcher, list[int]] = defaultdict(list)
+        self._module: dict[Matcher, list[int]] = defaultdict(list)
+        self._codeowners: dict[Matcher, list[int]] = defaultdict(list)
+        self._tags: dict[str, dict[Matcher, list[int]]] = defaultdict(lambda: defaultdict(list))
+
+        for index, rule in enumerate(self.rules):
+            matcher = rule.matcher
+            if matcher.type == URL:
+                self._url[matcher].append(index)
+            elif matcher.type == PATH:
+                self._path[matcher].append(index)
+            elif matcher.type == MODULE:
+                self._module[matcher].append(index)
+            elif matcher.type.startswith("tags."):
+                self._tags[matcher.type[5:]][matcher].append(index)
+            elif matcher.type == CODEOWNERS:
+                self._codeowners[matcher].append(index)
+
+    def __len__(self) -> int:
+        return len(self.rules)
+
+    def matching_indexes(self, data: PathSearchable) -> list[int]:
+        """Return the sorted indexes of all rules matching the event data."""
+        matched: list[int] = []
+
+        if self._url:
+            for matcher, indexes in self._url.items():
+                if matcher.test_url(data):
+                    matched.extend(indexes)
+
+        if self._path or self._codeowners:
+            frames, keys = Matcher.munge_if_needed(data)
+            values = _frame_values(frames, keys)
+            if values:
+                for matcher, indexes in self._path.items():
+                    pattern = matcher.pattern
+                    if any(
+                        glob_match(value, pattern, ignorecase=True, path_normalize=True)
+                        for value in values
+                    ):
+                        matched.extend(indexes)
+                for matcher, indexes in self._codeowners.items():
+                    pattern = matcher.pattern
+                    if any(codeowners_match(value, pattern) for value in values):
+                        matched.extend(indexes)
+
+        if self._module:
+            values = _frame_values(find_stack_frames(data), ["module"])
+            if values:
+                for matcher, indexes in self._module.items():
+                    pattern = matcher.pattern
+                    if any(
+                        glob_match(value, pattern, ignorecase=True, path_normalize=True)
+                        for value in values
+                    ):
+                        matched.extend(indexes)
+
+        if self._tags:
+            tag_keys = _tag_keys(data)
+            has_user = bool(get_path(data, "user", filter=True))
+            for tag, matchers in self._tags.items():
+                if not (
+                    tag in tag_keys
+                    or EventSubjectTemplateData.tag_aliases.get(tag, tag) in tag_keys
+                    or (has_user and tag.startswith("user."))
+                ):
+                    continue
+                for matcher, indexes in matchers.items():
+                    if matcher.test_tag(data):
+                        matched.extend(indexes)
+
+        matched.sort()
+        return matched
+
+    def matching_rules(self, data: PathSearchable) -> list[Rule]:
+        """Return all rules matching the event data, in their original order."""
+        return [self.rules[index] for index in self.matching_indexes(data)]
+
+
+_compiled_schemas: LRUCache[Hashable, CompiledRules] = LRUCache(maxsize=COMPILED_SCHEMA_CACHE_SIZE)
+_compiled_schemas_lock = threading.Lock()
+
+
+def compile_schema(schema: Mapping[str, Any], revision: Hashable | None = None) -> CompiledRules:
+    """
+    Load and compile a JSON schema into `CompiledRules`.
+
+    Compiled rules are cached per process by `revision`, which must change
+    whenever the schema does, e.g. the id and update time of the ownership
+    rules (and CODEOWNERS) the schema was built from. Without a revision the
+    schema is compiled on every call.
+    """
+    if revision is None:
+        return CompiledRules(load_schema(schema))
+
+    with _compiled_schemas_lock:
+        compiled = _compiled_schemas.get(revision)
+    if compiled is not None:
+        metrics.incr("ownership.compiled_schema.cache", tags={"result": "hit"}, sample_rate=0.1)
+        return compiled
+
+    metrics.incr("ownership.compiled_schema.cache", tags={"result": "miss"}, sample_rate=0.1)
+    compiled = CompiledRules(load_schema(schema))
+    with _compiled_schemas_lock:
+        _compiled_schemas[revision] = compiled
+    return compiled
+
+
 class Owner(namedtuple("Owner", "type identifier")):
     """
     An Owner represents a User or Team who owns this Rule.
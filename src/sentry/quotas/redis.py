@@ -1,13 +1,16 @@
+import threading
 from time import time
 
 import rb
 import sentry_sdk
+from cachetools import LRUCache
 from rediscluster import RedisCluster
 
 from sentry.constants import DataCategory
 from sentry.models.project import Project
 from sentry.models.projectkey import ProjectKey
 from sentry.quotas.base import NotRateLimited, Quota, QuotaConfig, QuotaScope, RateLimited
+from sentry.utils import metrics
 from sentry.utils.redis import (
     get_dynamic_cluster_from_options,
     is_instance_rb_cluster,
@@ -25,7 +28,7 @@ class RedisQuota(Quota):
     #: metrics may not be in sync with the computer running this code.
     grace = 60
 
-    def __init__(self, **options: object):
+    def __init__(self, rejected_cache_size: int = 10_000, **options: object):
         self.is_redis_cluster, self.cluster, options = get_dynamic_cluster_from_options(
             "SENTRY_QUOTA_OPTIONS", options
         )
@@ -40,6 +43,17 @@ class RedisQuota(Quota):
         super().__init__(**options)
         self.namespace = "quota"
 
+        #: Quota counters which rejected an item, mapped to the limit they were
+        #: checked against. Since rejected items don't increment any counters,
+        #: a counter stays over its limit until the end of its window (the
+        #: window is part of the counter key) or until items are refunded, so
+        #: ``is_rate_limited`` can reject further items without asking Redis.
+        #: Refunds only invalidate entries in the process they happen in.
+        self._rejected: LRUCache[str, int] | None = (
+            LRUCache(rejected_cache_size) if rejected_cache_size > 0 else None
+        )
+        self._rejected_lock = threading.Lock()
+
     def validate(self) -> None:
         validate_dynamic_cluster(self.is_redis_cluster, self.cluster)
 
@@ -224,6 +238,15 @@ class RedisQuota(Quota):
 
         pipe.execute()
 
+        if self._rejected is not None:
+            with self._rejected_lock:
+                for quota in quotas:
+                    shift = project.organization_id % quota.window
+                    self._rejected.pop(
+                        self.__get_redis_key(quota, timestamp, shift, project.organization_id),
+                        None,
+                    )
+
     def get_next_period_start(self, interval: int, shift: int, timestamp: float) -> float:
         """Return the timestamp when the next rate limit period begins for an interval."""
         return (((timestamp - shift) // interval) + 1) * interval + shift
@@ -255,6 +278,7 @@ class RedisQuota(Quota):
 
         keys: list[str] = []
         args: list[int] = []
+        quota_keys: list[str] = []
         for quota in quotas:
             if quota.limit == 0:
                 # A zero-sized quota is the absolute worst-case. Do not call
@@ -270,6 +294,7 @@ class RedisQuota(Quota):
             shift: int = project.organization_id % quota.window
             quota_key = self.__get_redis_key(quota, timestamp, shift, project.organization_id)
             return_key = self.get_refunded_quota_key(quota_key)
+            quota_keys.append(quota_key)
             keys.extend((quota_key, return_key))
             expiry = self.get_next_period_start(quota.window, shift, timestamp) + self.grace
 
@@ -280,11 +305,30 @@ class RedisQuota(Quota):
         if not keys or not args:
             return NotRateLimited()
 
-        client = self.__get_redis_client(str(project.organization_id))
-        rejections = is_rate_limited(client, keys, args)
-
-        if not any(rejections):
-            return NotRateLimited()
+        rejections: list[bool] | None = None
+        if self._rejected is not None:
+            with self._rejected_lock:
+                rejections = [
+                    quota.limit is not None and self._rejected.get(quota_key) == quota.limit
+                    for quota, quota_key in zip(quotas, quota_keys)
+                ]
+            if any(rejections):
+                metrics.incr("quotas.redis.rejected_cache", tags={"result": "hit"})
+            else:
+                rejections = None
+
+        if rejections is None:
+            client = self.__get_redis_client(str(project.organization_id))
+            rejections = is_rate_limited(client, keys, args)
+
+            if not any(rejections):
+                return NotRateLimited()
+
+            if self._rejected is not None:
+                with self._rejected_lock:
+                    for quota, quota_key, rejected in zip(quotas, quota_keys, rejections):
+                        if rejected:
+                            self._rejected[quota_key] = quota.limit
 
         worst_case: tuple[float, int | None] = (0, None)
         for quota, rejected in zip(quotas, rejections):
@@ -6,10 +6,17 @@ from sentry.utils.services import Service
 
 if TYPE_CHECKING:
     from sentry.models.project import Project
+    from sentry.ratelimits.concurrent import ConcurrentLimitInfo
 
 
 class RateLimiter(Service):
-    __all__ = ("is_limited", "validate", "current_value", "is_limited_with_value")
+    __all__ = (
+        "is_limited",
+        "validate",
+        "current_value",
+        "is_limited_with_value",
+        "is_limited_with_concurrency",
+    )
 
     window = 60
 
@@ -29,5 +36,26 @@ class RateLimiter(Service):
     ) -> tuple[bool, int, int]:
         return False, 0, 0
 
+    def is_limited_with_concurrency(
+        self,
+        key: str,
+        limit: int,
+        request_uid: str,
+        concurrent_limit: int | None = None,
+        project: Project | None = None,
+        window: int | None = None,
+        max_ttl_seconds: int = 0,
+    ) -> tuple[bool, int, int, ConcurrentLimitInfo | None]:
+        """
+        Like `is_limited_with_value`, but also registers the request with the
+        concurrent rate limiter when it is not limited. Backends which can't
+        do both at once return `None` as the concurrent limit info and leave
+        the concurrent limit to the caller.
+        """
+        is_limited, current, reset_time = self.is_limited_with_value(
+            key, limit, project=project, window=window
+        )
+        return is_limited, current, reset_time, None
+
     def validate(self) -> None:
         raise NotImplementedError
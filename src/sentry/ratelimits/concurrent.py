@@ -8,6 +8,7 @@ from django.conf import settings
 
 from sentry.exceptions import InvalidConfiguration
 from sentry.utils import redis
+from sentry.utils.hashlib import md5_text
 
 logger = logging.getLogger(__name__)
 
@@ -18,6 +19,14 @@ DEFAULT_MAX_TTL_SECONDS = 30
 rate_limit_info = redis.load_script("ratelimits/api_limiter.lua")
 
 
+def get_concurrent_limit_key(key: str) -> str:
+    """
+    The hash tag puts the key into the same Redis Cluster slot as the fixed
+    window keys of `RedisRateLimiter`, so both can be used by one script.
+    """
+    return f"concurrent_limit:{{{md5_text(key).hexdigest()}}}"
+
+
 @dataclass
 class ConcurrentLimitInfo:
     limit: int
@@ -39,7 +48,7 @@ class ConcurrentRateLimiter:
             raise InvalidConfiguration(str(e))
 
     def namespaced_key(self, key: str) -> str:
-        return f"concurrent_limit:{key}"
+        return get_concurrent_limit_key(key)
 
     def start_request(self, key: str, limit: int, request_uid: str) -> ConcurrentLimitInfo:
         redis_key = self.namespaced_key(key)
@@ -9,6 +9,11 @@ from redis.exceptions import RedisError
 
 from sentry.exceptions import InvalidConfiguration
 from sentry.ratelimits.base import RateLimiter
+from sentry.ratelimits.concurrent import (
+    DEFAULT_MAX_TTL_SECONDS,
+    ConcurrentLimitInfo,
+    get_concurrent_limit_key,
+)
 from sentry.utils import redis
 from sentry.utils.hashlib import md5_text
 
@@ -17,6 +22,8 @@ if TYPE_CHECKING:
 
 logger = logging.getLogger(__name__)
 
+request_limiter = redis.load_script("ratelimits/request_limiter.lua")
+
 
 def _time_bucket(request_time: float, window: int) -> int:
     """Bucket number lookup for given UTC time since epoch"""
@@ -42,8 +49,9 @@ class RedisRateLimiter(RateLimiter):
     ) -> str:
         """
         Construct a rate limit key using the args given. Key will have a format of:
-        "rl:<key_hex>:[project?<project_id>:]<time_bucket>"
-        where the time bucket is calculated by integer dividing the current time by the window
+        "rl:{<key_hex>}:[project?<project_id>:]<time_bucket>"
+        where the time bucket is calculated by integer dividing the current time by the window.
+        The key hex is a hash tag shared with the concurrent limit key of the same key.
         """
 
         if window is None or window == 0:
@@ -55,7 +63,7 @@ class RedisRateLimiter(RateLimiter):
         key_hex = md5_text(key).hexdigest()
         bucket = _time_bucket(request_time, window)
 
-        redis_key = f"rl:{key_hex}"
+        redis_key = f"rl:{{{key_hex}}}"
         if project is not None:
             redis_key += f":{project.id}"
         redis_key += f":{bucket}"
@@ -115,3 +123,73 @@ class RedisRateLimiter(RateLimiter):
             return False, 0, reset_time
 
         return result > limit, result, reset_time
+
+    def is_limited_with_concurrency(
+        self,
+        key: str,
+        limit: int,
+        request_uid: str,
+        concurrent_limit: int | None = None,
+        project: Project | None = None,
+        window: int | None = None,
+        max_ttl_seconds: int = DEFAULT_MAX_TTL_SECONDS,
+    ) -> tuple[bool, int, int, ConcurrentLimitInfo | None]:
+        """
+        Does the rate limit check of `is_limited_with_value` and, unless the
+        request is limited, registers it with the concurrent rate limiter,
+        all in a single round trip to redis.
+        """
+        request_time = time()
+        if window is None or window == 0:
+            window = self.window
+        redis_key = self._construct_redis_key(
+            key, project=project, window=window, request_time=request_time
+        )
+
+        expiration = window - int(request_time % window)
+        # Reset Time = next time bucket's start time
+        reset_time = _bucket_start_time(_time_bucket(request_time, window) + 1, window)
+        try:
+            (
+                current,
+                window_limited,
+                current_executions,
+                allowed,
+                cleaned_up_requests,
+            ) = request_limiter(
+                self.client,
+                [redis_key, get_concurrent_limit_key(key)],
+                [
+                    limit,
+                    expiration,
+                    concurrent_limit if concurrent_limit is not None else -1,
+                    request_uid,
+                    request_time,
+                    max_ttl_seconds,
+                ],
+            )
+        except RedisError:
+            logger.exception("Failed to check rate limits in redis")
+            concurrent_info = None
+            if concurrent_limit is not None:
+                concurrent_info = ConcurrentLimitInfo(concurrent_limit, -1, False)
+            return False, 0, reset_time, concurrent_info
+
+        if cleaned_up_requests != 0:
+            logger.info(
+                "Cleaned up concurrent executions: %s",
+                cleaned_up_requests,
+                extra={
+                    "cleaned_up_requests": cleaned_up_requests,
+                    "key": key,
+                    "limit": concurrent_limit,
+                    "request_uid": request_uid,
+                },
+            )
+
+        concurrent_info = None
+        if concurrent_limit is not None and not window_limited:
+            concurrent_info = ConcurrentLimitInfo(
+                concurrent_limit, int(current_executions), not bool(allowed)
+            )
+        return bool(window_limited), int(current), reset_time, concurrent_info
@@ -1,6 +1,10 @@
 from __future__ import annotations
 
-from collections.abc import Sequence
+import threading
+from collections import defaultdict
+from collections.abc import Iterable, Sequence
+from dataclasses import dataclass, field, replace
+from time import time
 from typing import Any
 
 from sentry_redis_tools.clients import RedisCluster, StrictRedis
@@ -11,7 +15,7 @@ from sentry_redis_tools.sliding_windows_rate_limiter import (
 from sentry_redis_tools.sliding_windows_rate_limiter import RequestedQuota, Timestamp
 
 from sentry.exceptions import InvalidConfiguration
-from sentry.utils import redis
+from sentry.utils import metrics, redis
 from sentry.utils.services import Service
 
 __all__ = ["Quota", "GrantedQuota", "RequestedQuota", "Timestamp"]
@@ -119,11 +123,49 @@ class SlidingWindowRateLimiter(Service):
         return grants
 
 
+@dataclass
+class QuotaLease:
+    """
+    A slice of a quota which has been consumed in Redis in advance and can be
+    granted locally.
+    """
+
+    remaining: int
+    expires_at: Timestamp
+    # (timestamp, amount) of every reservation making up the lease, the
+    # latest last
+    reservations: list[tuple[Timestamp, int]] = field(default_factory=list)
+
+
+# (effective prefix, quota)
+LeaseKey = tuple[str, Quota]
+
+
 class RedisSlidingWindowRateLimiter(SlidingWindowRateLimiter):
+    """
+    Rate limiter backed by the sliding windows of `sentry_redis_tools`.
+
+    When `lease_fraction` is set, quotas are not checked in Redis for every
+    request. Instead the process consumes `lease_fraction` of a quota's limit
+    in Redis in advance and grants requests from that lease locally until it
+    is used up or `lease_seconds` (at most the quota's window) have passed.
+    Unused quota is given back when an expired lease is replaced or in
+    `release_leases`.
+
+    Every lease is checked against Redis like a regular request, so the
+    quota can't be over-admitted by more than without leases, but up to
+    one lease per process and quota may be reserved without being used.
+    Quota is also consumed when it is leased rather than in `use_quotas`.
+    """
+
     def __init__(self, **options: Any) -> None:
         self.cluster_key = options.get("cluster", "default")
+        self.lease_fraction: float | None = options.get("lease_fraction")
+        self.lease_seconds: int = options.get("lease_seconds", 10)
         self._client: RedisCluster | StrictRedis | None = None
         self._impl: RedisSlidingWindowRateLimiterImpl | None = None
+        self._leases: dict[LeaseKey, QuotaLease] = {}
+        self._leases_lock = threading.Lock()
         super().__init__(**options)
 
     @property
@@ -149,7 +191,72 @@ class RedisSlidingWindowRateLimiter(SlidingWindowRateLimiter):
     def check_within_quotas(
         self, requests: Sequence[RequestedQuota], timestamp: Timestamp | None = None
     ) -> tuple[Timestamp, Sequence[GrantedQuota]]:
-        return self.impl.check_within_quotas(requests, timestamp)
+        if not self.lease_fraction:
+            return self.impl.check_within_quotas(requests, timestamp)
+
+        timestamp = int(time()) if timestamp is None else int(timestamp)
+
+        needed: dict[LeaseKey, int] = defaultdict(int)
+        for request in requests:
+            assert request.quotas
+            for quota in request.quotas:
+                needed[self._get_lease_key(request, quota)] += request.requested
+
+        with self._leases_lock:
+            # Give back the quota of all expired leases, not only of the ones
+            # needed now, so that leases of idle quotas don't hold on to it
+            expired = [
+                (key, lease) for key, lease in self._leases.items() if lease.expires_at <= timestamp
+            ]
+            for key, _ in expired:
+                del self._leases[key]
+
+            to_acquire: dict[LeaseKey, int] = {}
+            for key, amount in needed.items():
+                lease = self._leases.get(key)
+                remaining = lease.remaining if lease is not None else 0
+                if remaining < amount:
+                    to_acquire[key] = max(amount - remaining, self._get_lease_size(key[1]))
+
+        # Redis is only called without holding the lock, so that other threads
+        # can keep granting from their leases in the meantime
+        if expired:
+            self._release(expired, timestamp)
+        grants = self._acquire(to_acquire, timestamp) if to_acquire else []
+
+        with self._leases_lock:
+            self._add_leases(to_acquire, grants, timestamp)
+
+            # Like `check_within_quotas` of the Redis implementation, account
+            # for the quota granted to earlier requests of the same call
+            used: dict[LeaseKey, int] = defaultdict(int)
+            results = []
+            for request in requests:
+                granted = request.requested
+                reached_quotas = []
+                for quota in request.quotas:
+                    key = self._get_lease_key(request, quota)
+                    lease = self._leases.get(key)
+                    remaining = max(0, (lease.remaining if lease is not None else 0) - used[key])
+                    if remaining < granted:
+                        granted = remaining
+                        reached_quotas.append(quota)
+
+                for quota in request.quotas:
+                    used[self._get_lease_key(request, quota)] += granted
+
+                results.append(
+                    GrantedQuota(
+                        prefix=request.prefix, granted=granted, reached_quotas=reached_quotas
+                    )
+                )
+
+        if len(to_acquire) < len(needed):
+            metrics.incr(
+                "ratelimits.sliding_windows.lease.local_checks",
+                amount=len(needed) - len(to_acquire),
+            )
+        return timestamp, results
 
     def use_quotas(
         self,
@@ -157,4 +264,100 @@ class RedisSlidingWindowRateLimiter(SlidingWindowRateLimiter):
         grants: Sequence[GrantedQuota],
         timestamp: Timestamp,
     ) -> None:
-        return self.impl.use_quotas(requests, grants, timestamp)
+        if not self.lease_fraction:
+            return self.impl.use_quotas(requests, grants, timestamp)
+
+        assert len(requests) == len(grants)
+        with self._leases_lock:
+            for request, grant in zip(requests, grants):
+                for quota in request.quotas:
+                    lease = self._leases.get(self._get_lease_key(request, quota))
+                    if lease is not None:
+                        lease.remaining = max(0, lease.remaining - grant.granted)
+
+    def release_leases(self, timestamp: Timestamp | None = None) -> None:
+        """
+        Gives the unused quota of all leases back, e.g. before shutting down.
+        """
+        timestamp = int(time()) if timestamp is None else int(timestamp)
+        with self._leases_lock:
+            leases, self._leases = self._leases, {}
+        self._release(leases.items(), timestamp)
+
+    def _get_lease_key(self, request: RequestedQuota, quota: Quota) -> LeaseKey:
+        return (quota.prefix_override or request.prefix, quota)
+
+    def _get_lease_size(self, quota: Quota) -> int:
+        assert self.lease_fraction is not None
+        return max(1, int(quota.limit * self.lease_fraction))
+
+    def _acquire(
+        self, to_acquire: dict[LeaseKey, int], timestamp: Timestamp
+    ) -> Sequence[GrantedQuota]:
+        return self.impl.check_and_use_quotas(
+            [
+                RequestedQuota(
+                    prefix=prefix,
+                    requested=amount,
+                    quotas=[replace(quota, prefix_override=None)],
+                )
+                for (prefix, quota), amount in to_acquire.items()
+            ],
+            timestamp,
+        )
+
+    def _add_leases(
+        self, to_acquire: dict[LeaseKey, int], grants: Sequence[GrantedQuota], timestamp: Timestamp
+    ) -> None:
+        acquired = 0
+        for key, grant in zip(to_acquire, grants):
+            quota = key[1]
+            # Quota reserved at `timestamp` only counts towards the window
+            # until the window has passed, so the lease must not outlive it.
+            expires_at = timestamp + min(self.lease_seconds, quota.window_seconds)
+            lease = self._leases.get(key)
+            if lease is None:
+                lease = self._leases[key] = QuotaLease(remaining=0, expires_at=expires_at)
+            if grant.granted:
+                lease.remaining += grant.granted
+                lease.expires_at = min(lease.expires_at, expires_at)
+                lease.reservations.append((timestamp, grant.granted))
+                acquired += grant.granted
+
+        if to_acquire:
+            metrics.incr("ratelimits.sliding_windows.lease.acquisitions", amount=len(to_acquire))
+        if acquired:
+            metrics.incr("ratelimits.sliding_windows.lease.acquired", amount=acquired)
+
+    def _release(self, leases: Iterable[tuple[LeaseKey, QuotaLease]], timestamp: Timestamp) -> None:
+        decrements: dict[str, int] = defaultdict(int)
+        ttls: dict[str, int] = {}
+        for (prefix, quota), lease in leases:
+            remaining = lease.remaining
+            for reserved_at, amount in reversed(lease.reservations):
+                if remaining <= 0:
+                    break
+                returned = min(remaining, amount)
+                remaining -= returned
+                # The reservation no longer counts towards the window
+                if timestamp >= reserved_at + quota.window_seconds:
+                    continue
+                redis_key = self.impl._build_redis_key_raw(
+                    prefix=prefix,
+                    window=quota.window_seconds,
+                    granularity=quota.granularity_seconds,
+                    granule=next(quota.iter_window(reserved_at)),
+                )
+                decrements[redis_key] += returned
+                ttls[redis_key] = quota.window_seconds
+
+        if not decrements:
+            return
+
+        with self.client.pipeline(transaction=False) as pipeline:
+            for redis_key, amount in decrements.items():
+                pipeline.decrby(redis_key, amount)
+                pipeline.expire(redis_key, ttls[redis_key])
+            pipeline.execute()
+
+        metrics.incr("ratelimits.sliding_windows.lease.released", amount=sum(decrements.values()))
@@ -175,13 +175,18 @@ def get_rate_limit_value(
 def above_rate_limit_check(
     key: str, rate_limit: RateLimit, request_uid: str, group: str
 ) -> RateLimitMeta:
-    # TODO: This is not as performant as it could be. The roundtrip betwwen the server and redis
-    # is doubled because the fixd window limit and concurrent limit are two separate things with different
-    # paths. Ideally there is just one lua script that does both and just says what kind of limit was hit
-    # (if any)
     rate_limit_type = RateLimitType.NOT_LIMITED
-    window_limited, current, reset_time = ratelimiter.is_limited_with_value(
-        key, limit=rate_limit.limit, window=rate_limit.window
+    (
+        window_limited,
+        current,
+        reset_time,
+        concurrent_limit_info,
+    ) = ratelimiter.is_limited_with_concurrency(
+        key,
+        limit=rate_limit.limit,
+        request_uid=request_uid,
+        concurrent_limit=rate_limit.concurrent_limit,
+        window=rate_limit.window,
     )
     remaining = rate_limit.limit - current if not window_limited else 0
     concurrent_requests = None
@@ -191,9 +196,10 @@ def above_rate_limit_check(
         # if we have hit the fixed window rate limit, there is no reason
         # to do the work of the concurrent limit as well
         if rate_limit.concurrent_limit is not None:
-            concurrent_limit_info = concurrent_limiter().start_request(
-                key, rate_limit.concurrent_limit, request_uid
-            )
+            if concurrent_limit_info is None:
+                concurrent_limit_info = concurrent_limiter().start_request(
+                    key, rate_limit.concurrent_limit, request_uid
+                )
             if concurrent_limit_info.limit_exceeded:
                 rate_limit_type = RateLimitType.CONCURRENT
             concurrent_requests = concurrent_limit_info.current_executions
@@ -4,7 +4,7 @@ import abc
 import contextlib
 import logging
 import re
-from collections.abc import Mapping
+from collections.abc import Callable, Mapping
 from datetime import datetime, timedelta
 from typing import Any
 
@@ -92,12 +92,44 @@ class EventFrequencyForm(forms.Form):
         return cleaned_data
 
 
+class EventFrequencyQueryCache:
+    """
+    Shares frequency query results between all conditions evaluated for one
+    event.
+
+    Projects commonly have many frequency rules over the same windows (e.g.
+    "more than N events in 1h" for different N), which all need the same
+    query. Queries are keyed by condition type, window and environment, and
+    all windows end at the same `now`, so each distinct query is only issued
+    once per event.
+    """
+
+    def __init__(self, now: datetime | None = None) -> None:
+        self.now = now or timezone.now()
+        self.results: dict[tuple[str, datetime, datetime, str], int] = {}
+        self.queries = 0
+        self.hits = 0
+
+    def get_or_query(
+        self, key: tuple[str, datetime, datetime, str], query: Callable[[], int]
+    ) -> int:
+        try:
+            result = self.results[key]
+        except KeyError:
+            result = self.results[key] = query()
+            self.queries += 1
+        else:
+            self.hits += 1
+        return result
+
+
 class BaseEventFrequencyCondition(EventCondition, abc.ABC):
     intervals = standard_intervals
     form_cls = EventFrequencyForm
 
     def __init__(self, *args: Any, **kwargs: Any) -> None:
         self.tsdb = kwargs.pop("tsdb", tsdb)
+        self.query_cache: EventFrequencyQueryCache | None = kwargs.pop("query_cache", None)
         self.form_fields = {
             "value": {"type": "number", "placeholder": 100},
             "interval": {
@@ -170,6 +202,14 @@ class BaseEventFrequencyCondition(EventCondition, abc.ABC):
         raise NotImplementedError
 
     def query(self, event: GroupEvent, start: datetime, end: datetime, environment_id: str) -> int:
+        if self.query_cache is not None:
+            return self.query_cache.get_or_query(
+                (self.id, start, end, environment_id),
+                lambda: self._query(event, start, end, environment_id),
+            )
+        return self._query(event, start, end, environment_id)
+
+    def _query(self, event: GroupEvent, start: datetime, end: datetime, environment_id: str) -> int:
         query_result = self.query_hook(event, start, end, environment_id)
         metrics.incr(
             "rules.conditions.queried_snuba",
@@ -188,7 +228,7 @@ class BaseEventFrequencyCondition(EventCondition, abc.ABC):
 
     def get_rate(self, event: GroupEvent, interval: str, environment_id: str) -> int:
         _, duration = self.intervals[interval]
-        end = timezone.now()
+        end = self.query_cache.now if self.query_cache is not None else timezone.now()
         # For conditions with interval >= 1 hour we don't need to worry about read your writes
         # consistency. Disable it so that we can scale to more nodes.
         option_override_cm: contextlib.AbstractContextManager[object] = contextlib.nullcontext()
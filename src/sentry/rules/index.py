@@ -0,0 +1,186 @@
+"""
+Pre-classification of a project's rules by their cheap predicates.
+
+Most rules start with conditions and filters which only look at the state and
+attributes of the event, e.g. "A new issue is created" or "The event's level
+is equal to error". `RuleIndex` extracts those predicates from every rule once
+and evaluates each distinct predicate once per event, so that `RuleProcessor`
+only has to apply the rules which can still match.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Callable, Iterable, Sequence
+from dataclasses import dataclass
+from typing import Any
+
+from django.core.cache import cache
+
+from sentry.eventstore.models import GroupEvent
+from sentry.models.environment import Environment
+from sentry.models.rule import Rule
+from sentry.rules.base import EventState
+from sentry.rules.registry import RuleRegistry
+from sentry.utils.safe import safe_execute
+
+# Conditions and filters which only depend on the event, its group and the
+# event state, and are cheap enough to be evaluated for every event.
+PREFILTER_PREDICATES = frozenset(
+    [
+        "sentry.rules.conditions.every_event.EveryEventCondition",
+        "sentry.rules.conditions.first_seen_event.FirstSeenEventCondition",
+        "sentry.rules.conditions.level.LevelCondition",
+        "sentry.rules.conditions.reappeared_event.ReappearedEventCondition",
+        "sentry.rules.conditions.regression_event.RegressionEventCondition",
+        "sentry.rules.filters.issue_category.IssueCategoryFilter",
+        "sentry.rules.filters.level.LevelFilter",
+    ]
+)
+
+RULE_INDEX_CACHE_TTL = 60
+
+# `(condition id, rule environment id, condition data)`, the environment is
+# part of the key since e.g. `FirstSeenEventCondition` depends on it.
+PredicateKey = tuple[str, int | None, tuple[tuple[str, Any], ...]]
+
+
+def get_rule_index_cache_key(project_id: int) -> str:
+    return f"project:{project_id}:rule_index"
+
+
+@dataclass(frozen=True)
+class PredicateGroup:
+    match: str
+    predicates: tuple[PredicateKey, ...]
+    # Whether `predicates` holds every predicate of the group.
+    complete: bool
+
+    def may_pass(self, evaluate: Callable[[PredicateKey], bool | None]) -> bool:
+        if self.match == "all":
+            return all(evaluate(predicate) for predicate in self.predicates)
+        elif self.match == "any":
+            return not self.complete or any(evaluate(predicate) for predicate in self.predicates)
+        elif self.match == "none":
+            return not any(evaluate(predicate) for predicate in self.predicates)
+        return True
+
+
+@dataclass(frozen=True)
+class IndexedRule:
+    environment_id: int | None
+    groups: tuple[PredicateGroup, ...]
+
+
+class RuleIndex:
+    """
+    Cheap predicates of the rules of a project, by rule id.
+
+    The index is cached next to the rule list of `Rule.get_for_project` and
+    invalidated together with it whenever a rule is saved or deleted.
+    """
+
+    def __init__(self, rules: dict[int, IndexedRule]) -> None:
+        self.rules = rules
+
+    @classmethod
+    def build(cls, rules: Iterable[Rule], registry: RuleRegistry) -> RuleIndex:
+        return cls({rule.id: cls._index_rule(rule, registry) for rule in rules})
+
+    @classmethod
+    def get_for_project(
+        cls, project_id: int, rules: Sequence[Rule], registry: RuleRegistry
+    ) -> RuleIndex:
+        cache_key = get_rule_index_cache_key(project_id)
+        index = cache.get(cache_key)
+        if index is None or index.rules.keys() != {rule.id for rule in rules}:
+            index = cls.build(rules, registry)
+            cache.set(cache_key, index, RULE_INDEX_CACHE_TTL)
+        return index
+
+    @staticmethod
+    def _index_rule(rule: Rule, registry: RuleRegistry) -> IndexedRule:
+        filters: list[dict[str, Any]] = []
+        conditions: list[dict[str, Any]] = []
+        for condition in rule.data.get("conditions", ()):
+            condition_cls = registry.get(condition["id"])
+            if condition_cls is not None and condition_cls.rule_type == "condition/event":
+                conditions.append(condition)
+            else:
+                filters.append(condition)
+
+        groups = []
+        for predicate_list, match in (
+            (filters, rule.data.get("filter_match") or Rule.DEFAULT_FILTER_MATCH),
+            (conditions, rule.data.get("action_match") or Rule.DEFAULT_CONDITION_MATCH),
+        ):
+            predicates = []
+            for predicate in predicate_list:
+                if predicate["id"] not in PREFILTER_PREDICATES:
+                    continue
+                try:
+                    data = tuple(sorted(predicate.items()))
+                    hash(data)
+                except TypeError:
+                    continue
+                predicates.append((predicate["id"], rule.environment_id, data))
+
+            if predicates:
+                groups.append(
+                    PredicateGroup(
+                        match=match,
+                        predicates=tuple(predicates),
+                        complete=len(predicates) == len(predicate_list),
+                    )
+                )
+
+        return IndexedRule(environment_id=rule.environment_id, groups=tuple(groups))
+
+    def get_candidates(
+        self,
+        rules: Sequence[Rule],
+        event: GroupEvent,
+        state: EventState,
+        registry: RuleRegistry,
+    ) -> list[Rule]:
+        """
+        Returns the rules which may match the event, in their original order.
+        Rules which are not in the index are always candidates.
+        """
+        try:
+            environment_id: int | None = event.get_environment().id
+        except Environment.DoesNotExist:
+            environment_id = None
+
+        results: dict[PredicateKey, bool | None] = {}
+
+        def evaluate(predicate: PredicateKey) -> bool | None:
+            try:
+                return results[predicate]
+            except KeyError:
+                pass
+
+            condition_id, rule_environment_id, data = predicate
+            condition_cls = registry.get(condition_id)
+            result = None
+            if condition_cls is not None:
+                rule = Rule(project=event.project, environment_id=rule_environment_id)
+                condition = condition_cls(event.project, data=dict(data), rule=rule)
+                result = safe_execute(condition.passes, event, state, _with_transaction=False)
+            results[predicate] = result
+            return result
+
+        candidates = []
+        for rule in rules:
+            indexed = self.rules.get(rule.id)
+            if indexed is not None:
+                if (
+                    environment_id is not None
+                    and indexed.environment_id is not None
+                    and indexed.environment_id != environment_id
+                ):
+                    continue
+                if not all(group.may_pass(evaluate) for group in indexed.groups):
+                    continue
+            candidates.append(rule)
+
+        return candidates
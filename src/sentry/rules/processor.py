@@ -19,8 +19,14 @@ from sentry.models.rulesnooze import RuleSnooze
 from sentry.rules import EventState, history, rules
 from sentry.rules.actions.base import EventAction
 from sentry.rules.conditions.base import EventCondition
+from sentry.rules.conditions.event_frequency import (
+    BaseEventFrequencyCondition,
+    EventFrequencyQueryCache,
+)
 from sentry.rules.filters.base import EventFilter
+from sentry.rules.index import RuleIndex
 from sentry.types.rules import RuleFuture
+from sentry.utils import metrics
 from sentry.utils.hashlib import hash_values
 from sentry.utils.safe import safe_execute
 
@@ -69,12 +75,25 @@ class RuleProcessor:
         self.grouped_futures: MutableMapping[
             str, tuple[Callable[[GroupEvent, Sequence[RuleFuture]], None], list[RuleFuture]]
         ] = {}
+        self.frequency_query_cache = EventFrequencyQueryCache()
 
     def get_rules(self) -> Sequence[Rule]:
         """Get all of the rules for this project from the DB (or cache)."""
         rules_: Sequence[Rule] = Rule.get_for_project(self.project.id)
         return rules_
 
+    def get_candidate_rules(self) -> Sequence[Rule]:
+        """
+        Get the rules of this project which may match the event, skipping
+        rules ruled out by their cheap conditions and filters.
+        """
+        rules_ = self.get_rules()
+        index = RuleIndex.get_for_project(self.project.id, rules_, rules)
+        candidates = index.get_candidates(rules_, self.event, self.get_state(), rules)
+        if len(candidates) < len(rules_):
+            metrics.incr("rules.processor.prefiltered", amount=len(rules_) - len(candidates))
+        return candidates
+
     def _build_rule_status_cache_key(self, rule_id: int) -> str:
         return "grouprulestatus:1:%s" % hash_values([self.group.id, rule_id])
 
@@ -144,7 +163,16 @@ class RuleProcessor:
             self.logger.warning("Unregistered condition %r", condition["id"])
             return None
 
-        condition_inst = condition_cls(self.project, data=condition, rule=rule)
+        if issubclass(condition_cls, BaseEventFrequencyCondition):
+            # frequency conditions of all rules share their query results
+            condition_inst = condition_cls(
+                self.project,
+                data=condition,
+                rule=rule,
+                query_cache=self.frequency_query_cache,
+            )
+        else:
+            condition_inst = condition_cls(self.project, data=condition, rule=rule)
         if not isinstance(condition_inst, (EventCondition, EventFilter)):
             self.logger.warning("Unregistered condition %r", condition["id"])
             return None
@@ -306,7 +334,8 @@ class RuleProcessor:
             return {}.values()
 
         self.grouped_futures.clear()
-        rules = self.get_rules()
+        self.frequency_query_cache = EventFrequencyQueryCache()
+        rules = self.get_candidate_rules()
         snoozed_rules = RuleSnooze.objects.filter(rule__in=rules, user_id=None).values_list(
             "rule", flat=True
         )
@@ -315,4 +344,10 @@ class RuleProcessor:
             if rule.id not in snoozed_rules:
                 self.apply_rule(rule, rule_statuses[rule.id])
 
+        query_cache = self.frequency_query_cache
+        if query_cache.queries:
+            metrics.incr("rules.conditions.frequency_queries", amount=query_cache.queries)
+        if query_cache.hits:
+            metrics.incr("rules.conditions.frequency_queries_saved", amount=query_cache.hits)
+
         return self.grouped_futures.values()
@@ -0,0 +1,52 @@
+-- Checks the fixed window rate limit of an API request and, if the request is within the window
+-- limit, registers it with the concurrent rate limiter (see api_limiter.lua), in one round trip.
+--
+-- Both keys must hash to the same slot when running against Redis Cluster.
+--
+-- Input:
+-- keys:
+--  window_key, concurrent_key
+-- args:
+--  limit, expiration, concurrent_limit (negative to skip the concurrent limit), request_uid,
+--  current_time, max_tll_seconds
+--
+-- Output:
+-- current (the window counter including this request), window_limited (0/1),
+-- current_executions (-1 if the concurrent limiter was skipped), request_allowed (0/1),
+-- cleaned_up_requests
+local window_key = KEYS[1]
+local concurrent_key = KEYS[2]
+
+local limit = tonumber(ARGV[1])
+local expiration = tonumber(ARGV[2])
+local concurrent_limit = tonumber(ARGV[3])
+local request_uid = ARGV[4]
+local cur_time = tonumber(ARGV[5])
+local max_tll_seconds = tonumber(ARGV[6])
+
+local current = redis.call("incr", window_key)
+redis.call("expire", window_key, expiration)
+
+-- if we have hit the fixed window rate limit, there is no reason to do the work of the
+-- concurrent limit as well
+if current > limit then
+  return { current, 1, -1, 0, 0 }
+end
+
+if concurrent_limit < 0 then
+  return { current, 0, -1, 1, 0 }
+end
+
+local current_executions_pre_cleanup = redis.call("zcard", concurrent_key)
+redis.call("zremrangebyscore", concurrent_key, "-inf", cur_time - max_tll_seconds)
+local current_executions = redis.call("zcard", concurrent_key)
+local cleaned_up_requests = current_executions_pre_cleanup - current_executions
+
+local allowed = 0
+if current_executions < concurrent_limit then
+  redis.call("zadd", concurrent_key, cur_time, request_uid)
+  current_executions = current_executions + 1
+  allowed = 1
+end
+
+return { current, 0, current_executions, allowed, cleaned_up_requests }
@@ -0,0 +1,30 @@
+-- Append a chunk of spans to a segment, unless the segment would grow past
+-- its maximum size.
+--
+-- The first element of a segment holds its size in bytes, the others are
+-- the chunks of spans written to it. The TTL is set when the segment is
+-- created. Returns whether the segment was created and whether the chunk
+-- was written.
+assert(#KEYS == 1, "provide exactly one segment key")
+assert(#ARGV == 3, "provide a TTL, a maximum size and a chunk")
+
+local key = KEYS[1]
+local ttl = ARGV[1]
+local max_size = tonumber(ARGV[2])
+local chunk = ARGV[3]
+
+local size = redis.call("LINDEX", key, 0)
+local new_size = (tonumber(size) or 0) + string.len(chunk)
+if new_size > max_size then
+    return {0, 0}
+end
+
+if size then
+    redis.call("LSET", key, 0, new_size)
+    redis.call("RPUSH", key, chunk)
+    return {0, 1}
+end
+
+redis.call("RPUSH", key, new_size, chunk)
+redis.call("EXPIRE", key, ttl)
+return {1, 1}
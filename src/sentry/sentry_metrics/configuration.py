@@ -3,6 +3,7 @@
 # sentry.sentry_metrics.configuration` should work.
 #
 # If not, the parallel indexer breaks.
+import multiprocessing.util
 from collections.abc import Mapping, MutableMapping
 from dataclasses import dataclass
 from enum import Enum
@@ -169,6 +170,15 @@ def initialize_subprocess_state(config: MetricsIngestConfiguration) -> None:
 
     sentry_sdk.set_tag("sentry_metrics.use_case_key", config.use_case_id.value)
 
+    # Give back the write quota leased by the subprocess when it exits
+    multiprocessing.util.Finalize(None, release_writes_limiter_leases, exitpriority=0)
+
+
+def release_writes_limiter_leases() -> None:
+    from sentry.sentry_metrics.indexer.limiters.writes import writes_limiter_factory
+
+    writes_limiter_factory.release_leases()
+
 
 def initialize_main_process_state(config: MetricsIngestConfiguration) -> None:
     """
@@ -18,6 +18,7 @@ from sentry import options
 from sentry.sentry_metrics.configuration import (
     MetricsIngestConfiguration,
     initialize_subprocess_state,
+    release_writes_limiter_leases,
 )
 from sentry.sentry_metrics.consumers.indexer.common import BatchMessages, IndexerOutputMessageBatch
 from sentry.sentry_metrics.consumers.indexer.multiprocess import SimpleProduceStep
@@ -189,6 +190,8 @@ class MetricsConsumerStrategyFactory(ProcessingStrategyFactory[KafkaPayload]):
 
     def shutdown(self) -> None:
         self.__pool.close()
+        # Without multiprocessing, the rate limiters live in this process
+        release_writes_limiter_leases()
 
 
 def get_metrics_producer_strategy(
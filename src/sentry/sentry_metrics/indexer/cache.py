@@ -19,6 +19,7 @@ from sentry.sentry_metrics.indexer.base import (
     metric_path_key_compatible_resolve,
     metric_path_key_compatible_rev_resolve,
 )
+from sentry.sentry_metrics.indexer.shared_cache import SharedStringCache
 from sentry.sentry_metrics.use_case_id_registry import UseCaseID
 from sentry.utils import metrics
 from sentry.utils.hashlib import md5_text
@@ -33,6 +34,7 @@ _INDEXER_CACHE_RESOLVE_CACHE_REPLENISHMENT_METRIC = (
 _INDEXER_CACHE_DOUBLE_WRITE_METRIC = "sentry_metrics.indexer.memcache.double-write"
 _INDEXER_CACHE_DOUBLE_READ_METRIC = "sentry_metrics.indexer.memcache.new-schema-read"
 _INDEXER_CACHE_STALE_KEYS_METRIC = "sentry_metrics.indexer.memcache.stale-keys"
+_INDEXER_SHARED_CACHE_METRIC = "sentry_metrics.indexer.shared_cache"
 
 # only used to compare to the older version of the PGIndexer
 _INDEXER_CACHE_FETCH_METRIC = "sentry_metrics.indexer.memcache.fetch"
@@ -44,12 +46,37 @@ NAMESPACED_READ_FEAT_FLAG = "sentry-metrics.indexer.read-new-cache-namespace"
 BULK_RECORD_CACHE_NAMESPACE = "br"
 RESOLVE_CACHE_NAMESPACE = "res"
 
+# How long values are kept in the shared cache, as a share of the TTL of
+# `cache`. Deletes only reach the shared cache of the host they run on, so
+# this bounds how long other hosts can serve a deleted value. It also covers
+# values read from `cache`, which have an unknown share of their TTL left.
+SHARED_CACHE_TTL_RATIO = 0.25
+
 
 class StringIndexerCache:
     def __init__(self, cache_name: str, partition_key: str):
         self.version = 1
         self.cache = caches[cache_name]
         self.partition_key = partition_key
+        self._shared_cache: SharedStringCache | None = None
+
+    @property
+    def shared_cache(self) -> SharedStringCache | None:
+        """
+        The cache shared by the processes of the host, which is looked up
+        before `cache` if `SENTRY_METRICS_INDEXER_SHARED_CACHE_SIZE` is set.
+
+        Deletes only clear the shared cache of the current host, other hosts
+        keep serving the value until it expires after `shared_cache_ttl`.
+        """
+        size = settings.SENTRY_METRICS_INDEXER_SHARED_CACHE_SIZE
+        if not size:
+            return None
+        if self._shared_cache is None:
+            self._shared_cache = SharedStringCache(
+                f"{settings.SENTRY_METRICS_INDEXER_SHARED_CACHE_PATH}-{self.partition_key}", size
+            )
+        return self._shared_cache
 
     @property
     def randomized_ttl(self) -> int:
@@ -59,6 +86,10 @@ class StringIndexerCache:
         jitter = random.uniform(0, 0.25) * cache_ttl
         return int(cache_ttl + jitter)
 
+    @property
+    def shared_cache_ttl(self) -> int:
+        return int(self.randomized_ttl * SHARED_CACHE_TTL_RATIO)
+
     def _make_cache_key(self, key: str) -> str:
         use_case_id, org_id, string = key.split(":", 2)
         org_string = org_id + ":" + string
@@ -130,7 +161,15 @@ class StringIndexerCache:
 
         return int(result)
 
+    def _make_shared_cache_key(self, namespace: str, key: str) -> str:
+        return f"{namespace}:{key}"
+
     def get(self, namespace: str, key: str) -> int | None:
+        if self.shared_cache is None:
+            return self._get(namespace, key)
+        return self.get_many(namespace, [key])[key]
+
+    def _get(self, namespace: str, key: str) -> int | None:
         if options.get(NAMESPACED_READ_FEAT_FLAG):
             metrics.incr(_INDEXER_CACHE_DOUBLE_READ_METRIC)
             result = self.cache.get(
@@ -140,12 +179,17 @@ class StringIndexerCache:
         return self.cache.get(self._make_cache_key(key), version=self.version)
 
     def set(self, namespace: str, key: str, value: int) -> None:
+        ttl = self.randomized_ttl
         self.cache.set(
             key=self._make_cache_key(key),
             value=value,
-            timeout=self.randomized_ttl,
+            timeout=ttl,
             version=self.version,
         )
+        if self.shared_cache is not None:
+            self.shared_cache.set_many(
+                {self._make_shared_cache_key(namespace, key): value}, self.shared_cache_ttl
+            )
         if options.get(NAMESPACED_WRITE_FEAT_FLAG):
             metrics.incr(_INDEXER_CACHE_DOUBLE_WRITE_METRIC)
             self.cache.set(
@@ -156,6 +200,41 @@ class StringIndexerCache:
             )
 
     def get_many(self, namespace: str, keys: Iterable[str]) -> MutableMapping[str, int | None]:
+        if self.shared_cache is None:
+            return self._get_many(namespace, keys)
+
+        shared_keys = {self._make_shared_cache_key(namespace, key): key for key in keys}
+        shared_results = self.shared_cache.get_many(shared_keys)
+        metrics.incr(
+            _INDEXER_SHARED_CACHE_METRIC, tags={"cache_hit": "true"}, amount=len(shared_results)
+        )
+        metrics.incr(
+            _INDEXER_SHARED_CACHE_METRIC,
+            tags={"cache_hit": "false"},
+            amount=len(shared_keys) - len(shared_results),
+        )
+
+        results: MutableMapping[str, int | None] = {
+            shared_keys[shared_key]: value for shared_key, value in shared_results.items()
+        }
+        missing = [
+            key for shared_key, key in shared_keys.items() if shared_key not in shared_results
+        ]
+        if missing:
+            fetched = self._get_many(namespace, missing)
+            self.shared_cache.set_many(
+                {
+                    self._make_shared_cache_key(namespace, key): value
+                    for key, value in fetched.items()
+                    if value is not None
+                },
+                self.shared_cache_ttl,
+            )
+            results.update(fetched)
+
+        return {key: results[key] for key in shared_keys.values()}
+
+    def _get_many(self, namespace: str, keys: Iterable[str]) -> MutableMapping[str, int | None]:
         if options.get(NAMESPACED_READ_FEAT_FLAG):
             metrics.incr(_INDEXER_CACHE_DOUBLE_READ_METRIC)
             cache_keys = {self._make_namespaced_cache_key(namespace, key): key for key in keys}
@@ -176,8 +255,14 @@ class StringIndexerCache:
             return self._format_results(keys, results)
 
     def set_many(self, namespace: str, key_values: Mapping[str, int]) -> None:
+        ttl = self.randomized_ttl
         cache_key_values = {self._make_cache_key(k): v for k, v in key_values.items()}
-        self.cache.set_many(cache_key_values, timeout=self.randomized_ttl, version=self.version)
+        self.cache.set_many(cache_key_values, timeout=ttl, version=self.version)
+        if self.shared_cache is not None:
+            self.shared_cache.set_many(
+                {self._make_shared_cache_key(namespace, k): v for k, v in key_values.items()},
+                self.shared_cache_ttl,
+            )
         if options.get(NAMESPACED_WRITE_FEAT_FLAG):
             metrics.incr(_INDEXER_CACHE_DOUBLE_WRITE_METRIC)
             timestamp = int(datetime.utcnow().timestamp())
@@ -191,12 +276,18 @@ class StringIndexerCache:
 
     def delete(self, namespace: str, key: str) -> None:
         self.cache.delete(self._make_cache_key(key), version=self.version)
+        if self.shared_cache is not None:
+            self.shared_cache.delete_many([self._make_shared_cache_key(namespace, key)])
         if options.get(NAMESPACED_WRITE_FEAT_FLAG):
             metrics.incr(_INDEXER_CACHE_DOUBLE_WRITE_METRIC)
             self.cache.delete(self._make_namespaced_cache_key(namespace, key), version=self.version)
 
     def delete_many(self, namespace: str, keys: Sequence[str]) -> None:
         self.cache.delete_many([self._make_cache_key(key) for key in keys], version=self.version)
+        if self.shared_cache is not None:
+            self.shared_cache.delete_many(
+                [self._make_shared_cache_key(namespace, key) for key in keys]
+            )
         if options.get(NAMESPACED_WRITE_FEAT_FLAG):
             metrics.incr(_INDEXER_CACHE_DOUBLE_WRITE_METRIC)
             self.cache.delete_many(
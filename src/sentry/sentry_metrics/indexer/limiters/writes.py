@@ -235,5 +235,12 @@ class WritesLimiterFactory:
 
         return self.rate_limiters[namespace]
 
+    def release_leases(self) -> None:
+        """
+        Gives back the quota leased by the rate limiters of this process.
+        """
+        for writes_limiter in self.rate_limiters.values():
+            writes_limiter.rate_limiter.release_leases()
+
 
 writes_limiter_factory = WritesLimiterFactory()
@@ -0,0 +1,161 @@
+"""
+A cache of indexer results shared by the processes of a host.
+
+The indexer consumers run many worker processes, which all look up the same
+hot strings (metric names, common tag keys and values) in the Redis backed
+`StringIndexerCache`. `SharedStringCache` is a fixed size hash table in a
+memory mapped file (on a tmpfs like `/dev/shm`) that sits in front of it, so
+that a string looked up by any process on the host is served from memory.
+
+The table is set associative: a key hashes to a bucket of `WAYS` slots, and
+when all slots of a bucket are taken, one is evicted with the clock
+algorithm. Processes don't lock the table. Every slot carries a checksum of
+its contents, and slots which were torn by concurrent writes fail it and are
+treated as empty.
+"""
+
+from __future__ import annotations
+
+import mmap
+import os
+import struct
+import time
+import zlib
+from collections.abc import Iterable, Mapping
+from hashlib import blake2b
+
+# Bump when the layout of the table changes, so that processes running
+# different versions don't share a file.
+VERSION = 1
+
+# The number of slots in a bucket.
+WAYS = 8
+
+# A slot: digest of the key, value and expiry as a unix timestamp, then a
+# checksum of those, the clock's reference bit and padding.
+_ENTRY = struct.Struct("<16sqI")
+_CHECKSUM = struct.Struct("<I")
+_SLOT_SIZE = 40
+_CHECKSUM_OFFSET = _ENTRY.size
+_REFERENCED_OFFSET = _CHECKSUM_OFFSET + _CHECKSUM.size
+
+# A bucket: the position of the clock hand, padded, followed by its slots.
+_BUCKET_HEADER_SIZE = 8
+_BUCKET_SIZE = _BUCKET_HEADER_SIZE + WAYS * _SLOT_SIZE
+
+
+def _digest(key: str) -> bytes:
+    return blake2b(key.encode("utf-8"), digest_size=16).digest()
+
+
+class SharedStringCache:
+    """
+    Maps strings to integers for up to `size` entries, each with its own TTL.
+
+    Processes opening the same `path` with the same `size` share entries.
+    The file is created on first use and is never removed, so that entries
+    survive restarts of the processes using it.
+    """
+
+    def __init__(self, path: str, size: int) -> None:
+        self.buckets = max(size // WAYS, 1)
+        self.path = f"{path}-v{VERSION}-{self.buckets}"
+        self._mmap: mmap.mmap | None = None
+
+    @property
+    def table(self) -> mmap.mmap:
+        if self._mmap is None:
+            length = self.buckets * _BUCKET_SIZE
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+            try:
+                # New files are zeroed, which are empty slots
+                if os.fstat(fd).st_size < length:
+                    os.ftruncate(fd, length)
+                self._mmap = mmap.mmap(fd, length)
+            finally:
+                os.close(fd)
+        return self._mmap
+
+    def _bucket(self, digest: bytes) -> int:
+        return int.from_bytes(digest[:8], "little") % self.buckets * _BUCKET_SIZE
+
+    def _find(self, table: mmap.mmap, bucket: int, digest: bytes, now: int) -> tuple[int, int]:
+        """
+        Returns the offset and value of the live slot holding `digest`, or an
+        offset of -1 if there is none.
+        """
+        for way in range(WAYS):
+            offset = bucket + _BUCKET_HEADER_SIZE + way * _SLOT_SIZE
+            # Copy the slot once, so that the checksum is verified against
+            # exactly the contents that are used.
+            raw = table[offset : offset + _SLOT_SIZE]
+            slot_digest, value, expiry = _ENTRY.unpack_from(raw)
+            if (
+                slot_digest == digest
+                and expiry > now
+                and zlib.crc32(raw[:_CHECKSUM_OFFSET])
+                == _CHECKSUM.unpack_from(raw, _CHECKSUM_OFFSET)[0]
+            ):
+                return offset, value
+        return -1, 0
+
+    def get_many(self, keys: Iterable[str]) -> dict[str, int]:
+        """
+        Returns the values of the keys that are cached.
+        """
+        table = self.table
+        now = int(time.time())
+        results = {}
+        for key in keys:
+            digest = _digest(key)
+            offset, value = self._find(table, self._bucket(digest), digest, now)
+            if offset >= 0:
+                if not table[offset + _REFERENCED_OFFSET]:
+                    table[offset + _REFERENCED_OFFSET] = 1
+                results[key] = value
+        return results
+
+    def set_many(self, values: Mapping[str, int], ttl: int) -> None:
+        table = self.table
+        now = int(time.time())
+        for key, value in values.items():
+            digest = _digest(key)
+            bucket = self._bucket(digest)
+            offset = self._find(table, bucket, digest, now)[0]
+            if offset < 0:
+                offset = self._evict(table, bucket, now)
+
+            entry = _ENTRY.pack(digest, value, now + ttl)
+            table[offset : offset + _REFERENCED_OFFSET] = entry + _CHECKSUM.pack(zlib.crc32(entry))
+            table[offset + _REFERENCED_OFFSET] = 0
+
+    def delete_many(self, keys: Iterable[str]) -> None:
+        table = self.table
+        now = int(time.time())
+        for key in keys:
+            digest = _digest(key)
+            offset = self._find(table, self._bucket(digest), digest, now)[0]
+            if offset >= 0:
+                table[offset : offset + _SLOT_SIZE] = bytes(_SLOT_SIZE)
+
+    def _evict(self, table: mmap.mmap, bucket: int, now: int) -> int:
+        """
+        Returns the offset of the slot to replace in `bucket`: an expired one
+        if there is any, otherwise the first one not referenced since the
+        clock hand last passed it.
+        """
+        slots = bucket + _BUCKET_HEADER_SIZE
+        for way in range(WAYS):
+            offset = slots + way * _SLOT_SIZE
+            if _ENTRY.unpack_from(table, offset)[2] <= now:
+                return offset
+
+        hand = table[bucket] % WAYS
+        for _ in range(2 * WAYS):
+            offset = slots + hand * _SLOT_SIZE
+            hand = (hand + 1) % WAYS
+            if not table[offset + _REFERENCED_OFFSET]:
+                break
+            table[offset + _REFERENCED_OFFSET] = 0
+        table[bucket] = hand
+        return offset
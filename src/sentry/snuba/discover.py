@@ -2,7 +2,8 @@ import logging
 import math
 import random
 from collections import namedtuple
-from collections.abc import Sequence
+from collections.abc import Generator, Iterator, Sequence
+from contextlib import contextmanager
 from copy import deepcopy
 from datetime import datetime, timedelta
 from typing import Any, NotRequired, TypedDict
@@ -30,6 +31,7 @@ from sentry.search.events.types import HistogramParams, ParamsType, QueryBuilder
 from sentry.snuba.dataset import Dataset
 from sentry.tagstore.base import TOP_VALUES_DEFAULT_LIMIT
 from sentry.utils.dates import to_timestamp
+from sentry.utils.iterators import chunked
 from sentry.utils.math import nice_int
 from sentry.utils.snuba import (
     SnubaTSResult,
@@ -42,6 +44,7 @@ from sentry.utils.snuba import (
     is_span_op_breakdown,
     naiveify_datetime,
     resolve_column,
+    stream_snuba_query,
     to_naive_timestamp,
 )
 
@@ -49,6 +52,7 @@ __all__ = (
     "PaginationResult",
     "InvalidSearchQuery",
     "query",
+    "stream_query",
     "timeseries_query",
     "top_events_timeseries",
     "get_facets",
@@ -267,6 +271,55 @@ def query(
     return result
 
 
+@contextmanager
+def stream_query(
+    selected_columns,
+    query,
+    params,
+    equations=None,
+    orderby=None,
+    offset=None,
+    limit=50,
+    referrer=None,
+    auto_fields=False,
+    auto_aggregations=False,
+    use_aggregate_conditions=False,
+    chunk_size=1000,
+) -> Generator[Iterator[list[dict[str, Any]]], None, None]:
+    """
+    Like `query`, but for queries returning many rows, e.g. exports. The rows
+    are decoded and transformed while they're read from Snuba, and yielded in
+    chunks of up to `chunk_size` rows. No meta is returned.
+
+        with stream_query(...) as chunks:
+            for rows in chunks:
+                ...
+    """
+    if not selected_columns:
+        raise InvalidSearchQuery("No columns selected")
+
+    builder = QueryBuilder(
+        Dataset.Discover,
+        params,
+        query=query,
+        selected_columns=selected_columns,
+        equations=equations,
+        orderby=orderby,
+        limit=limit,
+        offset=offset,
+        config=QueryBuilderConfig(
+            auto_fields=auto_fields,
+            auto_aggregations=auto_aggregations,
+            use_aggregate_conditions=use_aggregate_conditions,
+        ),
+    )
+
+    with stream_snuba_query(builder.get_snql_query(), referrer) as result:
+        yield (
+            builder.process_results({"data": rows})["data"] for rows in chunked(result, chunk_size)
+        )
+
+
 def timeseries_query(
     selected_columns: Sequence[str],
     query: str,
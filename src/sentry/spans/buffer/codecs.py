@@ -0,0 +1,77 @@
+"""
+Encoding of the spans stored in a segment of the spans buffer.
+
+Spans are written to a segment in chunks, one chunk per consumer batch. A
+chunk is stored column by column: fields that have the same value in all of
+its spans (e.g. `trace_id`, `project_id` or `segment_id`) are stored once, and
+the values of other fields are stored in one list per field, so that field
+names are not repeated for every span. Fields holding objects in all spans
+(e.g. `sentry_tags`) are split the same way.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Mapping, Sequence
+from typing import Any
+
+import msgpack
+
+VERSION = 1
+
+
+def _split(rows: Sequence[Mapping[str, Any]]) -> dict[str, Any]:
+    fields = set(rows[0]).intersection(*rows[1:])
+    shared = {}
+    columns = {}
+    objects = {}
+    for field in sorted(fields):
+        values = [row[field] for row in rows]
+        first = values[0]
+        if all(type(value) is type(first) and value == first for value in values):
+            shared[field] = first
+        elif all(isinstance(value, Mapping) for value in values):
+            objects[field] = _split(values)
+        else:
+            columns[field] = values
+
+    encoded: dict[str, Any] = {}
+    if shared:
+        encoded["s"] = shared
+    if columns:
+        encoded["c"] = columns
+    if objects:
+        encoded["o"] = objects
+    if any(len(row) > len(fields) for row in rows):
+        encoded["r"] = [{k: v for k, v in row.items() if k not in fields} for row in rows]
+    return encoded
+
+
+def _merge(encoded: Mapping[str, Any], length: int) -> list[dict[str, Any]]:
+    rows: list[dict[str, Any]] = [dict(encoded.get("s", {})) for _ in range(length)]
+    for field, values in encoded.get("c", {}).items():
+        for row, value in zip(rows, values):
+            row[field] = value
+    for field, nested in encoded.get("o", {}).items():
+        for row, value in zip(rows, _merge(nested, length)):
+            row[field] = value
+    for row, rest in zip(rows, encoded.get("r", ())):
+        row.update(rest)
+    return rows
+
+
+def encode_chunk(spans: Sequence[Mapping[str, Any]]) -> bytes:
+    """
+    Encodes a non-empty sequence of spans into a chunk.
+    """
+    assert spans, "a chunk needs at least one span"
+    return msgpack.packb({"v": VERSION, "n": len(spans), "d": _split(spans)})
+
+
+def decode_chunk(chunk: bytes) -> list[dict[str, Any]]:
+    """
+    Decodes the spans of a chunk, in the order they were encoded.
+    """
+    decoded = msgpack.unpackb(chunk)
+    if decoded["v"] != VERSION:
+        raise ValueError(f"Unsupported span chunk version: {decoded['v']}")
+    return _merge(decoded["d"], decoded["n"])
@@ -1,15 +1,30 @@
 from __future__ import annotations
 
+import importlib.resources
+from collections.abc import Iterator, Mapping, Sequence
+from typing import Any
+
 from django.conf import settings
 from sentry_redis_tools.clients import RedisCluster, StrictRedis
 
-from sentry.utils import redis
+from sentry import options
+from sentry.spans.buffer.codecs import decode_chunk, encode_chunk
+from sentry.utils import metrics, redis
 
 SEGMENT_TTL = 5 * 60  # 5 min TTL in seconds
 
+# The number of chunks read from a segment at once.
+READ_CHUNK_SIZE = 100
+
+# Sent with EVAL rather than loaded, since scripts are not loaded on the
+# nodes of a cluster pipeline.
+ADD_SPANS_SCRIPT = (
+    importlib.resources.files("sentry").joinpath("scripts", "spans", "add_spans.lua").read_bytes()
+)
+
 
 def get_redis_client() -> RedisCluster | StrictRedis:
-    return redis.redis_clusters.get(settings.SENTRY_SPAN_BUFFER_CLUSTER)
+    return redis.redis_clusters.get(settings.SENTRY_SPAN_BUFFER_CLUSTER, decode_responses=False)
 
 
 def get_segment_key(project_id: str | int, segment_id: str) -> str:
@@ -17,20 +32,85 @@ def get_segment_key(project_id: str | int, segment_id: str) -> str:
 
 
 class RedisSpansBuffer:
+    """
+    Buffers the spans of segments until they are processed.
+
+    A segment is a Redis list. Its first element is the size of the segment
+    in bytes, the others are chunks of spans as encoded by
+    `sentry.spans.buffer.codecs`. Segments can't grow past the size in the
+    `spans.buffer.max-segment-bytes` option, further spans are dropped.
+    """
+
     def __init__(self):
         self.client: RedisCluster | StrictRedis = get_redis_client()
 
-    def read_segment(self, project_id: str | int, segment_id: str) -> list[str | bytes]:
+    def iter_segment(
+        self, project_id: str | int, segment_id: str
+    ) -> Iterator[list[dict[str, Any]]]:
+        """
+        Yields the spans of a segment, one chunk at a time.
+        """
         key = get_segment_key(project_id, segment_id)
+        start = 1
+        while True:
+            chunks = self.client.lrange(key, start, start + READ_CHUNK_SIZE - 1)
+            for chunk in chunks:
+                yield decode_chunk(chunk)
+            if len(chunks) < READ_CHUNK_SIZE:
+                return
+            start += READ_CHUNK_SIZE
 
-        return self.client.lrange(key, 0, -1) or []
+    def read_segment(self, project_id: str | int, segment_id: str) -> list[dict[str, Any]]:
+        return [span for chunk in self.iter_segment(project_id, segment_id) for span in chunk]
 
-    def write_span(self, project_id: str | int, segment_id: str, span: bytes) -> bool:
-        key = get_segment_key(project_id, segment_id)
-        length = self.client.rpush(key, span)
-        new_key = length == 1
+    def write_span(self, project_id: str | int, segment_id: str, span: Mapping[str, Any]) -> bool:
+        return bool(self.write_spans([(project_id, segment_id, span)]))
+
+    def write_spans(
+        self, spans: Sequence[tuple[str | int, str, Mapping[str, Any]]]
+    ) -> list[tuple[str | int, str]]:
+        """
+        Appends `(project_id, segment_id, span)` tuples to their segments and
+        returns the `(project_id, segment_id)` of the segments which are new.
+
+        The spans of a segment are written as a single chunk, and the chunks
+        of all segments are sent in one pipeline, which is split by node on
+        clusters.
+        """
+        spans_by_segment: dict[tuple[str | int, str], list[Mapping[str, Any]]] = {}
+        for project_id, segment_id, span in spans:
+            spans_by_segment.setdefault((project_id, segment_id), []).append(span)
+
+        if not spans_by_segment:
+            return []
+
+        max_segment_bytes = options.get("spans.buffer.max-segment-bytes")
+        chunk_bytes = 0
+        with self.client.pipeline(transaction=False) as pipeline:
+            for (project_id, segment_id), segment_spans in spans_by_segment.items():
+                chunk = encode_chunk(segment_spans)
+                chunk_bytes += len(chunk)
+                pipeline.eval(
+                    ADD_SPANS_SCRIPT,
+                    1,
+                    get_segment_key(project_id, segment_id),
+                    SEGMENT_TTL,
+                    max_segment_bytes,
+                    chunk,
+                )
+            results = pipeline.execute()
+
+        metrics.distribution("spans.buffer.write_bytes", chunk_bytes, unit="byte")
+
+        new_segments = []
+        dropped_spans = 0
+        for (segment, segment_spans), (created, written) in zip(spans_by_segment.items(), results):
+            if created:
+                new_segments.append(segment)
+            if not written:
+                dropped_spans += len(segment_spans)
 
-        if new_key:
-            self.client.expire(key, SEGMENT_TTL)
+        if dropped_spans:
+            metrics.incr("spans.buffer.segment_overflow", amount=dropped_spans)
 
-        return new_key
+        return new_segments
@@ -1,9 +1,11 @@
 import logging
 from collections.abc import Mapping
+from functools import partial
 from typing import Any
 
 from arroyo.backends.kafka.consumer import KafkaPayload
 from arroyo.processing.strategies.abstract import ProcessingStrategy, ProcessingStrategyFactory
+from arroyo.processing.strategies.batching import BatchStep, ValuesBatch
 from arroyo.processing.strategies.commit import CommitOffsets
 from arroyo.processing.strategies.run_task import RunTask
 from arroyo.types import BrokerValue, Commit, Message, Partition
@@ -13,6 +15,7 @@ from sentry_kafka_schemas.schema_types.snuba_spans_v1 import SpanEvent
 
 from sentry.spans.buffer.redis import RedisSpansBuffer
 from sentry.tasks.spans import process_segment
+from sentry.utils import metrics
 
 logger = logging.getLogger(__name__)
 SPAN_SCHEMA: Codec[SpanEvent] = get_codec("snuba-spans")
@@ -24,7 +27,15 @@ def _deserialize_span(value: bytes) -> Mapping[str, Any]:
     return SPAN_SCHEMA.decode(value)
 
 
-def process_message(message: Message[KafkaPayload]):
+def _schedule_segment(project_id: str | int, segment_id: str) -> None:
+    # This function currently does nothing.
+    process_segment.apply_async(
+        args=[project_id, segment_id],
+        countdown=PROCESS_SEGMENT_DELAY,
+    )
+
+
+def process_message(buffer: RedisSpansBuffer, message: Message[KafkaPayload]):
     assert isinstance(message.value, BrokerValue)
     try:
         span = _deserialize_span(message.payload.value)
@@ -34,23 +45,81 @@ def process_message(message: Message[KafkaPayload]):
         logger.exception("Failed to process span payload")
         return
 
-    client = RedisSpansBuffer()
-    new_segment = client.write_span(project_id, segment_id, message.payload.value)
+    new_segment = buffer.write_span(project_id, segment_id, span)
     if new_segment:
-        # This function currently does nothing.
-        process_segment.apply_async(
-            args=[project_id, segment_id],
-            countdown=PROCESS_SEGMENT_DELAY,
-        )
+        _schedule_segment(project_id, segment_id)
+
+
+def process_batch(buffer: RedisSpansBuffer, message: Message[ValuesBatch[KafkaPayload]]):
+    spans = []
+    for item in message.payload:
+        assert isinstance(item, BrokerValue)
+        try:
+            span = _deserialize_span(item.payload.value)
+            spans.append((span["project_id"], span["segment_id"], span))
+        except Exception:
+            logger.exception("Failed to process span payload")
+
+    new_segments = buffer.write_spans(spans)
+    metrics.incr("spans.buffer.spans_written", amount=len(spans))
+    metrics.incr("spans.buffer.segments_created", amount=len(new_segments))
+
+    for project_id, segment_id in new_segments:
+        _schedule_segment(project_id, segment_id)
 
 
 class ProcessSpansStrategyFactory(ProcessingStrategyFactory[KafkaPayload]):
+    batched = False
+    """
+    Does the consumer write spans to the buffer in batches?
+    """
+
+    max_batch_size = 1000
+    """
+    How many spans will be batched at once when in batched mode.
+    """
+
+    max_batch_time = 1
+    """
+    The maximum time in seconds to accumulate a batch of spans.
+    """
+
+    def __init__(
+        self,
+        batched: bool = False,
+        max_batch_size: int | None = None,
+        max_batch_time: int | None = None,
+    ) -> None:
+        self.batched = batched
+
+        if max_batch_size is not None:
+            self.max_batch_size = max_batch_size
+        if max_batch_time is not None:
+            self.max_batch_time = max_batch_time
+
+    def create_batched_worker(self, commit: Commit) -> ProcessingStrategy[KafkaPayload]:
+        batch_processor = RunTask(
+            function=partial(process_batch, RedisSpansBuffer()),
+            next_step=CommitOffsets(commit),
+        )
+        return BatchStep(
+            max_batch_size=self.max_batch_size,
+            max_batch_time=self.max_batch_time,
+            next_step=batch_processor,
+        )
+
+    def create_synchronous_worker(self, commit: Commit) -> ProcessingStrategy[KafkaPayload]:
+        return RunTask(
+            function=partial(process_message, RedisSpansBuffer()),
+            next_step=CommitOffsets(commit),
+        )
+
     def create_with_partitions(
         self,
         commit: Commit,
         partitions: Mapping[Partition, int],
     ) -> ProcessingStrategy[KafkaPayload]:
-        return RunTask(
-            function=process_message,
-            next_step=CommitOffsets(commit),
-        )
+        if self.batched:
+            return self.create_batched_worker(commit)
+        else:
+            return self.create_synchronous_worker(commit)
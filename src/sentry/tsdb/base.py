@@ -1,3 +1,5 @@
+from array import array
+from collections.abc import Callable, Iterable, Sequence
 from datetime import datetime, timedelta
 from enum import Enum
 
@@ -100,10 +102,68 @@ class TSDBModel(Enum):
     sentry_app_component_interacted = 801
 
 
+class RangeMatrix:
+    """
+    The counters of several keys over the same series of buckets, stored as a
+    dense row-major matrix of integers with a row per key and a column per
+    bucket.
+
+    This is cheaper to build and to aggregate than the ``key => [(timestamp,
+    count), ...]`` mapping returned by ``get_range``, which is available via
+    ``to_range``.
+    """
+
+    __slots__ = ("keys", "series", "counts")
+
+    def __init__(self, keys: Iterable, series: Sequence[float], counts: array | None = None):
+        self.keys = list(keys)
+        self.series = list(series)
+        if counts is None:
+            counts = array("q", bytes(8 * len(self.keys) * len(self.series)))
+        assert len(counts) == len(self.keys) * len(self.series)
+        self.counts = counts
+
+    def index(self, row: int, column: int) -> int:
+        return row * len(self.series) + column
+
+    def row(self, row: int) -> array:
+        width = len(self.series)
+        return self.counts[row * width : (row + 1) * width]
+
+    def to_range(self) -> dict:
+        series = self.series
+        return {key: list(zip(series, self.row(i))) for i, key in enumerate(self.keys)}
+
+    def sums(self) -> dict:
+        return {key: sum(self.row(i)) for i, key in enumerate(self.keys)}
+
+    def rollup(self, rollup: int, normalize: Callable[[float, int], float]) -> dict:
+        """
+        Rolls every row up into buckets of ``rollup`` seconds, see
+        ``BaseTSDB.rollup``.
+        """
+        # Columns are shared by all the rows, so the runs of columns which end
+        # up in the same bucket only have to be determined once.
+        runs: list[tuple[float, int, int]] = []
+        for column, timestamp in enumerate(self.series):
+            new_ts = normalize(timestamp, rollup)
+            if runs and runs[-1][0] == new_ts:
+                runs[-1] = (new_ts, runs[-1][1], column + 1)
+            else:
+                runs.append((new_ts, column, column + 1))
+
+        result = {}
+        for i, key in enumerate(self.keys):
+            row = self.row(i)
+            result[key] = [[new_ts, sum(row[begin:end])] for new_ts, begin, end in runs]
+        return result
+
+
 class BaseTSDB(Service):
     __read_methods__ = frozenset(
         [
             "get_range",
+            "get_range_matrix",
             "get_sums",
             "get_distinct_counts_series",
             "get_distinct_counts_totals",
@@ -376,6 +436,46 @@ class BaseTSDB(Service):
         """
         raise NotImplementedError
 
+    def get_range_matrix(
+        self,
+        model,
+        keys,
+        start,
+        end,
+        rollup=None,
+        environment_ids=None,
+        use_cache=False,
+        jitter_value=None,
+        tenant_ids=None,
+        referrer_suffix=None,
+    ) -> RangeMatrix:
+        """
+        Like ``get_range``, but returns the counters as a ``RangeMatrix``.
+
+        This falls back to converting the result of ``get_range`` for
+        backends which can't read the matrix directly.
+        """
+        range_set = self.get_range(
+            model,
+            keys,
+            start,
+            end,
+            rollup,
+            environment_ids=environment_ids,
+            use_cache=use_cache,
+            jitter_value=jitter_value,
+            tenant_ids=tenant_ids,
+            referrer_suffix=referrer_suffix,
+        )
+
+        series = sorted({timestamp for points in range_set.values() for timestamp, _ in points})
+        columns = {timestamp: column for column, timestamp in enumerate(series)}
+        matrix = RangeMatrix(range_set.keys(), series)
+        for row, points in enumerate(range_set.values()):
+            for timestamp, count in points:
+                matrix.counts[matrix.index(row, columns[timestamp])] += int(count)
+        return matrix
+
     def get_sums(
         self,
         model,
@@ -389,7 +489,7 @@ class BaseTSDB(Service):
         tenant_ids=None,
         referrer_suffix=None,
     ):
-        range_set = self.get_range(
+        return self.get_range_matrix(
             model,
             keys,
             start,
@@ -400,9 +500,7 @@ class BaseTSDB(Service):
             jitter_value=jitter_value,
             tenant_ids=tenant_ids,
             referrer_suffix=referrer_suffix,
-        )
-        sum_set = {key: sum(p for _, p in points) for (key, points) in range_set.items()}
-        return sum_set
+        ).sums()
 
     def _add_jitter_to_series(self, series, start, rollup, jitter_value):
         if jitter_value and series:
@@ -414,10 +512,14 @@ class BaseTSDB(Service):
 
     def rollup(self, values, rollup):
         """
-        Given a set of values (as returned from ``get_range``), roll them up
-        using the ``rollup`` time (in seconds).
+        Given a set of values (as returned from ``get_range`` or
+        ``get_range_matrix``), roll them up using the ``rollup`` time (in
+        seconds).
         """
         normalize_ts_to_epoch = self.normalize_ts_to_epoch
+        if isinstance(values, RangeMatrix):
+            return values.rollup(rollup, normalize_ts_to_epoch)
+
         result: dict[int, list[list[float]]] = {}
         for key, points in values.items():
             result[key] = []
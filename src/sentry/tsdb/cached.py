@@ -0,0 +1,317 @@
+from __future__ import annotations
+
+import threading
+from collections.abc import Iterable, Mapping, Sequence
+from hashlib import md5
+from typing import Any, cast
+
+from cachetools import TTLCache
+from django.core.cache import cache
+from django.utils import timezone
+
+from sentry.tsdb.base import BaseTSDB, TSDBModel
+from sentry.utils import metrics
+from sentry.utils.dates import to_datetime, to_timestamp
+from sentry.utils.services import build_instance_from_options
+
+# Cached results of a single (model, key): ``{"range": {(rollup, environments):
+# {bucket: (timestamp, count)}}, "distinct": {(rollup, environment, first
+# bucket, last bucket): count}}``
+Entry = dict[str, dict[Any, Any]]
+
+
+def _empty_entry() -> Entry:
+    return {"range": {}, "distinct": {}}
+
+
+class CachedTSDB(BaseTSDB):
+    """
+    Caches the results of closed rollup buckets in front of another TSDB.
+
+    Once a bucket has elapsed (plus ``closed_delay`` seconds for late data and
+    ingestion lag), its counts only change through merges and deletions, so
+    ``get_range`` reads closed buckets from the cache and only queries the
+    open tail of the series from the wrapped backend. Results are cached per
+    model and key in a short lived in-process cache and in the shared Django
+    cache, and are invalidated by ``merge``, ``delete``,
+    ``merge_distinct_counts`` and ``delete_distinct_counts`` (entries in the
+    in-process caches of other processes expire after ``local_ttl`` seconds).
+
+    Distinct counts can't be combined across buckets, so the results of
+    ``get_distinct_counts_totals`` are only cached for ranges which are
+    closed entirely.
+
+    Example configuration:
+
+        SENTRY_TSDB = "sentry.tsdb.cached.CachedTSDB"
+        SENTRY_TSDB_OPTIONS = {
+            "backend": {"path": "sentry.tsdb.redissnuba.RedisSnubaTSDB", "options": {}},
+        }
+    """
+
+    def __init__(
+        self,
+        backend: Mapping[str, Any],
+        ttl: int = 3600,
+        local_ttl: float = 60,
+        local_max_items: int = 10_000,
+        closed_delay: int = 300,
+        **options,
+    ):
+        self.backend = cast(BaseTSDB, build_instance_from_options(backend))
+        options.setdefault("rollups", list(self.backend.get_rollups().items()))
+        super().__init__(**options)
+        self.ttl = ttl
+        self.closed_delay = closed_delay
+        self._local: TTLCache[str, Entry] = TTLCache(local_max_items, local_ttl)
+        self._local_lock = threading.Lock()
+
+    def validate(self):
+        self.backend.validate()
+
+    def get_range(
+        self,
+        model,
+        keys,
+        start,
+        end,
+        rollup=None,
+        environment_ids=None,
+        use_cache=False,
+        jitter_value=None,
+        tenant_ids=None,
+        referrer_suffix=None,
+    ):
+        def query(keys, start):
+            return self.backend.get_range(
+                model,
+                keys,
+                start,
+                end,
+                rollup,
+                environment_ids=environment_ids,
+                use_cache=use_cache,
+                jitter_value=jitter_value,
+                tenant_ids=tenant_ids,
+                referrer_suffix=referrer_suffix,
+            )
+
+        keys = list(keys)
+        rollup, series = self.get_optimal_rollup_series(start, end, rollup)
+        closed_until = self._get_closed_until(rollup)
+        closed = [timestamp for timestamp in series if timestamp < closed_until]
+        # Jittered series don't line up with the cached buckets
+        if jitter_value or not closed or not keys:
+            return query(keys, start)
+
+        range_key = (rollup, tuple(sorted(environment_ids)) if environment_ids else None)
+        entries = self._get_entries(model, keys)
+
+        covered, uncovered = [], []
+        for key in keys:
+            buckets = entries[key]["range"].get(range_key, {})
+            if all(timestamp in buckets for timestamp in closed):
+                covered.append(key)
+            else:
+                uncovered.append(key)
+
+        self._record_lookups("range", len(covered), len(uncovered))
+
+        results = {}
+        if uncovered:
+            earliest = self.get_earliest_timestamp(rollup)
+            updated = {}
+            for key, points in query(uncovered, start).items():
+                results[key] = points
+                if key not in entries:
+                    continue
+                entry = self._copy_entry(entries[key])
+                buckets = {
+                    bucket: point
+                    for bucket, point in entry["range"].get(range_key, {}).items()
+                    if bucket >= earliest
+                }
+                for timestamp, count in points:
+                    if timestamp < closed_until:
+                        buckets[int(timestamp)] = (timestamp, count)
+                entry["range"][range_key] = buckets
+                updated[key] = entry
+            self._set_entries(model, updated)
+
+        if covered:
+            tail = series[len(closed) :]
+            live = query(covered, to_datetime(tail[0])) if tail else {}
+            for key in covered:
+                buckets = entries[key]["range"][range_key]
+                results[key] = [buckets[timestamp] for timestamp in closed] + list(
+                    live.get(key, ())
+                )
+
+        return {key: results[key] for key in keys if key in results}
+
+    def get_distinct_counts_totals(
+        self,
+        model,
+        keys,
+        start,
+        end=None,
+        rollup=None,
+        environment_id=None,
+        use_cache=False,
+        jitter_value=None,
+        tenant_ids=None,
+        referrer_suffix=None,
+    ):
+        def query(keys):
+            return self.backend.get_distinct_counts_totals(
+                model,
+                keys,
+                start,
+                end,
+                rollup,
+                environment_id=environment_id,
+                use_cache=use_cache,
+                jitter_value=jitter_value,
+                tenant_ids=tenant_ids,
+                referrer_suffix=referrer_suffix,
+            )
+
+        keys = list(keys)
+        rollup, series = self.get_optimal_rollup_series(start, end, rollup)
+        if jitter_value or not series or series[-1] >= self._get_closed_until(rollup) or not keys:
+            return query(keys)
+
+        distinct_key = (rollup, environment_id, series[0], series[-1])
+        entries = self._get_entries(model, keys)
+        results = {
+            key: entries[key]["distinct"][distinct_key]
+            for key in keys
+            if distinct_key in entries[key]["distinct"]
+        }
+        missing = [key for key in keys if key not in results]
+
+        self._record_lookups("distinct", len(results), len(missing))
+
+        if missing:
+            earliest = self.get_earliest_timestamp(rollup)
+            updated = {}
+            for key, count in query(missing).items():
+                results[key] = count
+                if key not in entries:
+                    continue
+                entry = self._copy_entry(entries[key])
+                entry["distinct"] = {
+                    cached_key: cached_count
+                    for cached_key, cached_count in entry["distinct"].items()
+                    if cached_key[2] >= earliest
+                }
+                entry["distinct"][distinct_key] = count
+                updated[key] = entry
+            self._set_entries(model, updated)
+
+        return {key: results[key] for key in keys if key in results}
+
+    def merge(self, model, destination, sources, timestamp=None, environment_ids=None):
+        self.backend.merge(model, destination, sources, timestamp, environment_ids)
+        self._invalidate([model], [destination, *sources])
+
+    def delete(self, models, keys, start=None, end=None, timestamp=None, environment_ids=None):
+        self.backend.delete(models, keys, start, end, timestamp, environment_ids)
+        self._invalidate(models, keys)
+
+    def merge_distinct_counts(
+        self, model, destination, sources, timestamp=None, environment_ids=None
+    ):
+        self.backend.merge_distinct_counts(model, destination, sources, timestamp, environment_ids)
+        self._invalidate([model], [destination, *sources])
+
+    def delete_distinct_counts(
+        self, models, keys, start=None, end=None, timestamp=None, environment_ids=None
+    ):
+        self.backend.delete_distinct_counts(models, keys, start, end, timestamp, environment_ids)
+        self._invalidate(models, keys)
+
+    def flush(self):
+        self.backend.flush()
+        with self._local_lock:
+            self._local.clear()
+
+    def _get_closed_until(self, rollup: int) -> int:
+        """
+        Buckets starting before the returned timestamp are closed.
+        """
+        return int(to_timestamp(timezone.now())) - rollup - self.closed_delay + 1
+
+    def _make_cache_key(self, model: TSDBModel, key: Any) -> str:
+        return "tsdb:closed:{}:{}".format(model.value, md5(repr(key).encode("utf-8")).hexdigest())
+
+    def _get_entries(self, model: TSDBModel, keys: Sequence[Any]) -> dict[Any, Entry]:
+        cache_keys = {key: self._make_cache_key(model, key) for key in keys}
+        entries: dict[Any, Entry] = {}
+        with self._local_lock:
+            for key, cache_key in cache_keys.items():
+                entry = self._local.get(cache_key)
+                if entry is not None:
+                    entries[key] = entry
+
+        missing = {cache_key: key for key, cache_key in cache_keys.items() if key not in entries}
+        if missing:
+            shared = cache.get_many(list(missing))
+            with self._local_lock:
+                for cache_key, entry in shared.items():
+                    entries[missing[cache_key]] = self._local[cache_key] = entry
+
+        for key in keys:
+            entries.setdefault(key, _empty_entry())
+        return entries
+
+    def _set_entries(self, model: TSDBModel, entries: Mapping[Any, Entry]) -> None:
+        if not entries:
+            return
+        cache_keys = {key: self._make_cache_key(model, key) for key in entries}
+        with self._local_lock:
+            for key, entry in entries.items():
+                self._local[cache_keys[key]] = entry
+        cache.set_many({cache_keys[key]: entry for key, entry in entries.items()}, self.ttl)
+
+    def _invalidate(self, models: Iterable[TSDBModel], keys: Iterable[Any]) -> None:
+        keys = list(keys)
+        cache_keys = [self._make_cache_key(model, key) for model in models for key in keys]
+        with self._local_lock:
+            for cache_key in cache_keys:
+                self._local.pop(cache_key, None)
+        cache.delete_many(cache_keys)
+
+    def _record_lookups(self, kind: str, hits: int, misses: int) -> None:
+        if hits:
+            metrics.incr(f"tsdb.cached.{kind}", amount=hits, tags={"result": "hit"})
+        if misses:
+            metrics.incr(f"tsdb.cached.{kind}", amount=misses, tags={"result": "miss"})
+
+    def _copy_entry(self, entry: Entry) -> Entry:
+        # Entries are shared with the in-process cache and must not be mutated
+        return {"range": dict(entry["range"]), "distinct": dict(entry["distinct"])}
+
+
+def _delegate(name: str):
+    def method(self, *args, **kwargs):
+        return getattr(self.backend, name)(*args, **kwargs)
+
+    method.__name__ = name
+    return method
+
+
+# `get_sums` and `get_range_matrix` are built on top of the cached `get_range`
+# by `BaseTSDB`, everything else is passed through.
+for _name in (BaseTSDB.__read_methods__ | BaseTSDB.__write_methods__) - {
+    "get_range",
+    "get_range_matrix",
+    "get_sums",
+    "get_distinct_counts_totals",
+    "merge",
+    "delete",
+    "merge_distinct_counts",
+    "delete_distinct_counts",
+    "flush",
+}:
+    setattr(CachedTSDB, _name, _delegate(_name))
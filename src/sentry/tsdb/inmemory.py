@@ -2,7 +2,7 @@ from collections import Counter, defaultdict
 
 from django.utils import timezone
 
-from sentry.tsdb.base import BaseTSDB
+from sentry.tsdb.base import BaseTSDB, RangeMatrix
 from sentry.utils.dates import to_datetime, to_timestamp
 
 
@@ -72,32 +72,42 @@ class InMemoryTSDB(BaseTSDB):
         jitter_value=None,
         tenant_ids=None,
         referrer_suffix=None,
+    ):
+        return self.get_range_matrix(
+            model, keys, start, end, rollup, environment_ids=environment_ids
+        ).to_range()
+
+    def get_range_matrix(
+        self,
+        model,
+        keys,
+        start,
+        end,
+        rollup=None,
+        environment_ids=None,
+        use_cache=False,
+        jitter_value=None,
+        tenant_ids=None,
+        referrer_suffix=None,
     ):
         self.validate_arguments([model], environment_ids if environment_ids is not None else [None])
 
         rollup, series = self.get_optimal_rollup_series(start, end, rollup)
-
-        results = []
-        for timestamp in map(to_datetime, series):
-            norm_epoch = self.normalize_to_rollup(timestamp, rollup)
-
-            for key in keys:
-                if not environment_ids:
-                    value = self.data[model][(key, None)][norm_epoch]
-                else:
-                    value = sum(
-                        int(self.data[model][(key, environment_id)][norm_epoch])
-                        for environment_id in environment_ids
-                    )
-                results.append((to_timestamp(timestamp), key, value))
-
-        results_by_key = defaultdict(dict)
-        for epoch, key, count in results:
-            results_by_key[key][epoch] = int(count or 0)
-
-        for key, points in results_by_key.items():
-            results_by_key[key] = sorted(points.items())
-        return dict(results_by_key)
+        timestamps = [to_datetime(item) for item in series]
+        matrix = RangeMatrix(keys, [to_timestamp(timestamp) for timestamp in timestamps])
+        epochs = [self.normalize_to_rollup(timestamp, rollup) for timestamp in timestamps]
+
+        counts = matrix.counts
+        for row, key in enumerate(matrix.keys):
+            if not environment_ids:
+                rows = [self.data[model][(key, None)]]
+            else:
+                rows = [
+                    self.data[model][(key, environment_id)] for environment_id in environment_ids
+                ]
+            for column, norm_epoch in enumerate(epochs):
+                counts[matrix.index(row, column)] = sum(int(data[norm_epoch]) for data in rows)
+        return matrix
 
     def record(self, model, key, values, timestamp=None, environment_id=None):
         self.validate_arguments([model], [environment_id])
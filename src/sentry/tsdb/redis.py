@@ -2,19 +2,23 @@ import importlib.resources
 import itertools
 import logging
 import random
+import threading
 import uuid
 from collections import defaultdict, namedtuple
 from collections.abc import Callable
 from functools import reduce
 from hashlib import md5
-from typing import ContextManager, TypeVar
+from time import monotonic
+from typing import Any, ContextManager, TypeVar
 
 from django.utils import timezone
 from django.utils.encoding import force_bytes
 from redis.client import Script
 
-from sentry.tsdb.base import BaseTSDB
+from sentry.tsdb.base import BaseTSDB, RangeMatrix
+from sentry.utils import metrics
 from sentry.utils.compat import crc32
+from sentry.utils.concurrent import PeriodicFlusher
 from sentry.utils.dates import to_datetime, to_timestamp
 from sentry.utils.redis import check_cluster_versions, get_cluster_from_options
 from sentry.utils.versioning import Version
@@ -109,6 +113,15 @@ class RedisTSDB(BaseTSDB):
     frequency table can be displayed as percentages of the whole data set.
     (Additional documentation and the bulk of the logic for implementing the
     frequency table API can be found in the ``cmsketch.lua`` script.)
+
+    Simple counter increments can optionally be coalesced in process by
+    setting ``incr_flush_interval`` (in seconds). Increments of the same
+    hash field are then summed and written every ``incr_flush_interval``
+    seconds, or as soon as ``incr_max_pending`` distinct fields are pending,
+    as a single pipeline per host. Counters read back by this process may
+    lag behind by up to one flush interval, and write errors of durable
+    clusters are logged instead of propagated since they happen after
+    ``incr_multi`` returned.
     """
 
     DEFAULT_SKETCH_PARAMETERS = SketchParameters(3, 128, 50)
@@ -118,8 +131,27 @@ class RedisTSDB(BaseTSDB):
         self.prefix = prefix
         self.vnodes = vnodes
         self.enable_frequency_sketches = options.pop("enable_frequency_sketches", False)
+        self.incr_flush_interval: float | None = options.pop("incr_flush_interval", None)
+        self.incr_max_pending: int = options.pop("incr_max_pending", 10_000)
         super().__init__(**options)
 
+        assert self.incr_flush_interval is None or self.incr_flush_interval > 0
+        assert self.incr_max_pending > 0
+        self._pending_lock = threading.Lock()
+        # (cluster, durable) -> (key_operations, key_expiries)
+        self._pending_incrs: dict[Any, tuple[dict[Any, int], dict[str, float]]] = {}
+        self._pending_fields = 0
+        self._pending_merged = 0
+        self._window_start = monotonic()
+        self._flusher: PeriodicFlusher | None = None
+        if self.incr_flush_interval is not None:
+            self._flusher = PeriodicFlusher(
+                "tsdb-incr-flusher",
+                self.incr_flush_interval,
+                self.flush_incrs,
+                on_fork=self._drop_pending_incrs,
+            )
+
     def validate(self):
         logger.debug("Validating Redis version...")
         version = Version((2, 8, 18)) if self.enable_frequency_sketches else Version((2, 8, 9))
@@ -228,43 +260,116 @@ class RedisTSDB(BaseTSDB):
             default_timestamp = timezone.now()
 
         for (cluster, durable), environment_ids in self.get_cluster_groups({None, environment_id}):
-            manager = cluster.map()
-            if not durable:
-                manager = SuppressionWrapper(manager)
+            key_operations, key_expiries = self._get_counter_operations(
+                items, default_timestamp, default_count, environment_ids
+            )
+            if self.incr_flush_interval is not None:
+                self._add_pending_incrs(cluster, durable, key_operations, key_expiries)
+            else:
+                self._write_counters(cluster, durable, key_operations, key_expiries)
 
-            with manager as client:
-                # (hash_key, hash_field) -> count
-                key_operations = defaultdict(int)
-                # (hash_key) -> "max expiration encountered"
-                key_expiries = defaultdict(float)
-
-                for rollup, max_values in self.rollups.items():
-                    for item in items:
-                        if len(item) == 2:
-                            model, key = item
-                            options = {}
-                        else:
-                            model, key, options = item
-
-                        count = options.get("count", default_count)
-                        timestamp = options.get("timestamp", default_timestamp)
+        if self.incr_flush_interval is not None and self._should_flush_incrs():
+            self.flush_incrs()
 
-                        expiry = self.calculate_expiry(rollup, max_values, timestamp)
+    def _get_counter_operations(self, items, default_timestamp, default_count, environment_ids):
+        """
+        Returns the hash field increments of ``items`` as ``(hash_key,
+        hash_field) -> count`` and the expiry of each hash key.
+        """
+        key_operations: dict[tuple[str, Any], int] = defaultdict(int)
+        # (hash_key) -> "max expiration encountered"
+        key_expiries: dict[str, float] = defaultdict(float)
+
+        for rollup, max_values in self.rollups.items():
+            for item in items:
+                if len(item) == 2:
+                    model, key = item
+                    options = {}
+                else:
+                    model, key, options = item
 
-                        for environment_id in environment_ids:
-                            hash_key, hash_field = self.make_counter_key(
-                                model, rollup, timestamp, key, environment_id
-                            )
+                count = options.get("count", default_count)
+                timestamp = options.get("timestamp", default_timestamp)
+
+                expiry = self.calculate_expiry(rollup, max_values, timestamp)
+
+                for environment_id in environment_ids:
+                    hash_key, hash_field = self.make_counter_key(
+                        model, rollup, timestamp, key, environment_id
+                    )
+
+                    if key_expiries[hash_key] < expiry:
+                        key_expiries[hash_key] = expiry
+
+                    key_operations[(hash_key, hash_field)] += count
+
+        return key_operations, key_expiries
+
+    def _write_counters(self, cluster, durable, key_operations, key_expiries):
+        manager = cluster.map()
+        if not durable:
+            manager = SuppressionWrapper(manager)
+
+        key_expiries = dict(key_expiries)
+        with manager as client:
+            for (hash_key, hash_field), count in key_operations.items():
+                client.hincrby(hash_key, hash_field, count)
+                if key_expiries.get(hash_key):
+                    client.expireat(hash_key, key_expiries.pop(hash_key))
+
+    def _add_pending_incrs(self, cluster, durable, key_operations, key_expiries):
+        if self._flusher is not None:
+            self._flusher.ensure_started()
+
+        with self._pending_lock:
+            pending = self._pending_incrs.get((cluster, durable))
+            if pending is None:
+                pending = self._pending_incrs[(cluster, durable)] = (defaultdict(int), {})
+            pending_operations, pending_expiries = pending
+
+            for field, count in key_operations.items():
+                if field not in pending_operations:
+                    self._pending_fields += 1
+                pending_operations[field] += count
+            for hash_key, expiry in key_expiries.items():
+                if pending_expiries.get(hash_key, 0) < expiry:
+                    pending_expiries[hash_key] = expiry
+            self._pending_merged += len(key_operations)
+
+    def _should_flush_incrs(self):
+        return (
+            self._pending_fields >= self.incr_max_pending
+            or monotonic() - self._window_start >= self.incr_flush_interval
+        )
+
+    def flush_incrs(self):
+        """
+        Writes all coalesced counter increments.
+        """
+        with self._pending_lock:
+            pending, self._pending_incrs = self._pending_incrs, {}
+            fields, self._pending_fields = self._pending_fields, 0
+            merged, self._pending_merged = self._pending_merged, 0
+            self._window_start = monotonic()
 
-                            if key_expiries[hash_key] < expiry:
-                                key_expiries[hash_key] = expiry
+        if not pending:
+            return
+
+        for (cluster, durable), (key_operations, key_expiries) in pending.items():
+            try:
+                self._write_counters(cluster, durable, key_operations, key_expiries)
+            except Exception:
+                logger.exception("tsdb.incr-flush-failed")
 
-                            key_operations[(hash_key, hash_field)] += count
+        metrics.incr("tsdb.redis.incr.coalesced", amount=merged, skip_internal=True)
+        metrics.incr("tsdb.redis.incr.flushed", amount=fields, skip_internal=True)
 
-                for (hash_key, hash_field), count in key_operations.items():
-                    client.hincrby(hash_key, hash_field, count)
-                    if key_expiries.get(hash_key):
-                        client.expireat(hash_key, key_expiries.pop(hash_key))
+    def _drop_pending_incrs(self):
+        with self._pending_lock:
+            self._pending_incrs = {}
+            self._pending_fields = 0
+            self._pending_merged = 0
+            self._window_start = monotonic()
 
     def get_range(
         self,
@@ -287,6 +392,23 @@ class RedisTSDB(BaseTSDB):
         >>>          start=now - timedelta(days=1),
         >>>          end=now)
         """
+        return self.get_range_matrix(
+            model, keys, start, end, rollup, environment_ids=environment_ids
+        ).to_range()
+
+    def get_range_matrix(
+        self,
+        model,
+        keys,
+        start,
+        end,
+        rollup=None,
+        environment_ids=None,
+        use_cache=False,
+        jitter_value=None,
+        tenant_ids=None,
+        referrer_suffix=None,
+    ):
         # redis backend doesn't support multiple envs
         if environment_ids is not None and len(environment_ids) > 1:
             raise NotImplementedError
@@ -295,27 +417,34 @@ class RedisTSDB(BaseTSDB):
         self.validate_arguments([model], [environment_id])
 
         rollup, series = self.get_optimal_rollup_series(start, end, rollup)
-        series = [to_datetime(item) for item in series]
+        timestamps = [to_datetime(item) for item in series]
+        matrix = RangeMatrix(keys, [to_timestamp(timestamp) for timestamp in timestamps])
+
+        # Counters of the same bucket and vnode share a hash, so all of them
+        # are read with a single HMGET: hash_key -> ([hash_field], [index])
+        requests: dict[str, tuple[list[Any], list[int]]] = defaultdict(lambda: ([], []))
+        for row, key in enumerate(matrix.keys):
+            for column, timestamp in enumerate(timestamps):
+                hash_key, hash_field = self.make_counter_key(
+                    model, rollup, timestamp, key, environment_id
+                )
+                fields, indexes = requests[hash_key]
+                fields.append(hash_field)
+                indexes.append(matrix.index(row, column))
 
-        results = []
         cluster, _ = self.get_cluster(environment_id)
         with cluster.map() as client:
-            for key in keys:
-                for timestamp in series:
-                    hash_key, hash_field = self.make_counter_key(
-                        model, rollup, timestamp, key, environment_id
-                    )
-                    results.append(
-                        (to_timestamp(timestamp), key, client.hget(hash_key, hash_field))
-                    )
-
-        results_by_key = defaultdict(dict)
-        for epoch, key, count in results:
-            results_by_key[key][epoch] = int(count.value or 0)
+            responses = [
+                (indexes, client.hmget(hash_key, fields))
+                for hash_key, (fields, indexes) in requests.items()
+            ]
 
-        for key, points in results_by_key.items():
-            results_by_key[key] = sorted(points.items())
-        return dict(results_by_key)
+        counts = matrix.counts
+        for indexes, response in responses:
+            for index, value in zip(indexes, response.value):
+                if value:
+                    counts[index] = int(value)
+        return matrix
 
     def merge(self, model, destination, sources, timestamp=None, environment_ids=None):
         environment_ids = (set(environment_ids) if environment_ids is not None else set()).union(
@@ -27,6 +27,7 @@ def dont_do_this(callargs):
 method_specifications = {
     # method: (type, function(callargs) -> set[model])
     "get_range": (READ, single_model_argument),
+    "get_range_matrix": (READ, single_model_argument),
     "get_sums": (READ, single_model_argument),
     "get_distinct_counts_series": (READ, single_model_argument),
     "get_distinct_counts_totals": (READ, single_model_argument),
@@ -1,15 +1,17 @@
 from __future__ import annotations
 
+import atexit
 import collections
 import functools
 import logging
+import os
 import threading
 from collections.abc import Callable
 from concurrent.futures import Future, InvalidStateError
 from concurrent.futures._base import FINISHED, RUNNING
 from contextlib import contextmanager
 from queue import Full, PriorityQueue
-from time import time
+from time import sleep, time
 from typing import TYPE_CHECKING, TypeVar
 
 from sentry_sdk import Hub
@@ -292,3 +294,61 @@ class FutureSet:
 
         if remaining == 0:
             self.__execute_callback(callback)
+
+
+class PeriodicFlusher:
+    """
+    Calls `flush` every `interval` seconds from a daemon thread of the current
+    process, and once more at interpreter shutdown.
+
+    The thread is started by `ensure_started`, which is cheap enough to call
+    before every write. A forked child doesn't inherit the thread of its
+    parent, so it starts its own, after calling `on_fork` to drop whatever
+    the child copied from the parent and must not flush a second time. For
+    the same reason, a child that never starts its thread doesn't flush at
+    exit.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        interval: float,
+        flush: Callable[[], None],
+        on_fork: Callable[[], None] | None = None,
+    ) -> None:
+        assert interval > 0
+        self.name = name
+        self.interval = interval
+        self.flush = flush
+        self.on_fork = on_fork
+        self._lock = threading.Lock()
+        self._pid: int | None = None
+        atexit.register(self._flush_at_exit)
+
+    def ensure_started(self) -> None:
+        pid = os.getpid()
+        if self._pid == pid:
+            return
+
+        with self._lock:
+            if self._pid == pid:
+                return
+            if self._pid is not None and self.on_fork is not None:
+                self.on_fork()
+            self._pid = pid
+            threading.Thread(target=self._run, name=self.name, daemon=True).start()
+
+    def _flush_at_exit(self) -> None:
+        # Whatever is pending was copied from the parent if this process never
+        # started its own thread
+        if self._pid == os.getpid():
+            self.flush()
+
+    def _run(self) -> None:
+        pid = os.getpid()
+        while self._pid == pid:
+            sleep(self.interval)
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("periodic-flusher.failed", extra={"flusher": self.name})
@@ -142,6 +142,15 @@ def loads(
             return _default_decoder.decode(value)
 
 
+def raw_decode(value: str, idx: int = 0) -> tuple[JSONData, int]:
+    """
+    Decodes the JSON value starting at `idx` (after any whitespace) and
+    returns it together with the index where it ends, ignoring the rest of
+    the string.
+    """
+    return _default_decoder.raw_decode(value, idx)
+
+
 def dumps_htmlsafe(value: object) -> SafeString:
     return mark_safe(_default_escaped_encoder.encode(value))
 
@@ -183,4 +192,5 @@ __all__ = (
     "load",
     "loads",
     "prune_empty_keys",
+    "raw_decode",
 )
@@ -1,13 +1,23 @@
 from __future__ import annotations
 
+import codecs
 import functools
 import logging
 import os
 import re
 import time
-from collections import namedtuple
-from collections.abc import Callable, Collection, Mapping, MutableMapping, Sequence
-from concurrent.futures import ThreadPoolExecutor
+from collections import deque, namedtuple
+from collections.abc import (
+    Callable,
+    Collection,
+    Generator,
+    Iterable,
+    Iterator,
+    Mapping,
+    MutableMapping,
+    Sequence,
+)
+from concurrent.futures import Future, ThreadPoolExecutor
 from contextlib import contextmanager
 from copy import deepcopy
 from datetime import datetime, timedelta, timezone
@@ -35,8 +45,9 @@ from sentry.net.http import connection_from_url
 from sentry.snuba.dataset import Dataset
 from sentry.snuba.events import Columns
 from sentry.snuba.referrer import validate_referrer
-from sentry.utils import json, metrics
+from sentry.utils import json, metrics, snuba_cache
 from sentry.utils.dates import outside_retention_with_modified_start, to_timestamp
+from sentry.utils.snuba_scheduler import QueryScheduler
 
 logger = logging.getLogger(__name__)
 
@@ -439,9 +450,20 @@ _snuba_pool = connection_from_url(
         allowed_methods={"GET", "POST", "DELETE"},
     ),
     timeout=settings.SENTRY_SNUBA_TIMEOUT,
-    maxsize=10,
+    maxsize=settings.SENTRY_SNUBA_MAX_CONCURRENT_QUERIES,
+)
+_query_thread_pool = ThreadPoolExecutor(max_workers=settings.SENTRY_SNUBA_MAX_CONCURRENT_QUERIES)
+_query_scheduler = QueryScheduler(
+    max_concurrency=settings.SENTRY_SNUBA_MAX_CONCURRENT_QUERIES,
+    min_concurrency=settings.SENTRY_SNUBA_MIN_CONCURRENT_QUERIES,
+    target_latency=settings.SENTRY_SNUBA_TARGET_QUERY_LATENCY,
+    referrer_limits=settings.SENTRY_SNUBA_REFERRER_CONCURRENCY_LIMITS,
+    referrer_priorities=settings.SENTRY_SNUBA_REFERRER_PRIORITIES,
+    referrer_share=settings.SENTRY_SNUBA_REFERRER_CONCURRENCY_SHARE,
 )
-_query_thread_pool = ThreadPoolExecutor(max_workers=10)
+# Refreshes stale entries of the query cache
+_revalidation_pool = ThreadPoolExecutor(max_workers=2)
+_query_single_flight = snuba_cache.SingleFlight()
 
 
 epoch_naive = datetime(1970, 1, 1, tzinfo=None)
@@ -871,7 +893,7 @@ def bulk_snuba_queries(
             request.tenant_ids = request.tenant_ids or dict()
             request.tenant_ids["referrer"] = referrer
 
-    params = [(request, lambda x: x, lambda x: x) for request in requests]
+    params = [(request, _identity, _identity) for request in requests]
     return _apply_cache_and_build_results(params, referrer=referrer, use_cache=use_cache)
 
 
@@ -894,6 +916,10 @@ def bulk_raw_query(
     return _apply_cache_and_build_results(request_bodies, referrer=referrer, use_cache=use_cache)
 
 
+def _identity(value: Any) -> Any:
+    return value
+
+
 def get_cache_key(query: SnubaQuery) -> str:
     if isinstance(query, Request):
         hashable = str(query)
@@ -913,40 +939,123 @@ def _apply_cache_and_build_results(
     validate_referrer(referrer)
     if referrer:
         headers["referer"] = referrer
-    # Store the original position of the query so that we can maintain the order
-    query_param_list = list(enumerate(snuba_param_list))
 
-    results = []
+    if not use_cache:
+        return _bulk_snuba_query(snuba_param_list, headers)
+
+    now = time.time()
+    metric_tags = {"referrer": referrer} if referrer else None
+    # Results by the original position of the query so that we can maintain the order
+    results: dict[int, Any] = {}
+
+    cache_keys = [get_cache_key(query_params[0]) for query_params in snuba_param_list]
+    cache_data = cache.get_many(cache_keys)
+    to_query: list[tuple[int, RequestQueryBody, str]] = []
+    for query_pos, (query_params, cache_key) in enumerate(zip(snuba_param_list, cache_keys)):
+        cached_result = cache_data.get(cache_key)
+        # Entries written in the old format are treated as misses
+        if not isinstance(cached_result, snuba_cache.CachedResult):
+            metrics.incr("snuba.query_cache.miss", tags=metric_tags)
+            to_query.append((query_pos, query_params, cache_key))
+            continue
 
-    if use_cache:
-        cache_keys = [get_cache_key(query_params[0]) for _, query_params in query_param_list]
-        cache_data = cache.get_many(cache_keys)
-        to_query: list[tuple[int, RequestQueryBody, str | None]] = []
-        for (query_pos, query_params), cache_key in zip(query_param_list, cache_keys):
-            cached_result = cache_data.get(cache_key)
-            metric_tags = {"referrer": referrer} if referrer else None
-            if cached_result is None:
-                metrics.incr("snuba.query_cache.miss", tags=metric_tags)
-                to_query.append((query_pos, query_params, cache_key))
-            else:
-                metrics.incr("snuba.query_cache.hit", tags=metric_tags)
-                results.append((query_pos, json.loads(cached_result)))
-    else:
-        to_query = [(query_pos, query_params, None) for query_pos, query_params in query_param_list]
-
-    if to_query:
-        query_results = _bulk_snuba_query([item[1] for item in to_query], headers)
-        for result, (query_pos, _, opt_cache_key) in zip(query_results, to_query):
-            if opt_cache_key:
-                cache.set(
-                    opt_cache_key, json.dumps(result), settings.SENTRY_SNUBA_CACHE_TTL_SECONDS
-                )
-            results.append((query_pos, result))
+        metrics.incr("snuba.query_cache.hit", tags=metric_tags)
+        metrics.incr("snuba.query_cache.bytes_saved", amount=cached_result.size, tags=metric_tags)
+        if cached_result.fresh_until <= now:
+            metrics.incr("snuba.query_cache.stale_hit", tags=metric_tags)
+            _revalidate_cached_result(query_params, cache_key, headers, referrer)
+        results[query_pos] = snuba_cache.decode_result(cached_result.payload)
+
+    # Identical queries which are already running in this process are not
+    # sent again, their results are shared in their encoded form so that
+    # every caller gets its own copy.
+    leading: list[tuple[int, RequestQueryBody, str]] = []
+    following: list[tuple[int, RequestQueryBody, Future[bytes]]] = []
+    for query_pos, query_params, cache_key in to_query:
+        future, is_leader = _query_single_flight.claim(cache_key)
+        if is_leader:
+            leading.append((query_pos, query_params, cache_key))
+        else:
+            following.append((query_pos, query_params, future))
+
+    if leading:
+        unresolved = {cache_key for _, _, cache_key in leading}
+        try:
+            query_results = _bulk_snuba_query([item[1] for item in leading], headers)
+            for result, (query_pos, query_params, cache_key) in zip(query_results, leading):
+                payload = _cache_result(query_params, cache_key, result, referrer)
+                _query_single_flight.resolve(cache_key, payload)
+                unresolved.discard(cache_key)
+                results[query_pos] = result
+        except BaseException as e:
+            for cache_key in unresolved:
+                _query_single_flight.fail(cache_key, e)
+            raise
+
+    for query_pos, query_params, future in following:
+        metrics.incr("snuba.query_cache.coalesced", tags=metric_tags)
+        try:
+            payload = future.result(timeout=settings.SENTRY_SNUBA_TIMEOUT)
+        except TimeoutError:
+            results[query_pos] = _bulk_snuba_query([query_params], headers)[0]
+        else:
+            results[query_pos] = snuba_cache.decode_result(payload)
+
+    return [results[query_pos] for query_pos in range(len(snuba_param_list))]
+
+
+def _cache_result(
+    query_params: RequestQueryBody,
+    cache_key: str,
+    result: Mapping[str, Any],
+    referrer: str | None,
+) -> bytes:
+    now = time.time()
+    ttl, stale_ttl = snuba_cache.get_cache_ttls(referrer, query_params[0], now)
+    payload = snuba_cache.encode_result(result)
+    cache.set(
+        cache_key,
+        snuba_cache.CachedResult(fresh_until=now + ttl, size=len(payload), payload=payload),
+        ttl + stale_ttl,
+    )
+    metrics.distribution(
+        "snuba.query_cache.stored_bytes",
+        len(payload),
+        tags={"referrer": referrer} if referrer else None,
+        unit="byte",
+    )
+    return payload
+
+
+def _revalidate_cached_result(
+    query_params: RequestQueryBody,
+    cache_key: str,
+    headers: Mapping[str, str],
+    referrer: str | None,
+) -> None:
+    """
+    Refreshes a stale cache entry in the background, unless the query is
+    already running in this process.
+    """
+    _, is_leader = _query_single_flight.claim(cache_key)
+    if not is_leader:
+        return
 
-    # Sort so that we get the results back in the original param list order
-    results.sort()
-    # Drop the sort order val
-    return [result[1] for result in results]
+    def revalidate() -> None:
+        try:
+            result = _bulk_snuba_query([query_params], headers)[0]
+            payload = _cache_result(query_params, cache_key, result, referrer)
+        except BaseException as e:
+            logger.warning("snuba.query_cache.revalidate-failed", exc_info=True)
+            _query_single_flight.fail(cache_key, e)
+        else:
+            _query_single_flight.resolve(cache_key, payload)
+
+    try:
+        _revalidation_pool.submit(revalidate)
+    except RuntimeError as e:
+        # The pool is shut down at interpreter exit, keep serving the stale result
+        _query_single_flight.fail(cache_key, e)
 
 
 def _bulk_snuba_query(
@@ -971,24 +1080,37 @@ def _bulk_snuba_query(
                 parent_api = scope.transaction.name
 
         if len(snuba_param_list) > 1:
-            query_results = list(
-                _query_thread_pool.map(
-                    _snuba_query,
-                    [
-                        (params, Hub(Hub.current), headers, parent_api)
-                        for params in snuba_param_list
-                    ],
-                )
-            )
+            # Queries are only handed to the thread pool once the scheduler
+            # admitted them, so that its workers never wait for a slot
+            futures = []
+            for params in snuba_param_list:
+                _query_scheduler.acquire(query_referrer)
+                try:
+                    futures.append(
+                        _query_thread_pool.submit(
+                            _scheduled_snuba_query,
+                            (params, Hub(Hub.current), headers, parent_api),
+                        )
+                    )
+                except BaseException:
+                    _query_scheduler.release(query_referrer, 0)
+                    raise
+            query_results = [future.result() for future in futures]
         else:
             # No need to submit to the thread pool if we're just performing a single query
-            query_results = [
-                _snuba_query((snuba_param_list[0], Hub(Hub.current), headers, parent_api))
-            ]
+            with _query_scheduler.slot(query_referrer):
+                query_results = [
+                    _snuba_query((snuba_param_list[0], Hub(Hub.current), headers, parent_api))
+                ]
+
+    # Raw responses are dropped as soon as they're decoded, so that at most one
+    # of them is held next to the decoded results
+    raw_results = deque(query_results)
+    del query_results
 
     results = []
-    for index, item in enumerate(query_results):
-        response, _, reverse = item
+    for index in range(len(raw_results)):
+        response, _, reverse = raw_results.popleft()
         try:
             body = json.loads(response.data, skip_trace=True)
             if SNUBA_INFO:
@@ -1009,31 +1131,42 @@ def _bulk_snuba_query(
                 raise SnubaError("Failed to parse snuba error response")
             raise UnexpectedResponseError(f"Could not decode JSON response: {response.data!r}")
 
-        if response.status != 200:
-            _log_request_query(snuba_param_list[index][0])
-
-            if body.get("error"):
-                error = body["error"]
-                if response.status == 429:
-                    raise RateLimitExceeded(error["message"])
-                elif error["type"] == "schema":
-                    raise SchemaValidationError(error["message"])
-                elif error["type"] == "clickhouse":
-                    raise clickhouse_error_codes_map.get(error["code"], QueryExecutionError)(
-                        error["message"]
-                    )
-                else:
-                    raise SnubaError(error["message"])
-            else:
-                raise SnubaError(f"HTTP {response.status}")
+        _raise_for_error(response.status, body, snuba_param_list[index][0])
 
         # Forward and reverse translation maps from model ids to snuba keys, per column
-        body["data"] = [reverse(d) for d in body["data"]]
+        if reverse is not _identity:
+            body["data"] = [reverse(d) for d in body["data"]]
         results.append(body)
 
     return results
 
 
+def _raise_for_error(status: int, body: Mapping[str, Any], request: Request) -> None:
+    if status == 200:
+        return
+
+    _log_request_query(request)
+
+    try:
+        if body.get("error"):
+            error = body["error"]
+            if status == 429:
+                raise RateLimitExceeded(error["message"])
+            elif error["type"] == "schema":
+                raise SchemaValidationError(error["message"])
+            elif error["type"] == "clickhouse":
+                raise clickhouse_error_codes_map.get(error["code"], QueryExecutionError)(
+                    error["message"]
+                )
+            else:
+                raise SnubaError(error["message"])
+        else:
+            raise SnubaError(f"HTTP {status}")
+    except (RateLimitExceeded, QueryTooManySimultaneous):
+        _query_scheduler.throttled()
+        raise
+
+
 def _log_request_query(req: Request) -> None:
     """Given a request, logs its associated query in sentry breadcrumbs"""
     query_str = req.serialize()
@@ -1054,6 +1187,19 @@ def _snql_query(params: tuple[RequestQueryBody, Hub, Mapping[str, str], str]) ->
     return _snuba_query(params)
 
 
+def _scheduled_snuba_query(
+    params: tuple[RequestQueryBody, Hub, Mapping[str, str], str],
+) -> RawResult:
+    """
+    Runs a query which the scheduler already admitted and gives its slot back.
+    """
+    start = time.monotonic()
+    try:
+        return _snuba_query(params)
+    finally:
+        _query_scheduler.release(params[2].get("referer", "<unknown>"), time.monotonic() - start)
+
+
 def _snuba_query(
     params: tuple[
         RequestQueryBody,
@@ -1084,7 +1230,10 @@ def _snuba_query(
 
 
 def _raw_mql_query(
-    request: Request, thread_hub: Hub, headers: Mapping[str, str]
+    request: Request,
+    thread_hub: Hub,
+    headers: Mapping[str, str],
+    preload_content: bool = True,
 ) -> urllib3.response.HTTPResponse:
     # Enter hub such that http spans are properly nested
     with thread_hub, timer("mql_query"):
@@ -1098,12 +1247,19 @@ def _raw_mql_query(
         with thread_hub.start_span(op="snuba_mql.run", description=serialized_req) as span:
             span.set_tag("snuba.referrer", referrer)
             return _snuba_pool.urlopen(
-                "POST", f"/{request.dataset}/mql", body=body, headers=headers
+                "POST",
+                f"/{request.dataset}/mql",
+                body=body,
+                headers=headers,
+                preload_content=preload_content,
             )
 
 
 def _raw_snql_query(
-    request: Request, thread_hub: Hub, headers: Mapping[str, str]
+    request: Request,
+    thread_hub: Hub,
+    headers: Mapping[str, str],
+    preload_content: bool = True,
 ) -> urllib3.response.HTTPResponse:
     # Enter hub such that http spans are properly nested
     with thread_hub, timer("snql_query"):
@@ -1116,10 +1272,217 @@ def _raw_snql_query(
         with thread_hub.start_span(op="snuba_snql.run", description=serialized_req) as span:
             span.set_tag("snuba.referrer", referrer)
             return _snuba_pool.urlopen(
-                "POST", f"/{request.dataset}/snql", body=body, headers=headers
+                "POST",
+                f"/{request.dataset}/snql",
+                body=body,
+                headers=headers,
+                preload_content=preload_content,
             )
 
 
+class _JSONStreamReader:
+    """
+    Reads JSON tokens and values from a stream of UTF-8 encoded chunks,
+    buffering only the part of the document which hasn't been decoded yet.
+    """
+
+    def __init__(self, chunks: Iterable[bytes]) -> None:
+        self._chunks = iter(chunks)
+        self._decoder = codecs.getincrementaldecoder("utf-8")()
+        self._buffer = ""
+        self._pos = 0
+        self._eof = False
+
+    def _read(self, size: int) -> None:
+        """
+        Reads chunks until at least `size` characters are buffered after the
+        current position, or the stream is exhausted.
+        """
+        parts = [self._buffer[self._pos :]]
+        buffered = len(parts[0])
+        while buffered < size and not self._eof:
+            try:
+                text = self._decoder.decode(next(self._chunks))
+            except StopIteration:
+                text = self._decoder.decode(b"", final=True)
+                self._eof = True
+            parts.append(text)
+            buffered += len(text)
+        self._buffer = "".join(parts)
+        self._pos = 0
+
+    def peek(self) -> str:
+        """
+        Returns the next non-whitespace character, or an empty string at the
+        end of the stream.
+        """
+        while True:
+            while self._pos < len(self._buffer) and self._buffer[self._pos] in " \t\n\r":
+                self._pos += 1
+            if self._pos < len(self._buffer) or self._eof:
+                return self._buffer[self._pos : self._pos + 1]
+            self._read(1)
+
+    def expect(self, char: str) -> None:
+        if self.peek() != char:
+            raise ValueError(f"Expected {char!r} in JSON stream")
+        self._pos += 1
+
+    def value(self) -> Any:
+        self.peek()
+        size = len(self._buffer) - self._pos
+        while True:
+            try:
+                value, end = json.raw_decode(self._buffer, self._pos)
+            except json.JSONDecodeError:
+                if self._eof:
+                    raise
+            else:
+                # A number at the end of the buffer may continue in the next chunk
+                if end < len(self._buffer) or self._eof:
+                    self._pos = end
+                    return value
+            # Double the buffered size, so that large values are decoded a
+            # logarithmic number of times
+            size = max(size * 2, 1)
+            self._read(size)
+
+
+class StreamedResult:
+    """
+    The result of a query run with `stream_snuba_query`.
+
+    Iterating the result yields the rows of its `data` one at a time while
+    they are read from Snuba, so they are only held in memory as long as the
+    caller needs them, and can only be iterated once. `body` holds all other
+    members of the result: the ones Snuba sends ahead of the rows are
+    available right away, the others once all rows have been read.
+    """
+
+    def __init__(self, chunks: Iterable[bytes], reverse: Translator = _identity) -> None:
+        self.body: dict[str, Any] = {}
+        self.complete = False
+        self._reader = _JSONStreamReader(chunks)
+        self._reverse = reverse
+        self._iterated = False
+        self._reader.expect("{")
+        self._has_rows = self._read_members()
+
+    def _read_members(self) -> bool:
+        """
+        Reads members of the result into `body` up to the start of `data`,
+        and returns whether there are rows to read.
+        """
+        reader = self._reader
+        while True:
+            char = reader.peek()
+            if char == ",":
+                reader.expect(",")
+                continue
+            if char == "}":
+                reader.expect("}")
+                self.complete = True
+                return False
+
+            key = reader.value()
+            reader.expect(":")
+            if key == "data":
+                reader.expect("[")
+                return True
+            self.body[key] = reader.value()
+
+    def __iter__(self) -> Iterator[Mapping[str, Any]]:
+        if self._iterated:
+            raise RuntimeError("The rows of a streamed result can only be read once")
+        self._iterated = True
+
+        reader = self._reader
+        while self._has_rows:
+            # The response can still be cut off or malformed while the rows
+            # are read, which must fail like a response that was read at once
+            try:
+                char = reader.peek()
+                if char == ",":
+                    reader.expect(",")
+                    continue
+                if char == "]":
+                    reader.expect("]")
+                    self._has_rows = self._read_members()
+                    continue
+                row = reader.value()
+            except ValueError:
+                raise UnexpectedResponseError("Could not decode JSON response")
+            except urllib3.exceptions.HTTPError as err:
+                raise SnubaError(err)
+            yield self._reverse(row)
+
+
+@contextmanager
+def stream_snuba_query(
+    request: Request,
+    referrer: str | None = None,
+    chunk_size: int = 64 * 1024,
+) -> Generator[StreamedResult, None, None]:
+    """
+    Runs a single query and decodes the rows of its result incrementally
+    while they're read from Snuba, instead of materializing the whole
+    response like `bulk_snuba_queries`. Meant for queries returning a lot of
+    rows which can be processed one at a time:
+
+        with stream_snuba_query(request, referrer) as result:
+            for row in result:
+                ...
+
+    The connection to Snuba, and a slot of the query scheduler, are held
+    until the block exits. Results are not cached.
+    """
+    validate_referrer(referrer)
+    headers = {}
+    if referrer:
+        headers["referer"] = referrer
+        request.tenant_ids = request.tenant_ids or dict()
+        request.tenant_ids["referrer"] = referrer
+    if "consistent" in OVERRIDE_OPTIONS:
+        request.flags.consistent = OVERRIDE_OPTIONS["consistent"]
+
+    metrics.incr("snql.sdk.api", tags={"referrer": referrer or "unknown", "streamed": "true"})
+    raw_query = _raw_mql_query if isinstance(request.query, MetricsQuery) else _raw_snql_query
+
+    with sentry_sdk.start_span(op="snuba_query", description=referrer or "<unknown>") as span:
+        span.set_tag("query.referrer", referrer or "<unknown>")
+        # The slot is held until the body has been streamed, as the query
+        # keeps a connection busy until then
+        with _query_scheduler.slot(referrer or "<unknown>"):
+            try:
+                response = raw_query(request, Hub(Hub.current), headers, preload_content=False)
+            except urllib3.exceptions.HTTPError as err:
+                raise SnubaError(err)
+
+            result = None
+            try:
+                if response.status != 200:
+                    data = response.read()
+                    try:
+                        body = json.loads(data, skip_trace=True)
+                    except ValueError:
+                        logger.exception("snuba.query.invalid-json", extra={"response.data": data})
+                        raise SnubaError("Failed to parse snuba error response")
+                    _raise_for_error(response.status, body, request)
+
+                try:
+                    result = StreamedResult(response.stream(chunk_size))
+                except ValueError:
+                    raise UnexpectedResponseError("Could not decode JSON response")
+                except urllib3.exceptions.HTTPError as err:
+                    raise SnubaError(err)
+                yield result
+            finally:
+                # A partially read response can't be reused by other requests
+                if result is None or not result.complete:
+                    response.close()
+                response.release_conn()
+
+
 def query(
     dataset=None,
     start=None,
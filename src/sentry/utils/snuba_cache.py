@@ -0,0 +1,158 @@
+"""
+Building blocks of the Snuba query result cache used by `sentry.utils.snuba`
+for queries made with `use_cache=True`.
+
+Results are cached under `get_cache_key` of their request for a TTL that
+depends on the referrer and on the time range of the query. Queries whose
+range ended a while ago return results that (almost) never change, so they
+are cached for longer and may be served stale while a background refresh is
+running. Identical queries which are in flight at the same time are only
+sent to Snuba once per process.
+"""
+
+from __future__ import annotations
+
+import threading
+from collections.abc import Mapping
+from concurrent.futures import Future
+from datetime import datetime, timezone
+from typing import Any, NamedTuple
+
+import msgpack
+from django.conf import settings
+from snuba_sdk import Condition, MetricsQuery, Op, Request
+
+from sentry.utils import json
+from sentry.utils.codecs import ZstdCodec
+
+# Leading byte of a cached payload, identifying how it was encoded.
+FORMAT_MSGPACK = b"\x01"
+FORMAT_JSON = b"\x02"
+
+_zstd = ZstdCodec()
+
+
+class CachedResult(NamedTuple):
+    #: Timestamp after which the result is stale.
+    fresh_until: float
+    #: Size of the payload, a lower bound of what a cache hit saves.
+    size: int
+    payload: bytes
+
+
+def encode_result(result: Mapping[str, Any]) -> bytes:
+    """
+    Encodes a query result compactly: rows are stored as lists of values
+    under a single list of column names, packed with msgpack and compressed.
+    Results which msgpack can't represent (e.g. translated rows containing
+    datetimes) fall back to JSON.
+    """
+    body = dict(result)
+    data = body.pop("data", None)
+    columns = None
+    rows: Any = data
+    if isinstance(data, list) and data and all(isinstance(row, dict) for row in data):
+        keys = data[0].keys()
+        if all(row.keys() == keys for row in data):
+            columns = list(keys)
+            rows = [[row[column] for column in columns] for row in data]
+
+    try:
+        packed = msgpack.packb([columns, rows, body])
+    except (TypeError, ValueError, OverflowError):
+        return FORMAT_JSON + _zstd.encode(json.dumps(result).encode("utf-8"))
+    return FORMAT_MSGPACK + _zstd.encode(packed)
+
+
+def decode_result(payload: bytes) -> dict[str, Any]:
+    encoding, payload = payload[:1], _zstd.decode(payload[1:])
+    if encoding == FORMAT_JSON:
+        return json.loads(payload)
+
+    columns, rows, body = msgpack.unpackb(payload, strict_map_key=False)
+    if columns is not None:
+        rows = [dict(zip(columns, row)) for row in rows]
+    if rows is not None:
+        body["data"] = rows
+    return body
+
+
+def get_query_end(request: Any) -> datetime | None:
+    """
+    Returns the end of the time range of a query, if it has one.
+    """
+    if not isinstance(request, Request):
+        return None
+
+    query = request.query
+    if isinstance(query, MetricsQuery):
+        end = query.end
+    else:
+        ends = [
+            condition.rhs
+            for condition in getattr(query, "where", None) or ()
+            if isinstance(condition, Condition)
+            and condition.op in (Op.LT, Op.LTE)
+            and isinstance(condition.rhs, datetime)
+        ]
+        end = min(ends, key=_to_aware) if ends else None
+
+    return _to_aware(end) if end is not None else None
+
+
+def _to_aware(value: datetime) -> datetime:
+    # Snuba treats naive datetimes as UTC
+    return value if value.tzinfo is not None else value.replace(tzinfo=timezone.utc)
+
+
+def get_cache_ttls(referrer: str | None, request: Any, now: float) -> tuple[int, int]:
+    """
+    Returns for how many seconds the result of a query is fresh, and for how
+    many seconds after that it may still be served while it's refreshed.
+
+    Only results of queries whose range ended more than
+    `SENTRY_SNUBA_CACHE_SETTLED_SECONDS` ago are served stale, results of
+    other queries may change with every new event.
+    """
+    ttl = settings.SENTRY_SNUBA_CACHE_REFERRER_TTL_SECONDS.get(referrer)
+    end = get_query_end(request)
+    if end is None or end.timestamp() > now - settings.SENTRY_SNUBA_CACHE_SETTLED_SECONDS:
+        return ttl or settings.SENTRY_SNUBA_CACHE_TTL_SECONDS, 0
+    return (
+        ttl or settings.SENTRY_SNUBA_CACHE_HISTORICAL_TTL_SECONDS,
+        settings.SENTRY_SNUBA_CACHE_STALE_TTL_SECONDS,
+    )
+
+
+class SingleFlight:
+    """
+    Tracks the queries which are in flight in this process, so that identical
+    queries can wait for the result of the first one instead of running again.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._calls: dict[str, Future[Any]] = {}
+
+    def claim(self, key: str) -> tuple[Future[Any], bool]:
+        """
+        Returns the future of the call for `key`, and whether the caller is
+        the leader of the call. The leader must finish the call with either
+        `resolve` or `fail`.
+        """
+        with self._lock:
+            future = self._calls.get(key)
+            if future is not None:
+                return future, False
+            future = self._calls[key] = Future()
+            return future, True
+
+    def resolve(self, key: str, result: Any) -> None:
+        with self._lock:
+            future = self._calls.pop(key)
+        future.set_result(result)
+
+    def fail(self, key: str, exc: BaseException) -> None:
+        with self._lock:
+            future = self._calls.pop(key)
+        future.set_exception(exc)
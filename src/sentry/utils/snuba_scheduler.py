@@ -0,0 +1,171 @@
+"""
+Admission control for the Snuba queries of a process.
+
+Every query made through `sentry.utils.snuba` has to take a slot from the
+process wide `QueryScheduler` before it's sent. The number of slots adapts to
+how Snuba is doing: it slowly grows while queries are fast and shrinks when
+they get slow or Snuba starts rejecting them. Referrers can be limited to a
+number of slots so that e.g. a dashboard with many widgets can't take all of
+them, and waiting queries are admitted in order of their referrer's priority.
+"""
+
+from __future__ import annotations
+
+import bisect
+import itertools
+import threading
+from collections.abc import Generator, Mapping
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from time import monotonic
+
+from sentry.utils import metrics
+
+
+def _match(values: Mapping[str, int], referrer: str) -> str | None:
+    """
+    Returns the longest prefix of `referrer` in `values`.
+    """
+    return max((prefix for prefix in values if referrer.startswith(prefix)), key=len, default=None)
+
+
+@dataclass(order=True)
+class _Waiter:
+    # Waiters sort by descending priority, then by arrival
+    sort_key: tuple[int, int]
+    group: str = field(compare=False)
+    granted: threading.Event = field(compare=False, default_factory=threading.Event)
+
+
+class QueryScheduler:
+    """
+    Limits the number of concurrent queries, overall and per referrer.
+
+    The overall limit starts at `max_concurrency` and is adjusted after every
+    query: it grows by one slot per round of queries finishing within
+    `target_latency` seconds, shrinks by one slot per round of slower
+    queries, and is halved whenever Snuba rejects a query for being rate
+    limited. It never drops below `min_concurrency`.
+
+    Referrers are matched by prefix against `referrer_limits` and
+    `referrer_priorities`. All referrers matching the same prefix of
+    `referrer_limits` share its slots, any other referrer may take up to
+    `referrer_share` of the current overall limit by itself. Waiting queries
+    with a higher priority (default 0) are admitted first.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int,
+        min_concurrency: int = 1,
+        target_latency: float = 5.0,
+        referrer_limits: Mapping[str, int] | None = None,
+        referrer_priorities: Mapping[str, int] | None = None,
+        referrer_share: float = 1.0,
+    ) -> None:
+        assert 0 < min_concurrency <= max_concurrency
+        assert 0 < referrer_share <= 1
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = min_concurrency
+        self.target_latency = target_latency
+        self.referrer_limits = referrer_limits or {}
+        self.referrer_priorities = referrer_priorities or {}
+        self.referrer_share = referrer_share
+
+        self._lock = threading.Lock()
+        self._limit = float(max_concurrency)
+        self._running = 0
+        self._running_by_group: dict[str, int] = {}
+        self._waiters: list[_Waiter] = []
+        self._sequence = itertools.count()
+
+    @property
+    def limit(self) -> int:
+        return int(self._limit)
+
+    @contextmanager
+    def slot(self, referrer: str | None) -> Generator[None, None, None]:
+        """
+        Holds a slot while the block runs. The time spent in the block counts
+        as the latency of the query.
+        """
+        referrer = referrer or "unknown"
+        self.acquire(referrer)
+        start = monotonic()
+        try:
+            yield
+        finally:
+            self.release(referrer, monotonic() - start)
+
+    def acquire(self, referrer: str) -> float:
+        """
+        Blocks until the query may run and returns how long it waited.
+        """
+        start = monotonic()
+        priority_match = _match(self.referrer_priorities, referrer)
+        priority = self.referrer_priorities[priority_match] if priority_match is not None else 0
+        with self._lock:
+            waiter = _Waiter((-priority, next(self._sequence)), self._group(referrer))
+            bisect.insort(self._waiters, waiter)
+            self._dispatch()
+
+        waiter.granted.wait()
+        waited = monotonic() - start
+        metrics.timing("snuba.scheduler.queue_wait", waited, tags={"referrer": referrer})
+        return waited
+
+    def release(self, referrer: str, latency: float) -> None:
+        group = self._group(referrer)
+        with self._lock:
+            self._running -= 1
+            self._running_by_group[group] -= 1
+            if not self._running_by_group[group]:
+                del self._running_by_group[group]
+
+            # Additive increase and decrease by one slot per round of queries
+            if latency <= self.target_latency:
+                self._set_limit(self._limit + 1 / self._limit)
+            else:
+                self._set_limit(self._limit - 1 / self._limit)
+            self._dispatch()
+
+    def throttled(self) -> None:
+        """
+        Records that Snuba rejected a query because too many queries are
+        running, halving the overall limit.
+        """
+        metrics.incr("snuba.scheduler.throttled")
+        with self._lock:
+            self._set_limit(self._limit / 2)
+
+    def _set_limit(self, limit: float) -> None:
+        limit = min(max(limit, self.min_concurrency), self.max_concurrency)
+        if int(limit) != int(self._limit):
+            metrics.gauge("snuba.scheduler.limit", int(limit))
+        self._limit = limit
+
+    def _group(self, referrer: str) -> str:
+        return _match(self.referrer_limits, referrer) or referrer
+
+    def _group_limit(self, group: str) -> int:
+        limit = self.referrer_limits.get(group)
+        if limit is None:
+            limit = int(self._limit * self.referrer_share)
+        return max(limit, 1)
+
+    def _dispatch(self) -> None:
+        """
+        Admits waiting queries in order of priority, skipping the ones whose
+        referrer is at its limit.
+        """
+        index = 0
+        while index < len(self._waiters) and self._running < int(self._limit):
+            waiter = self._waiters[index]
+            running = self._running_by_group.get(waiter.group, 0)
+            if running >= self._group_limit(waiter.group):
+                index += 1
+                continue
+            del self._waiters[index]
+            self._running += 1
+            self._running_by_group[waiter.group] = running + 1
+            waiter.granted.set()
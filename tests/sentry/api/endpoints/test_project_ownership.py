@@ -287,6 +287,32 @@ class ProjectOwnershipEndpointTestCase(APITestCase):
             ],
         }
 
+    def test_get_deleted_owner_refreshes_compiled_rules(self):
+        self.member_user_delete = self.create_user("member_delete@localhost", is_superuser=False)
+        self.create_member(
+            user=self.member_user_delete,
+            organization=self.organization,
+            role="member",
+            teams=[self.team],
+        )
+        self.client.put(self.path, {"raw": "*.js member_delete@localhost"})
+        data = {"stacktrace": {"frames": [{"filename": "foo.js"}]}}
+        _, rules = ProjectOwnership.get_owners(self.project.id, data)
+        assert rules is not None and len(rules) == 1
+
+        with assume_test_silo_mode(SiloMode.CONTROL):
+            self.member_user_delete.delete()
+        last_updated = ProjectOwnership.objects.get(project_id=self.project.id).last_updated
+        self.client.get(self.path)
+
+        assert ProjectOwnership.objects.get(project_id=self.project.id).last_updated > last_updated
+        assert ProjectOwnership.get_owners(self.project.id, data) == ([], None)
+
+        # A refresh which doesn't change the schema doesn't save it
+        last_updated = ProjectOwnership.objects.get(project_id=self.project.id).last_updated
+        self.client.get(self.path)
+        assert ProjectOwnership.objects.get(project_id=self.project.id).last_updated == last_updated
+
     def test_get_no_rule_deleted_owner(self):
         self.member_user_delete = self.create_user("member_delete@localhost", is_superuser=False)
         self.create_member(
@@ -0,0 +1,117 @@
+import random
+from datetime import timedelta
+from unittest import mock
+
+import pytest
+from django.utils import timezone
+
+from sentry.buffer.aggregating import AggregatingBuffer
+from sentry.buffer.base import Buffer
+from sentry.models.group import Group
+from sentry.models.project import Project
+from sentry.testutils.cases import TestCase
+from sentry.utils.concurrent import PeriodicFlusher
+
+
+class RecordingBuffer(Buffer):
+    """
+    Combines increments the way `RedisBuffer` does in Redis, so the state
+    after a flush can be compared between wrapped and unwrapped buffers.
+    """
+
+    def __init__(self):
+        self.calls = 0
+        self.state = {}
+
+    def incr(self, model, columns, filters, extra=None, signal_only=None):
+        self.calls += 1
+        key = (model, tuple(sorted(filters.items())))
+        entry = self.state.setdefault(key, {"columns": {}, "extra": {}, "signal_only": None})
+        for column, amount in columns.items():
+            entry["columns"][column] = entry["columns"].get(column, 0) + amount
+        entry["extra"].update(extra or {})
+        if signal_only is True:
+            entry["signal_only"] = True
+
+
+def make_buffer(**options):
+    return AggregatingBuffer(
+        backend={"path": "tests.sentry.buffer.test_aggregating.RecordingBuffer"},
+        **{"flush_interval": 60, **options},
+    )
+
+
+@pytest.fixture(autouse=True)
+def no_flusher():
+    with mock.patch.object(PeriodicFlusher, "ensure_started"):
+        yield
+
+
+def test_equivalent_to_unwrapped_buffer():
+    rng = random.Random(1234)
+    now = timezone.now()
+    unwrapped = RecordingBuffer()
+    buf = make_buffer()
+
+    for i in range(2000):
+        filters = {"id": rng.randint(1, 20)}
+        columns = {"times_seen": rng.randint(1, 3)}
+        extra = {"last_seen": now + timedelta(seconds=i)} if rng.random() < 0.5 else None
+        signal_only = True if rng.random() < 0.05 else None
+        unwrapped.incr(Group, columns, filters, extra, signal_only)
+        buf.incr(Group, columns, filters, extra, signal_only)
+
+    buf.flush()
+
+    assert buf.backend.state == unwrapped.state
+    assert buf.backend.calls == 20
+    assert unwrapped.calls == 2000
+
+
+def test_flushes_when_max_keys_reached():
+    buf = make_buffer(max_keys=2)
+    buf.incr(Group, {"times_seen": 1}, {"id": 1})
+    buf.incr(Group, {"times_seen": 1}, {"id": 1})
+    assert buf.backend.calls == 0
+
+    buf.incr(Group, {"times_seen": 1}, {"id": 2})
+    assert buf.backend.calls == 2
+    assert buf.backend.state[(Group, (("id", 1),))]["columns"] == {"times_seen": 2}
+
+
+def test_flushes_when_window_elapsed():
+    buf = make_buffer(flush_interval=1)
+    with mock.patch("sentry.buffer.aggregating.monotonic", return_value=buf._window_start + 5):
+        buf.incr(Group, {"times_seen": 1}, {"id": 1})
+    assert buf.backend.calls == 1
+
+
+def test_get_includes_pending():
+    buf = make_buffer()
+    buf.incr(Group, {"times_seen": 3}, {"id": 1})
+    assert buf.get(Group, ["times_seen"], {"id": 1}) == {"times_seen": 3}
+    assert buf.get(Group, ["times_seen"], {"id": 2}) == {"times_seen": 0}
+
+
+def test_unhashable_filters_pass_through():
+    buf = make_buffer()
+    buf.incr(Group, {"times_seen": 1}, {"id": [1]})
+    assert buf.backend.calls == 1
+
+
+class AggregatingBufferProcessTest(TestCase):
+    def test_flush_updates_rows(self):
+        buf = AggregatingBuffer(
+            backend={"path": "sentry.buffer.inprocess.InProcessBuffer"}, flush_interval=60
+        )
+        group = Group.objects.create(project=Project(id=1))
+        the_date = timezone.now() + timedelta(days=5)
+
+        for _ in range(5):
+            buf.incr(Group, {"times_seen": 1}, {"id": group.id}, {"last_seen": the_date})
+        assert Group.objects.get(id=group.id).times_seen == group.times_seen
+
+        buf.flush()
+        group_ = Group.objects.get(id=group.id)
+        assert group_.times_seen == group.times_seen + 5
+        assert group_.last_seen == the_date
@@ -75,3 +75,46 @@ class BufferTest(TestCase):
         self.buf.process(Group, columns, filters, {"last_seen": the_date}, signal_only=True)
         group.refresh_from_db()
         assert group.times_seen == prev_times_seen
+
+    def test_process_batch(self):
+        group = Group.objects.create(project=Project(id=1))
+        other_group = Group.objects.create(project=Project(id=1))
+        the_date = timezone.now() + timedelta(days=5)
+        filters = {"project_id": self.project.id, "release_id": self.release.id}
+
+        self.buf.process_batch(
+            [
+                (Group, {"times_seen": 2}, {"id": group.id}, {"last_seen": the_date}, None),
+                (Group, {"times_seen": 3}, {"id": other_group.id}, {"last_seen": the_date}, None),
+                (Group, {"times_seen": 1}, {"id": 0}, {"last_seen": the_date}, None),
+                (ReleaseProject, {"new_groups": 1}, filters, {}, None),
+            ]
+        )
+
+        group_ = Group.objects.get(id=group.id)
+        assert group_.times_seen == group.times_seen + 2
+        assert group_.last_seen == the_date
+        assert Group.objects.get(id=other_group.id).times_seen == other_group.times_seen + 3
+        # Rows which don't exist yet are created through `process`
+        assert ReleaseProject.objects.filter(new_groups=1, **filters).exists()
+
+    @mock.patch("sentry.buffer.base.bulk_increment", side_effect=Exception("boom"))
+    def test_process_batch_failed_statement(self, bulk_increment):
+        group = Group.objects.create(project=Project(id=1))
+        entry = (Group, {"times_seen": 2}, {"id": group.id}, {}, None)
+
+        assert self.buf.process_batch([entry]) == []
+        # The rows of the failed statement are applied one by one
+        assert Group.objects.get(id=group.id).times_seen == group.times_seen + 2
+
+        with mock.patch("sentry.buffer.base.Buffer.process", side_effect=Exception("boom")):
+            assert self.buf.process_batch([entry]) == [entry]
+
+    @mock.patch("sentry.buffer.base.bulk_increment")
+    def test_process_batch_signal_only(self, bulk_increment):
+        group = Group.objects.create(project=Project(id=1))
+        prev_times_seen = group.times_seen
+        self.buf.process_batch([(Group, {"times_seen": 1}, {"id": group.id}, {}, True)])
+        group.refresh_from_db()
+        assert group.times_seen == prev_times_seen
+        assert not bulk_increment.called
@@ -6,7 +6,7 @@ import pytest
 from django.utils import timezone
 
 from sentry import options
-from sentry.buffer.redis import RedisBuffer
+from sentry.buffer.redis import RedisBuffer, dump_msgpack_value, load_msgpack_value
 from sentry.models.group import Group
 from sentry.models.project import Project
 from sentry.testutils.helpers.datetime import freeze_time
@@ -261,6 +261,101 @@ class TestRedisBuffer:
         self.buf.process("foo")
         process.assert_called_once_with(mock.Mock, {"times_seen": 1}, {"pk": 1}, {}, True)
 
+    @mock.patch("sentry.buffer.redis.process_incr")
+    def test_process_pending_bulk_flush_batches(self, process_incr):
+        self.buf.bulk_flush_batch_size = 100
+        client = self.buf.get_routing_client()
+        client.zadd("b:p", {"foo": 1, "bar": 2, "baz": 3})
+        self.buf.process_pending()
+        assert len(process_incr.apply_async.mock_calls) == 1
+        process_incr.apply_async.assert_any_call(kwargs={"batch_keys": ["foo", "bar", "baz"]})
+
+    @mock.patch("sentry.buffer.base.Buffer.process_batch", return_value=[])
+    def test_process_bulk_flush(self, process_batch):
+        self.buf.bulk_flush_batch_size = 100
+        client = self.buf.get_routing_client()
+        client.hmset(
+            "foo",
+            {"f": '{"pk": ["i","1"]}', "i+times_seen": "2", "m": "sentry.models.Group"},
+        )
+        client.hmset(
+            "bar",
+            {
+                "e+foo": '["s","bar"]',
+                "f": '{"pk": ["i","2"]}',
+                "i+times_seen": "1",
+                "m": "sentry.models.Group",
+            },
+        )
+
+        self.buf.process(batch_keys=["foo", "bar", "baz"])
+
+        (entries,) = process_batch.call_args[0]
+        assert sorted(entries, key=lambda entry: entry[2]["pk"]) == [
+            (Group, {"times_seen": 2}, {"pk": 1}, {}, None),
+            (Group, {"times_seen": 1}, {"pk": 2}, {"foo": "bar"}, None),
+        ]
+        assert client.hgetall("foo") == {}
+        assert client.hgetall("bar") == {}
+        assert not client.exists("l:foo")
+
+    def test_process_bulk_flush_requeues_failed_entries(self):
+        self.buf.bulk_flush_batch_size = 100
+        client = self.buf.get_routing_client()
+        client.hmset(
+            "foo",
+            {"f": '{"pk": ["i","1"]}', "i+times_seen": "2", "m": "sentry.models.Group"},
+        )
+        entry = (Group, {"times_seen": 2}, {"pk": 1}, {}, None)
+
+        with mock.patch("sentry.buffer.base.Buffer.process_batch", return_value=[entry]):
+            with mock.patch.object(self.buf, "incr") as incr:
+                self.buf.process(batch_keys=["foo"])
+
+        incr.assert_called_once_with(*entry)
+        assert not client.exists("l:foo")
+
+    @django_db_all
+    @freeze_time()
+    def test_bulk_flush_updates_groups(self, default_group, task_runner):
+        self.buf.bulk_flush_batch_size = 100
+        orig_times_seen = Group.objects.get_from_cache(id=default_group.id).times_seen
+        now = timezone.now()
+        self.buf.incr(Group, {"times_seen": 2}, {"id": default_group.id}, {"last_seen": now})
+        self.buf.incr(Group, {"times_seen": 3}, {"id": default_group.id}, {"last_seen": now})
+        with task_runner(), mock.patch("sentry.buffer", self.buf):
+            self.buf.process_pending()
+        group = Group.objects.get_from_cache(id=default_group.id)
+        assert group.times_seen == orig_times_seen + 5
+        assert group.last_seen == now
+
+    @mock.patch("sentry.buffer.redis.RedisBuffer._make_key", mock.Mock(return_value="foo"))
+    @mock.patch("sentry.buffer.base.Buffer.process")
+    def test_msgpack_codec_roundtrip(self, process):
+        buf = RedisBuffer(value_codec="msgpack")
+        now = datetime.datetime(2017, 5, 3, 6, 6, 6, 123456, tzinfo=datetime.UTC)
+        buf.incr(Group, {"times_seen": 1}, {"pk": 1}, {"last_seen": now, "message": "hi"})
+
+        result = {
+            k.decode() if isinstance(k, bytes) else k: v
+            for k, v in buf.get_routing_client().hgetall("foo").items()
+        }
+        assert result["f"] == dump_msgpack_value({"pk": 1})
+        assert result["e+last_seen"] == dump_msgpack_value(now)
+
+        buf.process("foo")
+        process.assert_called_once_with(
+            Group, {"times_seen": 1}, {"pk": 1}, {"last_seen": now, "message": "hi"}, None
+        )
+
+    @mock.patch("sentry.buffer.redis.RedisBuffer._make_key", mock.Mock(return_value="foo"))
+    @mock.patch("sentry.buffer.base.Buffer.process")
+    def test_msgpack_codec_reads_legacy_values(self, process):
+        # values written with the json codec are still flushed after switching
+        self.buf.incr(Group, {"times_seen": 2}, {"pk": 1}, {"foo": "bar"})
+        RedisBuffer(value_codec="msgpack").process("foo")
+        process.assert_called_once_with(Group, {"times_seen": 2}, {"pk": 1}, {"foo": "bar"}, None)
+
 
 #    @mock.patch("sentry.buffer.redis.RedisBuffer._make_key", mock.Mock(return_value="foo"))
 #    def test_incr_uses_signal_only(self):
@@ -293,3 +388,22 @@ class TestRedisBuffer:
 )
 def test_dump_value(value):
     assert RedisBuffer._load_value(json.loads(json.dumps(RedisBuffer._dump_value(value)))) == value
+
+
+@pytest.mark.parametrize(
+    "value",
+    [
+        datetime.datetime.today().replace(tzinfo=datetime.UTC),
+        timezone.now(),
+        datetime.date.today(),
+        {"pk": 1, "name": "\u201d", "ratio": 0.5, "nested": {"a": [1, 2]}},
+    ],
+)
+def test_dump_msgpack_value(value):
+    encoded = dump_msgpack_value(value)
+    assert encoded[:2] == b"\x00\x01"
+    assert load_msgpack_value(encoded) == value
+
+
+def test_dump_msgpack_value_model():
+    assert load_msgpack_value(dump_msgpack_value({"project": Project(id=1)})) == {"project": 1}
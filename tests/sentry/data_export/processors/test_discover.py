@@ -109,3 +109,5 @@ class DiscoverIssuesProcessorTest(TestCase, PerformanceIssueTestCase):
         result = processor.data_fn(0, 1)
         assert len(result["data"]) == 1
         assert result["data"][0]["title"] == "N+1 Query"
+        # Only discover queries are streamed
+        assert processor.stream_fn is None
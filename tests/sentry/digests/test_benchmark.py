@@ -0,0 +1,66 @@
+import pytest
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test.utils import CaptureQueriesContext
+
+from sentry.digests import Record
+from sentry.digests.codecs import CompressedPickleCodec
+from sentry.digests.notifications import build_digest, event_to_record
+from sentry.digests.utils import get_participants_by_event, get_personalized_digests, sort_records
+from sentry.notifications.types import FallthroughChoiceType
+from sentry.testutils.helpers.datetime import before_now, iso_format
+from sentry.testutils.pytest.fixtures import django_db_all
+from sentry.testutils.skips import requires_snuba
+
+pytestmark = [requires_snuba]
+
+
+def benchmark_available() -> bool:
+    try:
+        __import__("pytest_benchmark")
+    except ModuleNotFoundError:
+        return False
+    else:
+        return True
+
+
+@pytest.mark.skipif(not benchmark_available(), reason="requires pytest-benchmark")
+@pytest.mark.parametrize("size", [10, 100])
+@django_db_all
+def test_benchmark_digest(factories, default_project, benchmark, size):
+    rule = factories.create_project_rule(project=default_project)
+    timestamp = iso_format(before_now(minutes=1))
+    records = sort_records(
+        [
+            event_to_record(
+                factories.store_event(
+                    data={"fingerprint": [f"group-{index}"], "timestamp": timestamp},
+                    project_id=default_project.id,
+                ),
+                (rule,),
+            )
+            for index in range(size)
+        ]
+    )
+    codec = CompressedPickleCodec()
+    payloads = [(record.key, codec.encode(record.value), record.timestamp) for record in records]
+
+    def deliver():
+        # Records are read from the backend as pickles for every delivery
+        records = [
+            Record(key, codec.decode(value), timestamp) for key, value, timestamp in payloads
+        ]
+        digest, _ = build_digest(default_project, records)
+        participants_by_provider_by_event = get_participants_by_event(
+            digest,
+            default_project,
+            fallthrough_choice=FallthroughChoiceType.ACTIVE_MEMBERS,
+        )
+        get_personalized_digests(digest, participants_by_provider_by_event)
+        return digest
+
+    with CaptureQueriesContext(connections[DEFAULT_DB_ALIAS]) as queries:
+        deliver()
+    benchmark.extra_info["queries"] = len(queries.captured_queries)
+
+    digest = benchmark(deliver)
+    assert len(digest[rule]) == size
@@ -6,6 +6,7 @@ from collections.abc import Mapping, MutableMapping, MutableSequence
 from functools import cached_property, reduce
 
 from sentry.digests import Record
+from sentry.digests.codecs import CompressedPickleCodec
 from sentry.digests.notifications import (
     Notification,
     event_to_record,
@@ -71,6 +72,21 @@ class RewriteRecordTestCase(TestCase):
             self.record.timestamp,
         )
 
+    def test_attaches_project(self):
+        codec = CompressedPickleCodec()
+        record = self.record._replace(value=codec.decode(codec.encode(self.record.value)))
+        project = self.event.project
+
+        rewritten = rewrite_record(
+            record,
+            project=project,
+            groups={self.event.group.id: self.event.group},
+            rules={self.rule.id: self.rule},
+        )
+        assert rewritten is not None
+        with self.assertNumQueries(0):
+            assert rewritten.value.event.project is project
+
 
 @region_silo_test
 class GroupRecordsTestCase(TestCase):
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 from collections.abc import Iterable, Mapping, Sequence
+from unittest import mock
 
 from sentry.digests import Digest
 from sentry.digests.notifications import build_digest, event_to_record
@@ -14,6 +15,7 @@ from sentry.eventstore.models import Event
 from sentry.models.project import Project
 from sentry.models.projectownership import ProjectOwnership
 from sentry.notifications.types import ActionTargetType, FallthroughChoiceType
+from sentry.notifications.utils.participants import _get_recipients_by_provider
 from sentry.ownership.grammar import Matcher, Owner, Rule, dump_schema
 from sentry.services.hybrid_cloud.actor import ActorType
 from sentry.testutils.cases import SnubaTestCase, TestCase
@@ -274,5 +276,29 @@ class GetPersonalizedDigestsTestCase(TestCase, SnubaTestCase):
         with self.feature("organizations:notification-all-recipients"):
             assert_get_personalized_digests(self.project, digest, expected_result)
 
+    def test_recipients_resolved_once_per_owners(self):
+        rule = self.project.rule_set.all()[0]
+        events = self.create_events_from_filenames(
+            self.project, ["hello.moz", "goodbye.moz", "hola.moz", "adios.moz"]
+        )
+        records = [
+            event_to_record(event, (rule,))
+            for event in events + self.team1_events + self.team2_events
+        ]
+        digest = build_digest(self.project, sort_records(records))[0]
+        assert digest is not None
+
+        with mock.patch(
+            "sentry.notifications.utils.participants._get_recipients_by_provider",
+            wraps=_get_recipients_by_provider,
+        ) as get_recipients_by_provider:
+            participants_by_provider_by_event = get_participants_by_event(
+                digest, self.project, fallthrough_choice=FallthroughChoiceType.ACTIVE_MEMBERS
+            )
+
+        # Everyone, team1 and team2 each own several events
+        assert len(participants_by_provider_by_event) == 12
+        assert get_recipients_by_provider.call_count == 3
+
     def test_empty_records(self):
         assert build_digest(self.project, []) == (None, [])
@@ -197,3 +197,20 @@ class MultiRedisTest(TestCase):
         # delete from both, as reads cascade between new and old
         adapter.delete(event)
         assert not adapter.get(key)
+
+    @override_options({"redis.clusters": cluster_config, "eventstore.processing.rollout": 1.0})
+    def test_store_raw(self):
+        adapter = MultiRedisProcessingStore(
+            **{
+                "old_cluster": "old",
+                "new_cluster": "new",
+            }
+        )
+        event = make_event()
+        payload = json.dumps(event).encode("utf-8")
+        key = adapter.store_raw(event["event_id"], event["project"], payload)
+        assert key == cache_key_for_event(event)
+        assert adapter.get(key) == event
+
+        new_cluster = redis_clusters.get("new")
+        assert new_cluster.get(key) == payload.decode("utf-8")
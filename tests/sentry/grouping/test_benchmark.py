@@ -1,7 +1,11 @@
+from copy import deepcopy
+
 import pytest
 
-from sentry.grouping.api import get_default_grouping_config_dict
+from sentry.grouping.api import get_default_enhancements, get_default_grouping_config_dict
+from sentry.grouping.enhancer import Enhancements
 from sentry.grouping.strategies.configurations import CONFIGURATIONS
+from sentry.testutils.pytest.fixtures import django_db_all
 from tests.sentry.grouping import grouping_input as grouping_inputs
 
 CONFIGS = {key: get_default_grouping_config_dict(key) for key in sorted(CONFIGURATIONS.keys())}
@@ -37,3 +41,39 @@ def run_configuration(grouping_input, config):
     event.project = None
 
     event.get_hashes()
+
+
+def make_stacktraces(count):
+    # Stack traces which differ in their top frames but share their library
+    # frames, which defeats the stack trace level cache.
+    library_frames = [
+        {"function": "start_thread", "package": "/usr/lib/libpthread.so"},
+        {"function": "std::rt::lang_start", "package": "/usr/lib/libstd.so"},
+        {"function": "tokio::runtime::Runtime::block_on", "package": "/usr/lib/libtokio.so"},
+        {"function": "hyper::server::Server::serve", "package": "/usr/lib/libhyper.so"},
+    ] * 5
+    return [
+        library_frames
+        + [
+            {"function": f"app::handlers::handler_{i % 50}", "package": "/srv/app"},
+            {"function": f"app::db::query_{i}", "package": "/srv/app"},
+        ]
+        for i in range(count)
+    ]
+
+
+@pytest.mark.skipif(not benchmark_available(), reason="requires pytest-benchmark")
+@pytest.mark.parametrize("frame_cache", [False, True], ids=["no_frame_cache", "frame_cache"])
+@django_db_all
+def test_benchmark_apply_modifications(frame_cache, benchmark):
+    enhancements = Enhancements.loads(get_default_enhancements())
+    if not frame_cache:
+        enhancements._modifier_rule_runs = [(False, enhancements._modifier_rules)]
+    stacktraces = iter(make_stacktraces(100_000))
+
+    def setup():
+        return (deepcopy(next(stacktraces)), "native", {}), {}
+
+    benchmark.pedantic(
+        enhancements.apply_modifications_to_frame, setup=setup, rounds=1000, warmup_rounds=100
+    )
@@ -1,13 +1,16 @@
 from __future__ import annotations
 
+from copy import deepcopy
 from typing import Any
+from unittest import mock
 
 import pytest
 
 from sentry.grouping.component import GroupingComponent
-from sentry.grouping.enhancer import Enhancements
+from sentry.grouping.enhancer import FRAME_CACHE, Enhancements, _apply_modifier_rules
 from sentry.grouping.enhancer.exceptions import InvalidEnhancerConfig
 from sentry.grouping.enhancer.matchers import create_match_frame
+from sentry.stacktraces.functions import set_in_app
 from sentry.testutils.helpers.options import override_options
 from sentry.testutils.pytest.fixtures import django_db_all
 
@@ -502,3 +505,66 @@ def test_app_no_matches(frame):
     enhancements = Enhancements.from_config_string("app:no +app")
     enhancements.apply_modifications_to_frame([frame], "native", None)
     assert frame.get("in_app")
+
+
+FRAME_CACHE_CONFIG = """
+family:native function:std::panicking::begin_panic ^-app -app
+function:start_thread -app
+module:app.* +app
+category:internal -app
+path:**/vendor/** category=vendor
+category:vendor -app
+[ category:vendor ] | function:callback category=internal
+type:KeyError module:app.db.* category=db
+function:*handler* +app
+"""
+
+
+def apply_uncached(enhancements, frames, platform, exception_data):
+    match_frames = [create_match_frame(frame, platform) for frame in frames]
+    _apply_modifier_rules(enhancements._modifier_rules, frames, match_frames, exception_data, {})
+    for frame, match_frame in zip(frames, match_frames):
+        if match_frame["in_app"] is not None:
+            set_in_app(frame, match_frame["in_app"])
+
+
+@pytest.mark.parametrize(
+    "exception_data", [{"type": "KeyError"}, {"type": "ValueError"}, None], ids=str
+)
+@django_db_all
+def test_frame_cache_matches_uncached(exception_data):
+    enhancements = Enhancements.from_config_string(FRAME_CACHE_CONFIG)
+    # the frame-local rules are split around the caller rule
+    assert [is_local for is_local, _ in enhancements._modifier_rule_runs] == [
+        False,
+        True,
+        False,
+        True,
+    ]
+
+    stacktraces = [
+        [
+            {"function": "start_thread"},
+            {"module": "app.db.models", "function": "query"},
+            {"abs_path": "/srv/vendor/lib.py", "function": "call"},
+            {"function": "callback"},
+            {"function": f"request_handler_{i}", "in_app": False},
+        ][: 3 + i % 3]
+        for i in range(6)
+    ]
+
+    FRAME_CACHE.clear()
+    with mock.patch("sentry.grouping.enhancer.metrics") as mock_metrics:
+        for frames in stacktraces:
+            expected = deepcopy(frames)
+            apply_uncached(enhancements, expected, "python", exception_data)
+            enhancements.apply_modifications_to_frame(frames, "python", exception_data)
+            assert frames == expected
+
+    hits = sum(
+        call.kwargs["amount"]
+        for call in mock_metrics.incr.call_args_list
+        if call.args == ("save_event.stacktrace.frame_cache",)
+        and call.kwargs["tags"]["result"] == "hit"
+    )
+    assert hits > 0
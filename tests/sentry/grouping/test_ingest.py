@@ -8,8 +8,10 @@ from sentry.grouping.ingest import (
     _calculate_background_grouping,
     _calculate_event_grouping,
     _calculate_secondary_hash,
+    get_or_create_grouphashes,
 )
 from sentry.models.group import Group
+from sentry.models.grouphash import GroupHash
 from sentry.testutils.cases import TestCase
 from sentry.testutils.silo import region_silo_test
 from sentry.testutils.skips import requires_snuba
@@ -168,3 +170,26 @@ class SecondaryGroupingTest(TestCase):
             mock_capture_exception.assert_called_with(secondary_grouping_error)
             # This proves the secondary grouping crash didn't crash the overall grouping process
             assert event.group
+
+
+@region_silo_test
+class GroupHashResolutionTest(TestCase):
+    def test_get_or_create_grouphashes(self) -> None:
+        existing = GroupHash.objects.create(project=self.project, hash="a" * 32)
+
+        grouphashes = get_or_create_grouphashes(self.project, ["b" * 32, "a" * 32])
+
+        assert [grouphash.hash for grouphash in grouphashes] == ["b" * 32, "a" * 32]
+        assert grouphashes[1] == existing
+        assert GroupHash.objects.filter(project=self.project, hash="b" * 32).exists()
+
+    def test_get_or_create_grouphashes_queries(self) -> None:
+        GroupHash.objects.create(project=self.project, hash="a" * 32)
+
+        # A single hash is looked up by `get_or_create` alone
+        with self.assertNumQueries(1):
+            get_or_create_grouphashes(self.project, ["a" * 32])
+
+        # The new hash is inserted (in a savepoint) without looking it up again
+        with self.assertNumQueries(4):
+            get_or_create_grouphashes(self.project, ["a" * 32, "b" * 32])
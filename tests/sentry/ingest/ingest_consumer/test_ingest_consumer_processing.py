@@ -17,9 +17,11 @@ from django.conf import settings
 
 from sentry import eventstore
 from sentry.event_manager import EventManager
+from sentry.eventstore.processing import event_processing_store
 from sentry.ingest.consumer.processors import (
     process_attachment_chunk,
     process_event,
+    process_event_batch,
     process_individual_attachment,
     process_userreport,
 )
@@ -27,6 +29,7 @@ from sentry.models.debugfile import create_files_from_dif_zip
 from sentry.models.eventattachment import EventAttachment
 from sentry.models.userreport import UserReport
 from sentry.options import set
+from sentry.testutils.helpers.options import override_options
 from sentry.testutils.pytest.fixtures import django_db_all
 from sentry.testutils.skips import requires_snuba
 from sentry.usage_accountant import accountant
@@ -107,6 +110,46 @@ def test_deduplication_works(default_project, task_runner, preprocess_event):
     }
 
 
+@django_db_all
+def test_process_event_batch(default_project, task_runner, preprocess_event, monkeypatch):
+    project_id = default_project.id
+    start_time = time.time() - 3600
+    payloads = [
+        get_normalized_event({"message": f"hello world {i}"}, default_project) for i in range(3)
+    ]
+    messages = [
+        {
+            "payload": json.dumps(payload),
+            "start_time": start_time,
+            "event_id": payload["event_id"],
+            "project_id": project_id,
+            "remote_addr": "127.0.0.1",
+        }
+        for payload in payloads
+    ]
+
+    # The first event was processed before, the last one is in the batch twice
+    process_event(messages[0], project=default_project)
+    del preprocess_event[:]
+
+    store_many = Mock(wraps=event_processing_store.store_many)
+    monkeypatch.setattr(event_processing_store, "store_many", store_many)
+    process_event_batch([(message, default_project) for message in messages + messages[-1:]])
+
+    assert store_many.call_count == 1
+    assert [kwargs["event_id"] for kwargs in preprocess_event] == [
+        payload["event_id"] for payload in payloads[1:]
+    ]
+    for kwargs, payload in zip(preprocess_event, payloads[1:]):
+        assert kwargs["cache_key"] == f"e:{payload['event_id']}:{project_id}"
+        assert kwargs["data"] == payload
+        assert event_processing_store.get(kwargs["cache_key"]) == payload
+
+    # All events of the batch are deduplicated afterwards
+    process_event_batch([(message, default_project) for message in messages])
+    assert len(preprocess_event) == 2
+
+
 @django_db_all
 def test_transactions_spawn_save_event_transaction(
     default_project,
@@ -156,6 +199,51 @@ def test_transactions_spawn_save_event_transaction(
     )
 
 
+@django_db_all
+@pytest.mark.parametrize("event_type", ["transaction", "error"])
+def test_raw_payloads(
+    default_project, task_runner, preprocess_event, save_event_transaction, event_type
+):
+    now = datetime.datetime.now()
+    event: dict[str, Any] = {"type": event_type, "timestamp": now.isoformat()}
+    if event_type == "transaction":
+        event.update(
+            start_timestamp=now.isoformat(),
+            spans=[],
+            contexts={
+                "trace": {
+                    "trace_id": "a7d67cf796774551a95be6543cacd459",
+                    "span_id": "babaae0d4b7512d9",
+                }
+            },
+        )
+    payload = get_normalized_event(event, default_project)
+    event_id = payload["event_id"]
+    project_id = default_project.id
+
+    with override_options({"store.ingest-consumer-raw-payload-rate": 1.0}):
+        process_event(
+            {
+                "payload": json.dumps(payload).encode("utf-8"),
+                "start_time": time.time() - 3600,
+                "event_id": event_id,
+                "project_id": project_id,
+                "remote_addr": "127.0.0.1",
+            },
+            project=default_project,
+        )
+
+    cache_key = f"e:{event_id}:{project_id}"
+    assert event_processing_store.get(cache_key) == payload
+    if event_type == "transaction":
+        assert save_event_transaction.delay.call_args[1]["cache_key"] == cache_key
+        assert not preprocess_event
+    else:
+        (kwargs,) = preprocess_event
+        assert kwargs["cache_key"] == cache_key
+        assert kwargs["data"] == payload
+
+
 @django_db_all
 def test_accountant_transaction(default_project):
     storage: MemoryMessageStorage[KafkaPayload] = MemoryMessageStorage()
@@ -0,0 +1,37 @@
+import pytest
+
+from sentry.ingest.consumer.payload import LazyPayload, scan_header
+from sentry.utils import json
+
+
+@pytest.mark.parametrize(
+    "payload,expected",
+    [
+        (b'{"event_id":"abc","type":"transaction","spans":[]}', {"type": "transaction"}),
+        (b' { "type" : "error" , "level" : "info" } ', {"type": "error"}),
+        # Only top-level fields count
+        (b'{"contexts":{"trace":{"type":"trace"}},"breadcrumbs":[{"type":"transaction"}]}', {}),
+        (b'{"message":"\\"type\\":\\"transaction\\"","type":null}', {}),
+        (b'["type","transaction"]', {}),
+        (b"", {}),
+    ],
+)
+def test_scan_header(payload, expected):
+    assert scan_header(payload, ("type",)) == expected
+
+
+def test_scan_header_limit():
+    payload = json.dumps({"message": "x" * 100, "type": "transaction"}).encode("utf-8")
+    assert scan_header(payload, ("type",)) == {"type": "transaction"}
+    assert scan_header(payload, ("type",), limit=50) == {}
+
+
+def test_lazy_payload():
+    data = {"type": "transaction", "transaction": "/"}
+    payload = LazyPayload(json.dumps(data), {"type": "transaction"})
+
+    assert payload.get("type") == "transaction"
+    assert payload._data is None
+
+    assert payload["transaction"] == "/"
+    assert dict(payload) == data
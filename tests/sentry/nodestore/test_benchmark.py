@@ -0,0 +1,138 @@
+import os
+import random
+from glob import glob
+
+import pytest
+from django.test import override_settings
+
+from sentry.nodestore.compression import save_dictionary, train_dictionary
+from sentry.nodestore.filesystem.backend import FileSystemNodeStorage
+from sentry.testutils.factories import get_fixture_path
+from sentry.utils import json
+
+
+def benchmark_available() -> bool:
+    try:
+        __import__("pytest_benchmark")
+    except ModuleNotFoundError:
+        return False
+    else:
+        return True
+
+
+NODE_COUNT = 2000
+BATCH_SIZE = 100
+
+
+def node_id(i):
+    return f"{i:032x}"
+
+
+@pytest.fixture
+def nodestore(tmp_path, request):
+    options = {"max_items": 1000, "max_bytes": 16 * 1024 * 1024} if request.param else {}
+    with override_settings(DEBUG=True, SENTRY_NODESTORE_LOCAL_CACHE_OPTIONS=options):
+        ns = FileSystemNodeStorage(path=str(tmp_path))
+        ns.local_cache
+    ns.bootstrap()
+    event = {
+        "platform": "python",
+        "exception": {"values": [{"type": "ValueError", "stacktrace": {"frames": [{}] * 20}}]},
+    }
+    for i in range(NODE_COUNT):
+        ns.set(node_id(i), {**event, "event_id": node_id(i)})
+    return ns
+
+
+def id_batches(count):
+    # Issue streams show recent events of hot groups far more often than the
+    # long tail, roughly following a power law.
+    rng = random.Random(42)
+    for _ in range(count):
+        yield [
+            node_id(min(int(rng.paretovariate(1.2)) - 1, NODE_COUNT - 1)) for _ in range(BATCH_SIZE)
+        ]
+
+
+@pytest.mark.skipif(not benchmark_available(), reason="requires pytest-benchmark")
+@pytest.mark.parametrize(
+    "nodestore", [False, True], ids=["no_local_cache", "local_cache"], indirect=True
+)
+def test_benchmark_get_multi(nodestore, benchmark):
+    batches = iter(id_batches(10_000))
+
+    def setup():
+        return (next(batches),), {}
+
+    benchmark.pedantic(nodestore.get_multi, setup=setup, rounds=500)
+
+
+def fixture_events():
+    events = []
+    for filename in sorted(
+        glob(os.path.join(get_fixture_path("events"), "**/*.json"), recursive=True)
+    ):
+        with open(filename) as f:
+            event = json.load(f)
+        if isinstance(event, dict):
+            events.append({**event, "platform": event.get("platform") or "other"})
+    return events
+
+
+@pytest.fixture
+def compression_nodestore(tmp_path, request):
+    # Dictionaries are trained on every other fixture event so that the
+    # reported ratio is measured on payloads the dictionary has not seen.
+    events = fixture_events()
+    training, payloads = events[::2], events[1::2]
+    dictionaries = str(tmp_path / "dictionaries") if request.param else None
+
+    with override_settings(DEBUG=True, SENTRY_NODESTORE_COMPRESSION_DICTIONARIES=dictionaries):
+        ns = FileSystemNodeStorage(path=str(tmp_path / "nodes"))
+        if dictionaries is not None:
+            os.mkdir(dictionaries)
+            dictionary = train_dictionary(
+                [encode_plain(ns, event) for event in training], dict_size=32 * 1024
+            )
+            for platform in {event["platform"] for event in events}:
+                save_dictionary(dictionaries, platform, 1, dictionary)
+        yield ns, payloads
+
+
+def encode_plain(ns, payload):
+    return b"\n".join(ns._encode_lines({None: payload}))
+
+
+def encode_all(ns, payloads):
+    return [ns._encode({None: payload}) for payload in payloads]
+
+
+def decode_all(ns, encoded):
+    return [ns._decode(value, subkey=None) for value in encoded]
+
+
+@pytest.mark.skipif(not benchmark_available(), reason="requires pytest-benchmark")
+@pytest.mark.parametrize(
+    "compression_nodestore", [False, True], ids=["plain", "dictionary"], indirect=True
+)
+def test_benchmark_encode(compression_nodestore, benchmark):
+    ns, payloads = compression_nodestore
+    encoded = encode_all(ns, payloads)
+    raw_size = sum(len(encode_plain(ns, payload)) for payload in payloads)
+    benchmark.extra_info["compression_ratio"] = raw_size / sum(map(len, encoded))
+    benchmark.extra_info["bytes"] = raw_size
+
+    benchmark(encode_all, ns, payloads)
+
+
+@pytest.mark.skipif(not benchmark_available(), reason="requires pytest-benchmark")
+@pytest.mark.parametrize(
+    "compression_nodestore", [False, True], ids=["plain", "dictionary"], indirect=True
+)
+def test_benchmark_decode(compression_nodestore, benchmark):
+    ns, payloads = compression_nodestore
+    encoded = encode_all(ns, payloads)
+    benchmark.extra_info["bytes"] = sum(map(len, encoded))
+
+    assert decode_all(ns, encoded) == payloads
+    benchmark(decode_all, ns, encoded)
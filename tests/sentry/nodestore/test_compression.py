@@ -0,0 +1,128 @@
+import pytest
+from django.test import override_settings
+
+from sentry.nodestore.base import json_dumps
+from sentry.nodestore.compression import (
+    ZSTD_MAGIC,
+    DictionaryRegistry,
+    UnknownDictionary,
+    save_dictionary,
+    train_dictionary,
+)
+from sentry.nodestore.filesystem.backend import FileSystemNodeStorage
+
+
+def make_event(platform, i):
+    return {
+        "event_id": f"{i:032x}",
+        "platform": platform,
+        "sdk": {"name": f"sentry.{platform}", "version": "1.0.0"},
+        "contexts": {"runtime": {"name": platform, "version": f"3.{i % 10}"}},
+        "exception": {
+            "values": [
+                {
+                    "type": "ValueError",
+                    "value": f"invalid value {i}",
+                    "stacktrace": {
+                        "frames": [
+                            {"filename": f"app/module_{j}.py", "function": f"handler_{j}"}
+                            for j in range(i % 7, i % 7 + 5)
+                        ]
+                    },
+                }
+            ]
+        },
+    }
+
+
+def train(platform, dict_size=4096):
+    samples = [json_dumps(make_event(platform, i)).encode("utf8") for i in range(500)]
+    return train_dictionary(samples, dict_size=dict_size)
+
+
+@pytest.fixture(scope="module")
+def python_dictionary():
+    return train("python")
+
+
+def test_roundtrip(python_dictionary):
+    registry = DictionaryRegistry([("python", 1, python_dictionary)])
+    payload = json_dumps(make_event("python", 1000)).encode("utf8")
+
+    compressed = registry.compress(payload, "python")
+    assert compressed.startswith(ZSTD_MAGIC)
+    assert len(compressed) < len(payload)
+    assert registry.decompress(compressed) == payload
+
+
+def test_platform_without_dictionary(python_dictionary):
+    registry = DictionaryRegistry([("python", 1, python_dictionary)])
+    payload = json_dumps(make_event("javascript", 1)).encode("utf8")
+
+    assert registry.compress(payload, "javascript") == payload
+    assert registry.compress(payload, None) == payload
+
+
+def test_latest_version_is_used(python_dictionary):
+    newer = train("python", dict_size=8192)
+    old_registry = DictionaryRegistry([("python", 1, python_dictionary)])
+    registry = DictionaryRegistry([("python", 2, newer), ("python", 1, python_dictionary)])
+    payload = json_dumps(make_event("python", 1000)).encode("utf8")
+
+    compressed = registry.compress(payload, "python")
+    assert compressed != old_registry.compress(payload, "python")
+    # payloads compressed with older versions can still be read
+    assert registry.decompress(old_registry.compress(payload, "python")) == payload
+
+
+def test_unknown_dictionary(python_dictionary):
+    compressed = DictionaryRegistry([("python", 1, python_dictionary)]).compress(
+        json_dumps(make_event("python", 1)).encode("utf8"), "python"
+    )
+    with pytest.raises(UnknownDictionary):
+        DictionaryRegistry().decompress(compressed)
+
+
+def test_from_path(tmp_path, python_dictionary):
+    save_dictionary(str(tmp_path), "python", 1, python_dictionary)
+    (tmp_path / "README").write_text("not a dictionary")
+
+    registry = DictionaryRegistry.from_path(str(tmp_path))
+    payload = json_dumps(make_event("python", 1)).encode("utf8")
+    assert registry.compress(payload, "python").startswith(ZSTD_MAGIC)
+
+
+@pytest.fixture
+def nodestore(tmp_path, python_dictionary):
+    dictionaries = tmp_path / "dictionaries"
+    dictionaries.mkdir()
+    save_dictionary(str(dictionaries), "python", 1, python_dictionary)
+    with override_settings(DEBUG=True, SENTRY_NODESTORE_COMPRESSION_DICTIONARIES=str(dictionaries)):
+        ns = FileSystemNodeStorage(path=str(tmp_path / "nodes"))
+        ns.bootstrap()
+        yield ns
+
+
+def test_nodestore_compresses_payloads(nodestore):
+    event = make_event("python", 1)
+    nodestore.set_subkeys("a" * 32, {None: event, "unprocessed": {"foo": "bar"}})
+
+    assert nodestore._get_bytes("a" * 32).startswith(ZSTD_MAGIC)
+    assert nodestore.get("a" * 32) == event
+    assert nodestore.get("a" * 32, subkey="unprocessed") == {"foo": "bar"}
+    assert nodestore.get_multi(["a" * 32, "b" * 32]) == {"a" * 32: event, "b" * 32: None}
+
+
+def test_nodestore_without_dictionary(nodestore):
+    event = make_event("javascript", 1)
+    nodestore.set("a" * 32, event)
+
+    assert nodestore._get_bytes("a" * 32).startswith(b"{")
+    assert nodestore.get("a" * 32) == event
+
+
+def test_nodestore_reads_uncompressed_payloads(nodestore):
+    event = make_event("python", 1)
+    nodestore._set_bytes("a" * 32, json_dumps(event).encode("utf8"))
+
+    assert nodestore.get("a" * 32) == event
@@ -0,0 +1,93 @@
+from unittest import mock
+
+import pytest
+from django.test import override_settings
+
+from sentry.nodestore.django.backend import DjangoNodeStorage
+from sentry.nodestore.lru import MISSING, LocalNodeCache
+from sentry.testutils.silo import region_silo_test
+
+
+def test_get_many():
+    cache = LocalNodeCache(max_items=10, max_bytes=1000, ttl=60)
+    cache.set_many({"a": b'{"foo":"a"}', "b": b'{"foo":"b"}'}, None)
+    cache.set_many({"a": b'{"foo":"other"}'}, "other")
+
+    assert cache.get_many(["a", "b", "c"], None) == {"a": b'{"foo":"a"}', "b": b'{"foo":"b"}'}
+    assert cache.get_many(["a", "b"], "other") == {"a": b'{"foo":"other"}'}
+
+
+def test_evicts_least_recently_used():
+    cache = LocalNodeCache(max_items=2, max_bytes=1000, ttl=60)
+    cache.set_many({"a": b"1", "b": b"2"}, None)
+    cache.get_many(["a"], None)
+    cache.set_many({"c": b"3"}, None)
+
+    assert cache.get_many(["a", "b", "c"], None) == {"a": b"1", "c": b"3"}
+
+
+def test_evicts_by_size():
+    cache = LocalNodeCache(max_items=10, max_bytes=10, ttl=60)
+    cache.set_many({"a": b"12345", "b": b"12345"}, None)
+    assert cache.size == 10
+
+    cache.set_many({"c": b"123"}, None)
+    assert cache.get_many(["a", "b", "c"], None) == {"b": b"12345", "c": b"123"}
+    assert cache.size == 8
+
+
+def test_expires():
+    cache = LocalNodeCache(max_items=10, max_bytes=1000, ttl=60)
+    with mock.patch("sentry.nodestore.lru.monotonic", return_value=0):
+        cache.set_many({"a": b"1"}, None)
+    with mock.patch("sentry.nodestore.lru.monotonic", return_value=61):
+        assert cache.get_many(["a"], None) == {}
+    assert len(cache) == 0
+
+
+def test_negative_caching():
+    cache = LocalNodeCache(max_items=10, max_bytes=1000, ttl=60)
+    # misses are only remembered with a negative_ttl
+    cache.set_many({"a": MISSING}, None)
+    assert cache.get_many(["a"], None) == {}
+
+    cache = LocalNodeCache(max_items=10, max_bytes=1000, ttl=60, negative_ttl=5)
+    cache.set_many({"a": MISSING}, None)
+    assert cache.get_many(["a"], None) == {"a": MISSING}
+
+
+def test_set_subkeys_and_delete():
+    cache = LocalNodeCache(max_items=10, max_bytes=1000, ttl=60)
+    cache.set_subkeys("a", {None: b"1", "other": b"2"})
+    cache.set_subkeys("a", {None: b"3"})
+    assert cache.get_many(["a"], None) == {"a": b"3"}
+    assert cache.get_many(["a"], "other") == {}
+
+    cache.set_subkeys("a", {None: b"1", "other": b"2"})
+    cache.delete_many(["a"])
+    assert cache.get_many(["a"], None) == {"a": MISSING}
+    assert cache.get_many(["a"], "other") == {"a": MISSING}
+    assert cache.size == 0
+
+
+@pytest.mark.django_db
+@region_silo_test
+def test_nodestore_local_cache():
+    with override_settings(SENTRY_NODESTORE_LOCAL_CACHE_OPTIONS={"max_items": 100}):
+        ns = DjangoNodeStorage()
+        assert ns.local_cache is not None
+
+    ns.set_subkeys("node_1", {None: {"foo": "a"}, "other": {"foo": "b"}})
+    with mock.patch.object(DjangoNodeStorage, "_get_bytes_multi") as get_bytes_multi:
+        assert ns.get_multi(["node_1"]) == {"node_1": {"foo": "a"}}
+        assert ns.get("node_1", subkey="other") == {"foo": "b"}
+        assert not get_bytes_multi.called
+
+    # hits are decoded into fresh objects
+    ns.get("node_1")["foo"] = "changed"
+    assert ns.get("node_1") == {"foo": "a"}
+
+    ns.delete("node_1")
+    with mock.patch.object(DjangoNodeStorage, "_get_bytes") as get_bytes:
+        assert ns.get("node_1") is None
+        assert not get_bytes.called
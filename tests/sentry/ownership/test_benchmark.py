@@ -0,0 +1,67 @@
+import pytest
+
+from sentry.ownership.grammar import CompiledRules, Matcher, Owner, Rule
+
+
+def benchmark_available() -> bool:
+    try:
+        __import__("pytest_benchmark")
+    except ModuleNotFoundError:
+        return False
+    else:
+        return True
+
+
+def large_codeowners_rules(count: int) -> list[Rule]:
+    owner = [Owner("team", "backend")]
+    rules = []
+    for i in range(count):
+        rules.append(Rule(Matcher("codeowners", f"/src/app/module_{i}/"), owner))
+        rules.append(Rule(Matcher("path", f"src/app/module_{i}/*.py"), owner))
+        if i % 10 == 0:
+            rules.append(Rule(Matcher("tags.service", f"service-{i}"), owner))
+            rules.append(Rule(Matcher("module", f"app.module_{i}.*"), owner))
+    return rules
+
+
+EVENT_DATA = {
+    "platform": "python",
+    "tags": [["service", "service-10"], ["environment", "production"]],
+    "exception": {
+        "values": [
+            {
+                "stacktrace": {
+                    "frames": [
+                        {
+                            "filename": f"src/app/module_{i}/views.py",
+                            "abs_path": f"/srv/src/app/module_{i}/views.py",
+                            "module": f"app.module_{i}.views",
+                        }
+                        for i in range(0, 60, 3)
+                    ]
+                }
+            }
+        ]
+    },
+}
+
+
+def run_per_rule(rules, data):
+    return [rule for rule in rules if rule.test(data)]
+
+
+@pytest.mark.skipif(not benchmark_available(), reason="requires pytest-benchmark")
+@pytest.mark.parametrize("rule_count", [100, 500])
+def test_benchmark_per_rule(rule_count, benchmark):
+    rules = large_codeowners_rules(rule_count)
+    benchmark(run_per_rule, rules, EVENT_DATA)
+
+
+@pytest.mark.skipif(not benchmark_available(), reason="requires pytest-benchmark")
+@pytest.mark.parametrize("rule_count", [100, 500])
+def test_benchmark_compiled(rule_count, benchmark):
+    rules = large_codeowners_rules(rule_count)
+    compiled = CompiledRules(rules)
+
+    assert compiled.matching_rules(EVENT_DATA) == run_per_rule(rules, EVENT_DATA)
+    benchmark(compiled.matching_rules, EVENT_DATA)
@@ -1,9 +1,11 @@
 import pytest
 
 from sentry.ownership.grammar import (
+    CompiledRules,
     Matcher,
     Owner,
     Rule,
+    compile_schema,
     convert_codeowners_syntax,
     convert_schema_to_rules_text,
     dump_schema,
@@ -1023,3 +1025,68 @@ def test_convert_schema_to_rules_text():
         )
         == "path:*.js #frontend m@robenolt.com\nurl:http://google.com/* #backend\npath:src/sentry/* david@sentry.io\ntags.foo:bar tagperson@sentry.io\ntags.foo:bar baz tagperson@sentry.io\nmodule:foo.bar #workflow\nmodule:foo bar meow@sentry.io\n"
     )
+
+
+compiled_rules_data = [
+    {},
+    {"request": {"url": "http://google.com/search"}},
+    {"tags": [["foo", "bar"], ["release", "1.0"]]},
+    {"tags": [["foo", "bar baz"]], "user": {"email": "foo@example.com"}},
+    {"user": {"id": "1", "data": {"foo": "bar"}}},
+    {
+        "exception": {
+            "values": [
+                {
+                    "stacktrace": {
+                        "frames": [
+                            {"filename": "src/sentry/app.js", "module": "foo.bar"},
+                            {"abs_path": "/usr/src/components/button.ts"},
+                        ]
+                    }
+                }
+            ]
+        }
+    },
+    {
+        "stacktrace": {
+            "frames": [{"filename": "frontend/index.ts"}, {"module": "foo bar"}, None],
+        },
+        "tags": [None, ["foo", "baz"]],
+    },
+]
+
+
+@pytest.mark.parametrize("data", compiled_rules_data)
+def test_compiled_rules_matches_rule_test(data):
+    rules = parse_rules(fixture_data) + [
+        Rule(Matcher("tags.user.email", "foo@*"), [Owner("user", "a@sentry.io")]),
+        Rule(Matcher("path", "*.js"), [Owner("team", "duplicate")]),
+    ]
+    compiled = CompiledRules(rules)
+
+    assert compiled.matching_rules(data) == [rule for rule in rules if rule.test(data)]
+
+
+def test_compiled_rules_matching_indexes():
+    compiled = CompiledRules(parse_rules(fixture_data))
+    data = {
+        "request": {"url": "http://google.com/foo"},
+        "stacktrace": {"frames": [{"filename": "src/sentry/foo.js"}]},
+        "tags": [["foo", "bar"]],
+    }
+
+    assert compiled.matching_indexes(data) == [0, 1, 2, 3]
+    assert compiled.matching_indexes({}) == []
+
+
+def test_compile_schema_is_cached():
+    schema = dump_schema(parse_rules(fixture_data))
+
+    compiled = compile_schema(schema, ("ownership", 1, 1))
+    assert len(compiled) == 9
+    assert compile_schema(schema, ("ownership", 1, 1)) is compiled
+    assert compile_schema(schema) is not compiled
+
+    changed = dump_schema(parse_rules(fixture_data + "path:*.py #backend\n"))
+    assert compile_schema(changed, ("ownership", 1, 2)) is not compiled
+    assert len(compile_schema(changed, ("ownership", 1, 2))) == 10
@@ -391,6 +391,35 @@ class RedisQuotaTest(TestCase):
 
         assert self.quota.is_rate_limited(self.project).is_limited
 
+    def test_caches_rejections(self):
+        timestamp = time.time()
+
+        self.get_project_quota.return_value = (1, 60)
+        self.get_organization_quota.return_value = (300, 60)
+        self.get_monitor_quota.return_value = (15, 60)
+
+        assert not self.quota.is_rate_limited(self.project, timestamp=timestamp).is_limited
+        assert self.quota.is_rate_limited(self.project, timestamp=timestamp).is_limited
+
+        with mock.patch("sentry.quotas.redis.is_rate_limited") as script:
+            result = self.quota.is_rate_limited(self.project, timestamp=timestamp)
+        assert not script.called
+        assert result.is_limited
+        assert result.reason_code == "project_quota"
+        assert 0 < result.retry_after <= 60
+
+        # Rejections are only cached for the limit they were checked against
+        self.get_project_quota.return_value = (2, 60)
+        assert not self.quota.is_rate_limited(self.project, timestamp=timestamp).is_limited
+        assert self.quota.is_rate_limited(self.project, timestamp=timestamp).is_limited
+
+        # Refunds invalidate the cached rejections
+        self.quota.refund(self.project, timestamp=timestamp)
+        assert not self.quota.is_rate_limited(self.project, timestamp=timestamp).is_limited
+
+        # The next window starts without any cached rejections
+        assert not self.quota.is_rate_limited(self.project, timestamp=timestamp + 60).is_limited
+
     def test_get_usage(self):
         timestamp = time.time()
 
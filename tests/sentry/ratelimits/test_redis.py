@@ -1,5 +1,6 @@
 from time import time
 
+from sentry.ratelimits.concurrent import ConcurrentLimitInfo, ConcurrentRateLimiter
 from sentry.ratelimits.redis import RedisRateLimiter
 from sentry.testutils.cases import TestCase
 from sentry.testutils.helpers.datetime import freeze_time
@@ -66,3 +67,45 @@ class RedisRateLimiterTest(TestCase):
             assert not limited
             assert value == 1
             assert reset_time == expected_reset_time + 5
+
+    def test_is_limited_with_concurrency(self):
+        concurrent_limiter = ConcurrentRateLimiter()
+        with freeze_time("2000-01-01"):
+            expected_reset_time = int(time() + 5)
+
+            limited, value, reset_time, info = self.backend.is_limited_with_concurrency(
+                "foo", 2, "uid1", concurrent_limit=1, window=5
+            )
+            assert not limited
+            assert value == 1
+            assert reset_time == expected_reset_time
+            assert info == ConcurrentLimitInfo(limit=1, current_executions=1, limit_exceeded=False)
+            # Both limiters share their state with the standalone implementations
+            assert self.backend.current_value("foo", window=5) == 1
+            assert concurrent_limiter.get_concurrent_requests("foo") == 1
+
+            limited, value, _, info = self.backend.is_limited_with_concurrency(
+                "foo", 2, "uid2", concurrent_limit=1, window=5
+            )
+            assert not limited
+            assert value == 2
+            assert info == ConcurrentLimitInfo(limit=1, current_executions=1, limit_exceeded=True)
+
+            concurrent_limiter.finish_request("foo", "uid1")
+            assert concurrent_limiter.get_concurrent_requests("foo") == 0
+
+            # The concurrent limiter is skipped once the window limit is hit
+            limited, value, _, info = self.backend.is_limited_with_concurrency(
+                "foo", 2, "uid3", concurrent_limit=1, window=5
+            )
+            assert limited
+            assert value == 3
+            assert info is None
+            assert concurrent_limiter.get_concurrent_requests("foo") == 0
+
+            limited, value, _, info = self.backend.is_limited_with_concurrency(
+                "bar", 2, "uid4", window=5
+            )
+            assert not limited
+            assert value == 1
+            assert info is None
@@ -1,3 +1,7 @@
+import random
+from collections import defaultdict
+from unittest import mock
+
 import pytest
 
 from sentry.ratelimits.sliding_windows import (
@@ -71,3 +75,110 @@ def test_basic(limiter):
         )
 
         assert resp == [GrantedQuota(prefix="foo", granted=0, reached_quotas=quotas)]
+
+
+def test_lease():
+    limiter = RedisSlidingWindowRateLimiter(lease_fraction=0.2)
+    quotas = [Quota(window_seconds=10, granularity_seconds=1, limit=10)]
+
+    with mock.patch.object(
+        limiter.impl, "check_and_use_quotas", wraps=limiter.impl.check_and_use_quotas
+    ) as redis_checks:
+        for _ in range(10):
+            resp = limiter.check_and_use_quotas(
+                [RequestedQuota(prefix="foo", requested=1, quotas=quotas)],
+                timestamp=TIMESTAMP_OFFSET,
+            )
+            assert resp == [GrantedQuota(prefix="foo", granted=1, reached_quotas=[])]
+
+        resp = limiter.check_and_use_quotas(
+            [RequestedQuota(prefix="foo", requested=1, quotas=quotas)], timestamp=TIMESTAMP_OFFSET
+        )
+        assert resp == [GrantedQuota(prefix="foo", granted=0, reached_quotas=quotas)]
+
+    # Leases of two units each, and one failed attempt at the end
+    assert redis_checks.call_count == 6
+
+
+def test_lease_release(limiter):
+    leaseholder = RedisSlidingWindowRateLimiter(lease_fraction=0.5, lease_seconds=5)
+    quotas = [Quota(window_seconds=10, granularity_seconds=1, limit=10)]
+
+    resp = leaseholder.check_and_use_quotas(
+        [RequestedQuota(prefix="foo", requested=1, quotas=quotas)], timestamp=TIMESTAMP_OFFSET
+    )
+    assert resp == [GrantedQuota(prefix="foo", granted=1, reached_quotas=[])]
+
+    # The rest of the lease is reserved in Redis
+    _, grants = limiter.check_within_quotas(
+        [RequestedQuota(prefix="foo", requested=10, quotas=quotas)], timestamp=TIMESTAMP_OFFSET
+    )
+    assert grants[0].granted == 5
+
+    # Once the lease expires, its unused quota is given back
+    leaseholder.check_and_use_quotas(
+        [RequestedQuota(prefix="foo", requested=1, quotas=quotas)],
+        timestamp=TIMESTAMP_OFFSET + 5,
+    )
+    leaseholder.release_leases(timestamp=TIMESTAMP_OFFSET + 5)
+
+    _, grants = limiter.check_within_quotas(
+        [RequestedQuota(prefix="foo", requested=10, quotas=quotas)],
+        timestamp=TIMESTAMP_OFFSET + 5,
+    )
+    assert grants[0].granted == 8
+
+
+def test_lease_release_idle(limiter):
+    leaseholder = RedisSlidingWindowRateLimiter(lease_fraction=0.5, lease_seconds=5)
+    quotas = [Quota(window_seconds=10, granularity_seconds=1, limit=10)]
+
+    leaseholder.check_and_use_quotas(
+        [RequestedQuota(prefix="foo", requested=1, quotas=quotas)], timestamp=TIMESTAMP_OFFSET
+    )
+
+    # Expired leases are given back by any later check, also of other quotas
+    leaseholder.check_and_use_quotas(
+        [RequestedQuota(prefix="bar", requested=1, quotas=quotas)],
+        timestamp=TIMESTAMP_OFFSET + 5,
+    )
+
+    _, grants = limiter.check_within_quotas(
+        [RequestedQuota(prefix="foo", requested=10, quotas=quotas)],
+        timestamp=TIMESTAMP_OFFSET + 5,
+    )
+    assert grants[0].granted == 9
+
+
+def test_lease_concurrent_leaseholders(limiter):
+    quotas = [
+        Quota(window_seconds=10, granularity_seconds=1, limit=100),
+        Quota(window_seconds=10, granularity_seconds=1, limit=150, prefix_override="global"),
+    ]
+    leaseholders = [RedisSlidingWindowRateLimiter(lease_fraction=0.1) for _ in range(20)]
+    rng = random.Random(0)
+
+    granted = defaultdict(int)
+    for _ in range(500):
+        leaseholder = rng.choice(leaseholders)
+        prefix = rng.choice(["foo", "bar"])
+        resp = leaseholder.check_and_use_quotas(
+            [RequestedQuota(prefix=prefix, requested=rng.randint(1, 3), quotas=quotas)],
+            timestamp=TIMESTAMP_OFFSET,
+        )
+        granted[prefix] += resp[0].granted
+
+    # Leases never over-admit, but unused leases hold back some of the quota
+    assert granted["foo"] <= 100
+    assert granted["bar"] <= 100
+    assert granted["foo"] + granted["bar"] <= 150
+
+    # All the quota which was leased but not granted is given back
+    for leaseholder in leaseholders:
+        leaseholder.release_leases(timestamp=TIMESTAMP_OFFSET)
+
+    _, grants = limiter.check_within_quotas(
+        [RequestedQuota(prefix="foo", requested=150, quotas=quotas)],
+        timestamp=TIMESTAMP_OFFSET,
+    )
+    assert grants[0].granted == min(100 - granted["foo"], 150 - granted["foo"] - granted["bar"])
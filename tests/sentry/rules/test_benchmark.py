@@ -0,0 +1,93 @@
+from unittest import mock
+
+import pytest
+
+from sentry.eventstore.models import GroupEvent
+from sentry.models.environment import Environment
+from sentry.models.project import Project
+from sentry.models.rule import Rule
+from sentry.rules import EventState, rules
+from sentry.rules.index import RuleIndex
+
+
+def benchmark_available() -> bool:
+    try:
+        __import__("pytest_benchmark")
+    except ModuleNotFoundError:
+        return False
+    else:
+        return True
+
+
+CONDITIONS = [
+    [{"id": "sentry.rules.conditions.first_seen_event.FirstSeenEventCondition"}],
+    [{"id": "sentry.rules.conditions.regression_event.RegressionEventCondition"}],
+    [
+        {"id": "sentry.rules.conditions.every_event.EveryEventCondition"},
+        {"id": "sentry.rules.filters.level.LevelFilter", "level": "50", "match": "eq"},
+    ],
+    [
+        {"id": "sentry.rules.conditions.reappeared_event.ReappearedEventCondition"},
+        {"id": "sentry.rules.filters.issue_category.IssueCategoryFilter", "value": "2"},
+    ],
+]
+
+
+def project_rules(project, count):
+    return [
+        Rule(
+            id=i,
+            project=project,
+            environment_id=i % 3 or None,
+            data={"conditions": CONDITIONS[i % len(CONDITIONS)], "actions": []},
+        )
+        for i in range(count)
+    ]
+
+
+@pytest.fixture
+def event():
+    project = Project(id=1, organization_id=1)
+    event = mock.Mock(spec=GroupEvent)
+    event.project = project
+    event.get_environment.return_value = Environment(id=1, organization_id=1, name="production")
+    event.get_tag.return_value = "error"
+    return event
+
+
+STATE = EventState(
+    is_new=False,
+    is_regression=False,
+    is_new_group_environment=False,
+    has_reappeared=False,
+    has_escalated=False,
+)
+
+
+def evaluate_all(event, project_rules):
+    # Evaluates the conditions and filters of every rule, as `RuleProcessor`
+    # did before the index.
+    return [
+        rule
+        for rule in project_rules
+        if all(
+            rules.get(condition["id"])(event.project, data=condition, rule=rule).passes(
+                event, STATE
+            )
+            for condition in rule.data["conditions"]
+        )
+    ]
+
+
+@pytest.mark.skipif(not benchmark_available(), reason="requires pytest-benchmark")
+@pytest.mark.parametrize("rule_count", [100, 500])
+def test_benchmark_without_index(event, rule_count, benchmark):
+    benchmark(evaluate_all, event, project_rules(event.project, rule_count))
+
+
+@pytest.mark.skipif(not benchmark_available(), reason="requires pytest-benchmark")
+@pytest.mark.parametrize("rule_count", [100, 500])
+def test_benchmark_index(event, rule_count, benchmark):
+    project_rules_ = project_rules(event.project, rule_count)
+    index = RuleIndex.build(project_rules_, rules)
+    benchmark(index.get_candidates, project_rules_, event, STATE, rules)
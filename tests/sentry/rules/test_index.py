@@ -0,0 +1,124 @@
+from sentry.models.grouprulestatus import GroupRuleStatus
+from sentry.models.rule import Rule
+from sentry.rules import EventState, rules
+from sentry.rules.index import RuleIndex
+from sentry.rules.processor import RuleProcessor
+from sentry.testutils.cases import TestCase
+from sentry.testutils.silo import region_silo_test
+from sentry.testutils.skips import requires_snuba
+
+pytestmark = [requires_snuba]
+
+EVERY_EVENT = {"id": "sentry.rules.conditions.every_event.EveryEventCondition"}
+FIRST_SEEN = {"id": "sentry.rules.conditions.first_seen_event.FirstSeenEventCondition"}
+REGRESSION = {"id": "sentry.rules.conditions.regression_event.RegressionEventCondition"}
+TAGGED = {
+    "id": "sentry.rules.conditions.tagged_event.TaggedEventCondition",
+    "key": "foo",
+    "match": "eq",
+    "value": "bar",
+}
+ERROR_LEVEL = {"id": "sentry.rules.filters.level.LevelFilter", "level": "40", "match": "eq"}
+FATAL_LEVEL = {"id": "sentry.rules.filters.level.LevelFilter", "level": "50", "match": "eq"}
+
+
+def make_state(**kwargs):
+    return EventState(
+        **{
+            "is_new": False,
+            "is_regression": False,
+            "is_new_group_environment": False,
+            "has_reappeared": False,
+            "has_escalated": False,
+            **kwargs,
+        }
+    )
+
+
+@region_silo_test
+class RuleIndexTest(TestCase):
+    def setUp(self):
+        event = self.store_event(
+            data={"level": "error", "environment": "production"}, project_id=self.project.id
+        )
+        self.group_event = next(event.build_group_events())
+        Rule.objects.filter(project=self.project).delete()
+
+    def create_rule(self, conditions, environment_id=None, **data):
+        return Rule.objects.create(
+            project=self.project,
+            environment_id=environment_id,
+            data={"conditions": conditions, "actions": [], **data},
+        )
+
+    def get_candidates(self, state):
+        rules_ = Rule.get_for_project(self.project.id)
+        index = RuleIndex.get_for_project(self.project.id, rules_, rules)
+        return index.get_candidates(rules_, self.group_event, state, rules)
+
+    def test_state_conditions(self):
+        every_event = self.create_rule([EVERY_EVENT])
+        first_seen = self.create_rule([FIRST_SEEN])
+        regression = self.create_rule([REGRESSION])
+        any_state = self.create_rule([FIRST_SEEN, REGRESSION], action_match="any")
+        none_first_seen = self.create_rule([FIRST_SEEN], action_match="none")
+
+        assert self.get_candidates(make_state()) == [every_event, none_first_seen]
+        assert self.get_candidates(make_state(is_new=True)) == [every_event, first_seen, any_state]
+        assert self.get_candidates(make_state(is_regression=True)) == [
+            every_event,
+            regression,
+            any_state,
+            none_first_seen,
+        ]
+
+    def test_other_predicates_keep_rule(self):
+        all_match = self.create_rule([FIRST_SEEN, TAGGED])
+        any_match = self.create_rule([FIRST_SEEN, TAGGED], action_match="any")
+
+        assert self.get_candidates(make_state()) == [any_match]
+        assert self.get_candidates(make_state(is_new=True)) == [all_match, any_match]
+
+    def test_filters(self):
+        error = self.create_rule([EVERY_EVENT, ERROR_LEVEL])
+        self.create_rule([EVERY_EVENT, FATAL_LEVEL])
+        either = self.create_rule([EVERY_EVENT, ERROR_LEVEL, FATAL_LEVEL], filter_match="any")
+
+        assert self.get_candidates(make_state()) == [error, either]
+
+    def test_environment(self):
+        production = self.group_event.get_environment()
+        staging = self.create_environment(self.project, name="staging")
+        in_production = self.create_rule([EVERY_EVENT], environment_id=production.id)
+        self.create_rule([EVERY_EVENT], environment_id=staging.id)
+        anywhere = self.create_rule([EVERY_EVENT])
+
+        assert self.get_candidates(make_state()) == [in_production, anywhere]
+
+    def test_invalidated_on_save(self):
+        rule = self.create_rule([FIRST_SEEN])
+        assert self.get_candidates(make_state()) == []
+
+        rule.data["conditions"] = [EVERY_EVENT]
+        rule.save()
+        assert self.get_candidates(make_state()) == [rule]
+
+    def test_processor_skips_rules(self):
+        every_event = self.create_rule([EVERY_EVENT])
+        first_seen = self.create_rule([FIRST_SEEN])
+
+        rp = RuleProcessor(
+            self.group_event,
+            is_new=False,
+            is_regression=False,
+            is_new_group_environment=False,
+            has_reappeared=False,
+        )
+        rp.apply()
+
+        assert set(
+            GroupRuleStatus.objects.filter(group=self.group_event.group).values_list(
+                "rule_id", flat=True
+            )
+        ) == {every_event.id}
+        assert not GroupRuleStatus.objects.filter(rule=first_seen).exists()
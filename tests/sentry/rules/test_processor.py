@@ -372,6 +372,65 @@ class RuleProcessorTest(TestCase):
         # mock condition first.
         assert passes.call_count == 0
 
+    @patch(
+        "sentry.constants._SENTRY_RULES",
+        [
+            "sentry.mail.actions.NotifyEmailAction",
+            "sentry.rules.conditions.event_frequency.EventFrequencyCondition",
+        ],
+    )
+    def test_frequency_queries_shared_between_rules(self):
+        frequency_condition = {
+            "id": "sentry.rules.conditions.event_frequency.EventFrequencyCondition",
+            "interval": "1h",
+        }
+        self.rule.update(
+            data={
+                "conditions": [{**frequency_condition, "value": 1}],
+                "actions": [EMAIL_ACTION_DATA],
+            },
+        )
+        Rule.objects.create(
+            project=self.group_event.project,
+            data={
+                "conditions": [{**frequency_condition, "value": 10}],
+                "actions": [EMAIL_ACTION_DATA],
+            },
+        )
+        Rule.objects.create(
+            project=self.group_event.project,
+            data={
+                "conditions": [
+                    {
+                        **frequency_condition,
+                        "value": 50,
+                        "comparisonType": "percent",
+                        "comparisonInterval": "1d",
+                    }
+                ],
+                "actions": [EMAIL_ACTION_DATA],
+            },
+        )
+        with patch("sentry.rules.processor.rules", init_registry()), patch(
+            "sentry.tsdb.get_sums", return_value={self.group_event.group_id: 5}
+        ) as get_sums, patch("sentry.rules.processor.metrics") as mock_metrics:
+            rp = RuleProcessor(
+                self.group_event,
+                is_new=False,
+                is_regression=True,
+                is_new_group_environment=True,
+                has_reappeared=True,
+            )
+            results = list(rp.apply())
+
+        # the one hour window is queried once for all three rules, the
+        # comparison window once for the percent rule
+        assert get_sums.call_count == 2
+        assert len(results) == 1
+        assert [rule_future.rule for rule_future in results[0][1]] == [self.rule]
+        mock_metrics.incr.assert_any_call("rules.conditions.frequency_queries", amount=2)
+        mock_metrics.incr.assert_any_call("rules.conditions.frequency_queries_saved", amount=2)
+
 
 class MockFilterTrue(EventFilter):
     id = "tests.sentry.rules.test_processor.MockFilterTrue"
@@ -2,6 +2,7 @@ from datetime import datetime, timedelta
 
 import pytest
 from django.conf import settings
+from django.test import override_settings
 
 from sentry.sentry_metrics.indexer.cache import StringIndexerCache
 from sentry.sentry_metrics.use_case_id_registry import UseCaseID
@@ -239,3 +240,43 @@ def test_is_valid_timestamp() -> None:
 
     assert not indexer_cache._is_valid_timestamp(str(stale_ts))
     assert indexer_cache._is_valid_timestamp(str(new_ts))
+
+
+def test_shared_cache(tmp_path) -> None:
+    with override_settings(
+        SENTRY_METRICS_INDEXER_SHARED_CACHE_SIZE=64,
+        SENTRY_METRICS_INDEXER_SHARED_CACHE_PATH=str(tmp_path / "indexer"),
+    ), override_options(
+        {
+            "sentry-metrics.indexer.read-new-cache-namespace": False,
+            "sentry-metrics.indexer.write-new-cache-namespace": False,
+        }
+    ):
+        indexer_cache = StringIndexerCache(
+            **settings.SENTRY_STRING_INDEXER_CACHE_OPTIONS, partition_key=_PARTITION_KEY
+        )
+        other_indexer_cache = StringIndexerCache(
+            **settings.SENTRY_STRING_INDEXER_CACHE_OPTIONS, partition_key=_PARTITION_KEY
+        )
+        namespace = "test"
+        cache.clear()
+
+        indexer_cache.set_many(namespace, {"sessions:1:a": 1, "sessions:1:b": 2})
+        cache.clear()
+        assert other_indexer_cache.get_many(namespace, ["sessions:1:a", "sessions:1:c"]) == {
+            "sessions:1:a": 1,
+            "sessions:1:c": None,
+        }
+        assert other_indexer_cache.get(namespace, "sessions:1:b") == 2
+
+        # Values read from the cache are added to the shared cache
+        cache.set(indexer_cache._make_cache_key("sessions:1:c"), 3, version=indexer_cache.version)
+        assert indexer_cache.get(namespace, "sessions:1:c") == 3
+        cache.clear()
+        assert other_indexer_cache.get(namespace, "sessions:1:c") == 3
+
+        indexer_cache.delete_many(namespace, ["sessions:1:a", "sessions:1:c"])
+        assert other_indexer_cache.get_many(namespace, ["sessions:1:a", "sessions:1:c"]) == {
+            "sessions:1:a": None,
+            "sessions:1:c": None,
+        }
@@ -0,0 +1,115 @@
+import multiprocessing
+from unittest.mock import patch
+
+import pytest
+
+from sentry.sentry_metrics.indexer.shared_cache import WAYS, SharedStringCache
+
+
+@pytest.fixture
+def path(tmp_path) -> str:
+    return str(tmp_path / "indexer")
+
+
+def test_get_set_delete(path: str) -> None:
+    cache = SharedStringCache(path, 64)
+    assert cache.get_many(["a", "b"]) == {}
+
+    cache.set_many({"a": 1, "b": 2**40}, ttl=60)
+    assert cache.get_many(["a", "b", "c"]) == {"a": 1, "b": 2**40}
+
+    cache.delete_many(["a"])
+    assert cache.get_many(["a", "b"]) == {"b": 2**40}
+
+
+def test_expiry(path: str) -> None:
+    cache = SharedStringCache(path, 64)
+    with patch("sentry.sentry_metrics.indexer.shared_cache.time.time", return_value=1000):
+        cache.set_many({"a": 1}, ttl=60)
+    with patch("sentry.sentry_metrics.indexer.shared_cache.time.time", return_value=1059):
+        assert cache.get_many(["a"]) == {"a": 1}
+    with patch("sentry.sentry_metrics.indexer.shared_cache.time.time", return_value=1060):
+        assert cache.get_many(["a"]) == {}
+
+
+def test_shared_between_instances(path: str) -> None:
+    SharedStringCache(path, 64).set_many({"a": 1}, ttl=60)
+    assert SharedStringCache(path, 64).get_many(["a"]) == {"a": 1}
+    # Caches of another size don't share a file
+    assert SharedStringCache(path, 128).get_many(["a"]) == {}
+
+
+def _set_in_subprocess(path: str) -> None:
+    SharedStringCache(path, 64).set_many({"a": 1}, ttl=60)
+
+
+def test_shared_between_processes(path: str) -> None:
+    process = multiprocessing.get_context("fork").Process(target=_set_in_subprocess, args=(path,))
+    process.start()
+    process.join(10)
+    assert process.exitcode == 0
+    assert SharedStringCache(path, 64).get_many(["a"]) == {"a": 1}
+
+
+def test_clock_eviction(path: str) -> None:
+    # A single bucket
+    cache = SharedStringCache(path, WAYS)
+    keys = [f"key-{index}" for index in range(WAYS)]
+    cache.set_many({key: index for index, key in enumerate(keys)}, ttl=60)
+
+    # Without references, slots are evicted in the order of the clock hand
+    cache.set_many({"new-1": 100}, ttl=60)
+    assert cache.get_many(["key-0"]) == {}
+
+    # Referenced slots get a second chance
+    cache.get_many(["key-1"])
+    cache.set_many({"new-2": 101}, ttl=60)
+    assert cache.get_many(["key-1", "key-2", "new-1", "new-2"]) == {
+        "key-1": 1,
+        "new-1": 100,
+        "new-2": 101,
+    }
+
+
+def test_torn_slots_are_misses(path: str) -> None:
+    cache = SharedStringCache(path, WAYS)
+    value = 0x0102030405060708
+    cache.set_many({"a": value}, ttl=60)
+
+    # Overwrite the value without updating the checksum
+    offset = cache.table.find(value.to_bytes(8, "little"))
+    cache.table[offset] = 0
+    assert cache.get_many(["a"]) == {}
+
+
+class _WriteDuringRead:
+    """
+    Wraps a table and runs `write` right after the first slice is read from
+    it, as a concurrent writer could.
+    """
+
+    def __init__(self, table, write) -> None:
+        self.table = table
+        self.write = write
+
+    def __getitem__(self, index):
+        result = self.table[index]
+        if isinstance(index, slice) and self.write is not None:
+            write, self.write = self.write, None
+            write()
+        return result
+
+    def __setitem__(self, index, value) -> None:
+        self.table[index] = value
+
+
+def test_write_during_read(path: str) -> None:
+    cache = SharedStringCache(path, WAYS)
+    cache.set_many({"a": 1}, ttl=60)
+
+    writer = SharedStringCache(path, WAYS)
+    table = _WriteDuringRead(cache.table, lambda: writer.set_many({"a": 2}, ttl=60))
+    with patch.object(SharedStringCache, "table", table):
+        # The read sees the slot either before or after the write, never a mix
+        assert cache.get_many(["a"]) == {"a": 1}
+    assert cache.get_many(["a"]) == {"a": 2}
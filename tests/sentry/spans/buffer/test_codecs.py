@@ -0,0 +1,43 @@
+from sentry.spans.buffer.codecs import decode_chunk, encode_chunk
+from sentry.utils import json
+
+
+def build_span(**kwargs):
+    span = {
+        "duration_ms": 0,
+        "is_segment": False,
+        "project_id": 1,
+        "segment_id": "ace31e54d65652aa",
+        "sentry_tags": {"environment": "development", "op": "db"},
+        "span_id": "95acbe6d30a66717",
+        "trace_id": "8e6f22e6169545cc963255d0f29cb76b",
+    }
+    span.update(kwargs)
+    return span
+
+
+def test_round_trip():
+    spans = [
+        build_span(),
+        build_span(span_id="a5acbe6d30a66717", duration_ms=3, sentry_tags={"op": "http"}),
+        build_span(span_id="b5acbe6d30a66717", is_segment=True, measurements={"lcp": 1.5}),
+        build_span(span_id="c5acbe6d30a66717", sentry_tags=None),
+    ]
+    assert decode_chunk(encode_chunk(spans)) == spans
+
+
+def test_round_trip_single_span():
+    assert decode_chunk(encode_chunk([build_span()])) == [build_span()]
+
+
+def test_values_keep_their_type():
+    spans = [build_span(duration_ms=0), build_span(duration_ms=False)]
+    decoded = decode_chunk(encode_chunk(spans))
+    assert [type(span["duration_ms"]) for span in decoded] == [int, bool]
+
+
+def test_shared_values_are_stored_once():
+    spans = [build_span(span_id=f"{index:016x}") for index in range(100)]
+    chunk = encode_chunk(spans)
+    assert chunk.count(b"8e6f22e6169545cc963255d0f29cb76b") == 1
+    assert len(chunk) < len(json.dumps(spans)) / 4
@@ -1,22 +1,79 @@
 from unittest import mock
 
 from sentry.spans.buffer.redis import RedisSpansBuffer, get_redis_client
+from sentry.testutils.helpers.options import override_options
+
+
+def build_span(**kwargs):
+    span = {"span_id": "95acbe6d30a66717", "trace_id": "8e6f22e6169545cc963255d0f29cb76b"}
+    span.update(kwargs)
+    return span
 
 
 class TestRedisSpansBuffer:
-    def test_first_span_in_segment_calls_expire(self):
+    def test_first_span_in_segment_sets_ttl(self):
         buffer = RedisSpansBuffer()
-        with mock.patch.object(buffer, "client", new=get_redis_client()) as mock_client:
-            mock_client.expire = mock.Mock()
 
-            buffer.write_span("bar", "foo", b"span data")
-            mock_client.expire.assert_called_once_with("segment:foo:bar:process-segment", 300)
+        assert buffer.write_span("bar", "foo", build_span())
+        assert buffer.client.ttl("segment:foo:bar:process-segment") == 300
 
     def test_ttl_not_set_repeatedly(self):
         buffer = RedisSpansBuffer()
-        buffer.write_span("bar", "foo", b"span data")
-        with mock.patch.object(buffer, "client", new=get_redis_client()) as mock_client:
-            mock_client.expire = mock.Mock()
-            buffer.write_span("bar", "foo", b"other span data")
+        buffer.write_span("bar", "foo", build_span())
+        buffer.client.persist("segment:foo:bar:process-segment")
+
+        assert not buffer.write_span("bar", "foo", build_span(span_id="a5acbe6d30a66717"))
+        assert buffer.client.ttl("segment:foo:bar:process-segment") == -1
+
+    def test_write_spans(self):
+        buffer = RedisSpansBuffer()
+        buffer.write_span("bar", "foo", build_span())
+
+        new_segments = buffer.write_spans(
+            [
+                ("bar", "foo", build_span(span_id="a5acbe6d30a66717")),
+                ("bar", "baz", build_span(span_id="b5acbe6d30a66717")),
+                ("bar", "baz", build_span(span_id="c5acbe6d30a66717", op="db")),
+            ]
+        )
+
+        assert new_segments == [("bar", "baz")]
+        assert buffer.read_segment("bar", "foo") == [
+            build_span(),
+            build_span(span_id="a5acbe6d30a66717"),
+        ]
+        assert buffer.read_segment("bar", "baz") == [
+            build_span(span_id="b5acbe6d30a66717"),
+            build_span(span_id="c5acbe6d30a66717", op="db"),
+        ]
+        assert buffer.client.ttl("segment:baz:bar:process-segment") == 300
+
+    def test_write_spans_empty(self):
+        buffer = RedisSpansBuffer()
+        assert buffer.write_spans([]) == []
+
+    def test_read_segment_in_chunks(self):
+        buffer = RedisSpansBuffer()
+        spans = [build_span(span_id=f"{index:016x}") for index in range(5)]
+        for span in spans:
+            buffer.write_span("bar", "foo", span)
+
+        with mock.patch("sentry.spans.buffer.redis.READ_CHUNK_SIZE", 2):
+            assert list(buffer.iter_segment("bar", "foo")) == [[span] for span in spans]
+            assert buffer.read_segment("bar", "foo") == spans
+
+    def test_read_missing_segment(self):
+        assert RedisSpansBuffer().read_segment("bar", "foo") == []
+
+    @mock.patch("sentry.spans.buffer.redis.metrics")
+    def test_segment_size_is_capped(self, metrics):
+        buffer = RedisSpansBuffer()
+        with override_options({"spans.buffer.max-segment-bytes": 200}):
+            assert buffer.write_spans([("bar", "foo", build_span())]) == [("bar", "foo")]
+            assert buffer.write_spans([("bar", "foo", build_span(data="x" * 200))]) == []
+            # Chunks which are too large on their own don't create a segment
+            assert buffer.write_spans([("bar", "baz", build_span(data="x" * 200))]) == []
 
-            mock_client.expire.assert_not_called
+        assert buffer.read_segment("bar", "foo") == [build_span()]
+        assert not get_redis_client().exists("segment:baz:bar:process-segment")
+        metrics.incr.assert_called_with("spans.buffer.segment_overflow", amount=1)
@@ -5,7 +5,7 @@ from arroyo.backends.kafka import KafkaPayload
 from arroyo.types import BrokerValue, Message, Partition, Topic
 from django.conf import settings
 
-from sentry.spans.buffer.redis import get_redis_client
+from sentry.spans.buffer.redis import RedisSpansBuffer
 from sentry.spans.consumers.process.factory import ProcessSpansStrategyFactory
 from sentry.utils import json
 
@@ -50,7 +50,7 @@ def build_mock_message(data, topic=None):
 
 @mock.patch("sentry.spans.consumers.process.factory.process_segment")
 def test_consumer_pushes_to_redis_and_schedules_task(process_segment):
-    redis_client = get_redis_client()
+    buffer = RedisSpansBuffer()
 
     topic = Topic(settings.KAFKA_SNUBA_SPANS)
     partition = Partition(topic, 0)
@@ -76,15 +76,13 @@ def test_consumer_pushes_to_redis_and_schedules_task(process_segment):
     strategy.poll()
     strategy.join(1)
     strategy.terminate()
-    assert redis_client.lrange("segment:ace31e54d65652aa:1:process-segment", 0, -1) == [
-        message.value()
-    ]
+    assert buffer.read_segment(1, "ace31e54d65652aa") == [span_data]
     process_segment.apply_async.assert_called_once_with(args=[1, "ace31e54d65652aa"], countdown=120)
 
 
 @mock.patch("sentry.spans.consumers.process.factory.process_segment")
 def test_second_span_in_segment_does_not_queue_task(process_segment):
-    redis_client = get_redis_client()
+    buffer = RedisSpansBuffer()
 
     topic = Topic(settings.KAFKA_SNUBA_SPANS)
     partition = Partition(topic, 0)
@@ -121,8 +119,47 @@ def test_second_span_in_segment_does_not_queue_task(process_segment):
     strategy.poll()
     strategy.join(1)
     strategy.terminate()
-    assert redis_client.lrange("segment:ace31e54d65652aa:1:process-segment", 0, -1) == [
-        message.value(),
-        message.value(),
-    ]
+    assert buffer.read_segment(1, "ace31e54d65652aa") == [span_data, span_data]
     process_segment.apply_async.assert_called_once_with(args=[1, "ace31e54d65652aa"], countdown=120)
+
+
+@mock.patch("sentry.spans.consumers.process.factory.process_segment")
+def test_batched_consumer_schedules_task_once_per_segment(process_segment):
+    buffer = RedisSpansBuffer()
+
+    topic = Topic(settings.KAFKA_SNUBA_SPANS)
+    partition = Partition(topic, 0)
+    strategy = ProcessSpansStrategyFactory(batched=True, max_batch_size=10).create_with_partitions(
+        commit=mock.Mock(),
+        partitions={},
+    )
+
+    spans = [
+        build_mock_span(segment_id=segment_id, span_id=span_id)
+        for segment_id, span_id in (
+            ("ace31e54d65652aa", "95acbe6d30a66717"),
+            ("bce31e54d65652aa", "a5acbe6d30a66717"),
+            ("ace31e54d65652aa", "b5acbe6d30a66717"),
+        )
+    ]
+    messages = [build_mock_message(span, topic) for span in spans]
+    for offset, message in enumerate(messages):
+        strategy.submit(
+            Message(
+                BrokerValue(
+                    KafkaPayload(b"key", message.value().encode("utf-8"), []),
+                    partition,
+                    offset,
+                    datetime.now(),
+                )
+            )
+        )
+
+    strategy.poll()
+    strategy.join(1)
+    strategy.terminate()
+    assert buffer.read_segment(1, "ace31e54d65652aa") == [spans[0], spans[2]]
+    assert buffer.read_segment(1, "bce31e54d65652aa") == [spans[1]]
+    assert process_segment.apply_async.call_count == 2
+    process_segment.apply_async.assert_any_call(args=[1, "ace31e54d65652aa"], countdown=120)
+    process_segment.apply_async.assert_any_call(args=[1, "bce31e54d65652aa"], countdown=120)
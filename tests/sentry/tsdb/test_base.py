@@ -1,9 +1,10 @@
 import itertools
+from array import array
 from datetime import datetime, timedelta, timezone
-from unittest import TestCase
+from unittest import TestCase, mock
 
 from sentry.testutils.helpers.datetime import freeze_time
-from sentry.tsdb.base import ONE_DAY, ONE_HOUR, ONE_MINUTE, BaseTSDB
+from sentry.tsdb.base import ONE_DAY, ONE_HOUR, ONE_MINUTE, BaseTSDB, RangeMatrix
 from sentry.utils.dates import to_timestamp
 
 
@@ -38,6 +39,27 @@ class BaseTSDBTest(TestCase):
         assert len(post_results) == 1
         assert post_results[1] == [[1368889200, 15], [1368892800, 7]]
 
+    def test_rollup_matrix(self):
+        matrix = RangeMatrix([1, 2], [1368889980, 1368890040, 1368893640])
+        matrix.counts[:] = array("q", [5, 10, 7, 0, 1, 2])
+
+        assert matrix.to_range() == {
+            1: [(1368889980, 5), (1368890040, 10), (1368893640, 7)],
+            2: [(1368889980, 0), (1368890040, 1), (1368893640, 2)],
+        }
+        assert matrix.sums() == {1: 22, 2: 3}
+        assert self.tsdb.rollup(matrix, 3600) == self.tsdb.rollup(matrix.to_range(), 3600)
+
+    def test_get_range_matrix_fallback(self):
+        range_set = {1: [(1368889980, 5), (1368890040, 10)], 2: [(1368890040, 3)]}
+        with mock.patch.object(self.tsdb, "get_range", return_value=range_set):
+            matrix = self.tsdb.get_range_matrix(None, [1, 2], None, None)
+            assert self.tsdb.get_sums(None, [1, 2], None, None) == {1: 15, 2: 3}
+
+        assert matrix.series == [1368889980, 1368890040]
+        assert list(matrix.row(0)) == [5, 10]
+        assert list(matrix.row(1)) == [0, 3]
+
     def test_calculate_expiry(self):
         timestamp = datetime(2013, 5, 18, 15, 13, 58, 132928, tzinfo=timezone.utc)
         result = self.tsdb.calculate_expiry(10, 30, timestamp)
@@ -0,0 +1,57 @@
+from datetime import timedelta
+
+import pytest
+from django.utils import timezone
+
+from sentry.tsdb.base import ONE_DAY, ONE_HOUR, TSDBModel
+from sentry.tsdb.inmemory import InMemoryTSDB
+
+
+def benchmark_available() -> bool:
+    try:
+        __import__("pytest_benchmark")
+    except ModuleNotFoundError:
+        return False
+    else:
+        return True
+
+
+KEYS = list(range(1000))
+BUCKETS = 90
+
+
+@pytest.fixture
+def tsdb():
+    tsdb = InMemoryTSDB(rollups=((ONE_HOUR, 24), (ONE_DAY, BUCKETS)))
+    now = timezone.now()
+    for key in KEYS:
+        for day in range(0, BUCKETS, 3):
+            tsdb.incr(TSDBModel.group, key, now - timedelta(days=day), count=key % 7 + 1)
+    return tsdb
+
+
+def get_range_args():
+    end = timezone.now()
+    start = end - timedelta(days=BUCKETS - 1)
+    return TSDBModel.group, KEYS, start, end, ONE_DAY
+
+
+@pytest.mark.skipif(not benchmark_available(), reason="requires pytest-benchmark")
+def test_benchmark_get_range(tsdb, benchmark):
+    result = benchmark(tsdb.get_range, *get_range_args())
+    assert len(result) == len(KEYS)
+
+
+@pytest.mark.skipif(not benchmark_available(), reason="requires pytest-benchmark")
+def test_benchmark_get_range_matrix(tsdb, benchmark):
+    matrix = benchmark(tsdb.get_range_matrix, *get_range_args())
+    assert len(matrix.counts) == len(KEYS) * len(matrix.series)
+
+
+@pytest.mark.skipif(not benchmark_available(), reason="requires pytest-benchmark")
+def test_benchmark_get_sums(tsdb, benchmark):
+    sums = benchmark(tsdb.get_sums, *get_range_args())
+    assert sums == {
+        key: sum(points for _, points in values)
+        for key, values in tsdb.get_range(*get_range_args()).items()
+    }
@@ -0,0 +1,98 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.utils import timezone
+
+from sentry.testutils.cases import TestCase
+from sentry.tsdb.base import ONE_DAY, ONE_HOUR, TSDBModel
+from sentry.tsdb.cached import CachedTSDB
+
+
+class CachedTSDBTest(TestCase):
+    def setUp(self):
+        self.db = CachedTSDB(
+            backend={
+                "path": "sentry.tsdb.inmemory.InMemoryTSDB",
+                "options": {"rollups": ((ONE_HOUR, 24), (ONE_DAY, 30))},
+            },
+        )
+        self.backend = self.db.backend
+        self.now = timezone.now()
+        self.start = self.now - timedelta(hours=6)
+
+    def get_range(self, keys):
+        return self.db.get_range(TSDBModel.group, keys, self.start, self.now, rollup=ONE_HOUR)
+
+    def test_get_range_caches_closed_buckets(self):
+        self.db.incr(TSDBModel.group, 1, self.now - timedelta(hours=3), count=2)
+        self.db.incr(TSDBModel.group, 2, self.now - timedelta(hours=5))
+
+        expected = self.backend.get_range(
+            TSDBModel.group, [1, 2], self.start, self.now, rollup=ONE_HOUR
+        )
+        assert self.get_range([1, 2]) == expected
+
+        with mock.patch.object(self.backend, "get_range", wraps=self.backend.get_range) as spy:
+            assert self.get_range([1, 2]) == expected
+
+        # Only the open tail of the series is queried
+        [call] = spy.call_args_list
+        assert call.args[1] == [1, 2]
+        assert call.args[2] > self.start
+
+        # Counts of closed buckets are not read from the backend anymore
+        self.backend.incr(TSDBModel.group, 1, self.now - timedelta(hours=3))
+        assert self.db.get_sums(TSDBModel.group, [1, 2], self.start, self.now, ONE_HOUR) == {
+            1: 2,
+            2: 1,
+        }
+
+        self.db.incr(TSDBModel.group, 1, self.now, count=5)
+        assert self.get_range([1])[1][-1][1] == 5
+
+    def test_get_range_only_queries_missing_keys(self):
+        self.get_range([1])
+
+        with mock.patch.object(self.backend, "get_range", wraps=self.backend.get_range) as spy:
+            self.get_range([1, 2])
+
+        assert [call.args[1] for call in spy.call_args_list] == [[2], [1]]
+
+    def test_merge_invalidates(self):
+        self.db.incr(TSDBModel.group, 1, self.now - timedelta(hours=3))
+        self.db.incr(TSDBModel.group, 2, self.now - timedelta(hours=3), count=2)
+        assert self.db.get_sums(TSDBModel.group, [1, 2], self.start, self.now, ONE_HOUR) == {
+            1: 1,
+            2: 2,
+        }
+
+        self.db.merge(TSDBModel.group, 1, [2])
+        assert self.db.get_sums(TSDBModel.group, [1, 2], self.start, self.now, ONE_HOUR) == {
+            1: 3,
+            2: 0,
+        }
+
+        self.db.delete([TSDBModel.group], [1])
+        assert self.db.get_sums(TSDBModel.group, [1], self.start, self.now, ONE_HOUR) == {1: 0}
+
+    def test_get_distinct_counts_totals(self):
+        end = self.now - timedelta(hours=2)
+        self.db.record(TSDBModel.users_affected_by_group, 1, ["a", "b"], end - timedelta(hours=1))
+
+        def get_totals():
+            return self.db.get_distinct_counts_totals(
+                TSDBModel.users_affected_by_group, [1], self.start, end, rollup=ONE_HOUR
+            )
+
+        assert get_totals() == {1: 2}
+
+        self.backend.record(TSDBModel.users_affected_by_group, 1, ["c"], end - timedelta(hours=1))
+        assert get_totals() == {1: 2}
+
+        self.db.merge_distinct_counts(TSDBModel.users_affected_by_group, 1, [])
+        assert get_totals() == {1: 3}
+
+        # Ranges which include the open bucket are never cached
+        assert self.db.get_distinct_counts_totals(
+            TSDBModel.users_affected_by_group, [1], self.start, self.now, rollup=ONE_HOUR
+        ) == {1: 3}
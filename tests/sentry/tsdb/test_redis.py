@@ -188,6 +188,73 @@ class RedisTSDBTest(TestCase):
         results = self.db.get_sums(TSDBModel.project, [1, 2], dts[0], dts[-1], environment_id=1)
         assert results == {1: 0, 2: 0}
 
+    def test_get_range_matrix(self):
+        now = datetime.now(timezone.utc) - timedelta(hours=4)
+        dts = [now + timedelta(hours=i) for i in range(4)]
+
+        self.db.incr(TSDBModel.project, 1, dts[0])
+        self.db.incr(TSDBModel.project, 2, dts[1], count=2)
+        self.db.incr(TSDBModel.project, "foo", dts[3], count=3, environment_id=1)
+
+        matrix = self.db.get_range_matrix(TSDBModel.project, [1, 2, "foo"], dts[0], dts[-1])
+        assert len(matrix.series) == 4
+        assert list(matrix.row(0)) == [1, 0, 0, 0]
+        assert list(matrix.row(1)) == [0, 2, 0, 0]
+        assert list(matrix.row(2)) == [0, 0, 0, 3]
+        assert matrix.to_range() == self.db.get_range(
+            TSDBModel.project, [1, 2, "foo"], dts[0], dts[-1]
+        )
+        assert self.db.get_sums(TSDBModel.project, [1, 2, "foo"], dts[0], dts[-1]) == {
+            1: 1,
+            2: 2,
+            "foo": 3,
+        }
+
+        matrix = self.db.get_range_matrix(
+            TSDBModel.project, [1, "foo"], dts[0], dts[-1], environment_ids=[1]
+        )
+        assert matrix.sums() == {1: 0, "foo": 3}
+
+    def test_coalesced_incrs(self):
+        self.db.incr_flush_interval = 3600
+        now = datetime.now(timezone.utc) - timedelta(hours=1)
+        t = int(to_timestamp(now))
+        bucket = t - (t % 3600)
+
+        self.db.incr(TSDBModel.project, 1, now)
+        self.db.incr(TSDBModel.project, 1, now, count=2)
+        self.db.incr_multi(
+            [(TSDBModel.project, 1), (TSDBModel.project, 2)], now, count=3, environment_id=1
+        )
+
+        # Nothing is written until the pending increments are flushed
+        assert self.db.get_range(TSDBModel.project, [1], now, now) == {1: [(bucket, 0)]}
+        # Increments of the same field are merged: projects 1 and 2, without and
+        # with environment, in every rollup
+        assert self.db._pending_fields == 4 * len(self.db.rollups)
+
+        self.db.flush_incrs()
+
+        assert self.db.get_range(TSDBModel.project, [1, 2], now, now) == {
+            1: [(bucket, 6)],
+            2: [(bucket, 3)],
+        }
+        assert self.db.get_range(TSDBModel.project, [1, 2], now, now, environment_ids=[1]) == {
+            1: [(bucket, 3)],
+            2: [(bucket, 3)],
+        }
+
+        hash_key, _ = self.db.make_counter_key(TSDBModel.project, ONE_HOUR, now, 1, None)
+        with self.db.cluster.map() as client:
+            ttl = client.ttl(hash_key)
+        assert ttl.value > 0
+
+        self.db.incr(TSDBModel.project, 1, now)
+        self.db.incr_max_pending = 1
+        self.db.incr(TSDBModel.project, 1, now)
+        assert self.db._pending_fields == 0
+        assert self.db.get_range(TSDBModel.project, [1], now, now) == {1: [(bucket, 8)]}
+
     def test_count_distinct(self):
         now = datetime.now(timezone.utc) - timedelta(hours=4)
         dts = [now + timedelta(hours=i) for i in range(4)]
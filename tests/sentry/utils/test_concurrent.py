@@ -9,6 +9,7 @@ import pytest
 
 from sentry.utils.concurrent import (
     FutureSet,
+    PeriodicFlusher,
     SynchronousExecutor,
     ThreadedExecutor,
     TimedFuture,
@@ -282,3 +283,50 @@ def test_threaded_executor():
     low_priority_waiting.set()  # let the task finish
     assert low_priority_future.result(timeout=1) == 2
     assert low_priority_future.done()
+
+
+def test_periodic_flusher():
+    flushed = Event()
+    with mock.patch("sentry.utils.concurrent.atexit.register") as register:
+        flusher = PeriodicFlusher("test-flusher", 0.01, flushed.set)
+    register.assert_called_once_with(flusher._flush_at_exit)
+
+    flusher.ensure_started()
+    assert flushed.wait(5)
+
+
+def test_periodic_flusher_exit():
+    flush = mock.Mock()
+    with mock.patch("sentry.utils.concurrent.atexit.register"), mock.patch(
+        "sentry.utils.concurrent.threading.Thread"
+    ):
+        flusher = PeriodicFlusher("test-flusher", 60, flush)
+
+        with mock.patch("sentry.utils.concurrent.os.getpid", return_value=1):
+            flusher.ensure_started()
+            flusher._flush_at_exit()
+        assert flush.call_count == 1
+
+        # A forked child which never started its thread has nothing of its own
+        with mock.patch("sentry.utils.concurrent.os.getpid", return_value=2):
+            flusher._flush_at_exit()
+        assert flush.call_count == 1
+
+
+def test_periodic_flusher_fork():
+    on_fork = mock.Mock()
+    with mock.patch("sentry.utils.concurrent.atexit.register"), mock.patch(
+        "sentry.utils.concurrent.threading.Thread"
+    ) as thread:
+        flusher = PeriodicFlusher("test-flusher", 60, mock.Mock(), on_fork=on_fork)
+
+        with mock.patch("sentry.utils.concurrent.os.getpid", return_value=1):
+            flusher.ensure_started()
+            flusher.ensure_started()
+        assert thread.call_count == 1
+        assert on_fork.call_count == 0
+
+        with mock.patch("sentry.utils.concurrent.os.getpid", return_value=2):
+            flusher.ensure_started()
+        assert thread.call_count == 2
+        assert on_fork.call_count == 1
@@ -1,28 +1,39 @@
+import threading
+import time
 import unittest
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
 from unittest import mock
 
 import pytest
 from django.utils import timezone as django_timezone
+from snuba_sdk import Column, Entity, Query, Request
 from urllib3 import HTTPConnectionPool
-from urllib3.exceptions import HTTPError, ReadTimeoutError
+from urllib3.exceptions import HTTPError, ProtocolError, ReadTimeoutError
 
 from sentry.models.grouprelease import GroupRelease
 from sentry.models.project import Project
 from sentry.models.release import Release
 from sentry.snuba.dataset import Dataset
 from sentry.testutils.cases import TestCase
+from sentry.utils import snuba
 from sentry.utils.snuba import (
     ROUND_UP,
+    RateLimitExceeded,
     RetrySkipTimeout,
+    SnubaError,
     SnubaQueryParams,
+    StreamedResult,
+    UnexpectedResponseError,
     UnqualifiedQueryError,
+    _apply_cache_and_build_results,
     _prepare_query_params,
     get_json_type,
     get_query_params_to_update_for_projects,
     get_snuba_column_name,
     get_snuba_translators,
     quantize_time,
+    stream_snuba_query,
 )
 
 
@@ -409,6 +420,222 @@ class QuantizeTimeTest(unittest.TestCase):
         assert i != j
 
 
+def run_queries(*queries, use_cache=True):
+    return _apply_cache_and_build_results(
+        [(query, lambda x: x, lambda x: x) for query in queries], use_cache=use_cache
+    )
+
+
+def fake_results(query_params, headers):
+    return [{"data": [{"count": params[0]["count"]}], "meta": []} for params in query_params]
+
+
+@mock.patch("sentry.utils.snuba._bulk_snuba_query", side_effect=fake_results)
+class QueryCacheTest(TestCase):
+    def test_caches_results(self, bulk_query):
+        assert run_queries({"test": "cache", "count": 1}, {"test": "cache", "count": 2}) == [
+            {"data": [{"count": 1}], "meta": []},
+            {"data": [{"count": 2}], "meta": []},
+        ]
+        assert run_queries({"test": "cache", "count": 2}, {"test": "cache", "count": 3}) == [
+            {"data": [{"count": 2}], "meta": []},
+            {"data": [{"count": 3}], "meta": []},
+        ]
+
+        assert [
+            [params[0]["count"] for params in call.args[0]] for call in bulk_query.mock_calls
+        ] == [
+            [1, 2],
+            [3],
+        ]
+
+        run_queries({"test": "cache", "count": 1}, use_cache=False)
+        assert bulk_query.call_count == 3
+
+    @mock.patch("sentry.utils.snuba._revalidation_pool")
+    @mock.patch("sentry.utils.snuba_cache.get_cache_ttls", return_value=(-1, 3600))
+    def test_serves_stale_results(self, get_cache_ttls, revalidation_pool, bulk_query):
+        revalidation_pool.submit.side_effect = lambda fn: fn()
+
+        assert run_queries({"test": "stale", "count": 1}) == [{"data": [{"count": 1}], "meta": []}]
+        assert bulk_query.call_count == 1
+
+        # The stale result is returned and refreshed in the background
+        bulk_query.side_effect = lambda query_params, headers: [{"data": [], "meta": []}]
+        assert run_queries({"test": "stale", "count": 1}) == [{"data": [{"count": 1}], "meta": []}]
+        assert bulk_query.call_count == 2
+        assert run_queries({"test": "stale", "count": 1}) == [{"data": [], "meta": []}]
+
+    def test_coalesces_identical_queries(self, bulk_query):
+        started = threading.Event()
+        release = threading.Event()
+
+        def slow_results(query_params, headers):
+            started.set()
+            release.wait(5)
+            return fake_results(query_params, headers)
+
+        bulk_query.side_effect = slow_results
+        query = {"test": "coalesce", "count": 1}
+
+        with mock.patch.object(
+            snuba._query_single_flight, "claim", wraps=snuba._query_single_flight.claim
+        ) as claim, ThreadPoolExecutor(2) as pool:
+            first = pool.submit(run_queries, query)
+            assert started.wait(5)
+            second = pool.submit(run_queries, query)
+            deadline = time.monotonic() + 5
+            while claim.call_count < 2 and time.monotonic() < deadline:
+                time.sleep(0.01)
+            release.set()
+
+            [first_result] = first.result()
+            [second_result] = second.result()
+
+        assert bulk_query.call_count == 1
+        assert first_result == second_result == {"data": [{"count": 1}], "meta": []}
+        assert first_result is not second_result
+
+    def test_shares_failures(self, bulk_query):
+        bulk_query.side_effect = snuba.RateLimitExceeded("limited")
+        with pytest.raises(snuba.RateLimitExceeded):
+            run_queries({"test": "failure", "count": 1})
+
+        # Failed queries don't stay in flight
+        bulk_query.side_effect = fake_results
+        assert run_queries({"test": "failure", "count": 1}) == [
+            {"data": [{"count": 1}], "meta": []}
+        ]
+
+
+def chunked(data: bytes, size: int) -> list[bytes]:
+    return [data[i : i + size] for i in range(0, len(data), size)]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 7, 1024])
+def test_streamed_result(chunk_size):
+    data = (
+        b'{"meta": [{"name": "title"}], "data": [{"title": "caf\xc3\xa9", "count": 12345},'
+        b' {"title": "\\"]}", "count": 1.5}, {"title": null, "count": [1, 2]}],'
+        b' "timing": {"duration_ms": 10}, "totals": 98765}'
+    )
+    result = StreamedResult(chunked(data, chunk_size))
+    assert result.body == {"meta": [{"name": "title"}]}
+    assert not result.complete
+
+    assert list(result) == [
+        {"title": "caf\xe9", "count": 12345},
+        {"title": '"]}', "count": 1.5},
+        {"title": None, "count": [1, 2]},
+    ]
+    assert result.body == {
+        "meta": [{"name": "title"}],
+        "timing": {"duration_ms": 10},
+        "totals": 98765,
+    }
+    assert result.complete
+
+    with pytest.raises(RuntimeError):
+        list(result)
+
+
+def test_streamed_result_translation():
+    result = StreamedResult(
+        [b'{"data": [{"a": 1}, {"a": 2}]}'], reverse=lambda row: {"b": row["a"] * 2}
+    )
+    assert list(result) == [{"b": 2}, {"b": 4}]
+
+    result = StreamedResult([b'{"data": [], "meta": []}'])
+    assert list(result) == []
+    assert result.body == {"meta": []}
+
+    with pytest.raises(UnexpectedResponseError):
+        list(StreamedResult([b'{"data": [{"a": 1}, {"a":']))
+
+
+class StreamSnubaQueryTest(TestCase):
+    def make_request(self) -> Request:
+        return Request(
+            dataset="events",
+            app_id="test",
+            query=Query(match=Entity("events"), select=[Column("event_id")]),
+        )
+
+    @mock.patch("sentry.utils.snuba._raw_snql_query")
+    def test_stream(self, raw_snql_query):
+        response = raw_snql_query.return_value
+        response.status = 200
+        response.stream.return_value = iter(
+            chunked(b'{"data": [{"event_id": "a"}, {"event_id": "b"}], "meta": []}', 4)
+        )
+
+        with stream_snuba_query(self.make_request(), referrer="search") as result:
+            assert next(iter(result)) == {"event_id": "a"}
+
+        assert raw_snql_query.call_args.kwargs["preload_content"] is False
+        # The remaining rows were never read, so the connection is not reused
+        assert response.close.called
+        assert response.release_conn.called
+
+    @mock.patch("sentry.utils.snuba._query_scheduler")
+    @mock.patch("sentry.utils.snuba._raw_snql_query")
+    def test_stream_holds_slot(self, raw_snql_query, query_scheduler):
+        response = raw_snql_query.return_value
+        response.status = 200
+        response.stream.return_value = iter([b'{"data": [{"event_id": "a"}], "meta": []}'])
+        slot = query_scheduler.slot.return_value
+
+        with stream_snuba_query(self.make_request(), referrer="search") as result:
+            assert list(result) == [{"event_id": "a"}]
+            assert slot.__enter__.called
+            assert not slot.__exit__.called
+
+        assert slot.__exit__.called
+        query_scheduler.slot.assert_called_once_with("search")
+
+    @mock.patch("sentry.utils.snuba._raw_snql_query")
+    def test_stream_truncated(self, raw_snql_query):
+        response = raw_snql_query.return_value
+        response.status = 200
+        response.stream.return_value = iter([b'{"data": [{"event_id": "a"}, {"event_'])
+
+        rows = []
+        with pytest.raises(UnexpectedResponseError):
+            with stream_snuba_query(self.make_request(), referrer="search") as result:
+                rows.extend(result)
+        assert rows == [{"event_id": "a"}]
+        assert response.close.called
+
+    @mock.patch("sentry.utils.snuba._raw_snql_query")
+    def test_stream_connection_dropped(self, raw_snql_query):
+        def stream(chunk_size):
+            yield b'{"data": [{"event_id": "a"}, '
+            raise ProtocolError("Connection broken")
+
+        response = raw_snql_query.return_value
+        response.status = 200
+        response.stream.side_effect = stream
+
+        rows = []
+        with pytest.raises(SnubaError):
+            with stream_snuba_query(self.make_request(), referrer="search") as result:
+                rows.extend(result)
+        assert rows == [{"event_id": "a"}]
+        assert response.close.called
+
+    @mock.patch("sentry.utils.snuba._raw_snql_query")
+    def test_stream_error(self, raw_snql_query):
+        response = raw_snql_query.return_value
+        response.status = 429
+        response.read.return_value = b'{"error": {"type": "rate-limited", "message": "limited"}}'
+
+        with pytest.raises(RateLimitExceeded):
+            with stream_snuba_query(self.make_request(), referrer="search"):
+                pass
+
+        assert response.release_conn.called
+
+
 class FakeConnectionPool(HTTPConnectionPool):
     def __init__(self, connection, **kwargs):
         self.connection = connection
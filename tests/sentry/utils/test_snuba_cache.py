@@ -0,0 +1,99 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from django.test.utils import override_settings
+from snuba_sdk import Column, Condition, Entity, Op, Query, Request
+
+from sentry.utils.snuba_cache import (
+    FORMAT_JSON,
+    FORMAT_MSGPACK,
+    SingleFlight,
+    decode_result,
+    encode_result,
+    get_cache_ttls,
+    get_query_end,
+)
+
+
+def make_request(start: datetime, end: datetime) -> Request:
+    return Request(
+        dataset="events",
+        app_id="test",
+        query=Query(
+            match=Entity("events"),
+            select=[Column("event_id")],
+            where=[
+                Condition(Column("project_id"), Op.EQ, 1),
+                Condition(Column("timestamp"), Op.GTE, start),
+                Condition(Column("timestamp"), Op.LT, end),
+            ],
+        ),
+    )
+
+
+@pytest.mark.parametrize(
+    "result",
+    [
+        {"data": [{"a": 1, "b": "x"}, {"a": None, "b": "y"}], "meta": [{"name": "a"}]},
+        {"data": [{"a": 1}, {"b": 2.5}], "totals": {"a": 1}},
+        {"data": [], "meta": []},
+        {"meta": []},
+    ],
+)
+def test_encode_result(result):
+    payload = encode_result(result)
+    assert payload[:1] == FORMAT_MSGPACK
+    assert decode_result(payload) == result
+
+
+def test_encode_result_fallback():
+    timestamp = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    payload = encode_result({"data": [{"time": timestamp}]})
+    assert payload[:1] == FORMAT_JSON
+    assert decode_result(payload) == {"data": [{"time": "2024-01-01T00:00:00.000000Z"}]}
+
+
+def test_get_query_end():
+    end = datetime(2024, 1, 1)
+    assert get_query_end(make_request(end - timedelta(days=1), end)) == end.replace(
+        tzinfo=timezone.utc
+    )
+    assert get_query_end({"conditions": []}) is None
+
+
+@override_settings(
+    SENTRY_SNUBA_CACHE_TTL_SECONDS=60,
+    SENTRY_SNUBA_CACHE_SETTLED_SECONDS=300,
+    SENTRY_SNUBA_CACHE_HISTORICAL_TTL_SECONDS=600,
+    SENTRY_SNUBA_CACHE_STALE_TTL_SECONDS=3600,
+    SENTRY_SNUBA_CACHE_REFERRER_TTL_SECONDS={"dashboards": 120},
+)
+def test_get_cache_ttls():
+    now = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    live = make_request(now - timedelta(days=1), now)
+    settling = make_request(now - timedelta(days=1), now - timedelta(minutes=1))
+    historical = make_request(now - timedelta(days=2), now - timedelta(days=1))
+
+    assert get_cache_ttls(None, live, now.timestamp()) == (60, 0)
+    assert get_cache_ttls(None, settling, now.timestamp()) == (60, 0)
+    assert get_cache_ttls(None, historical, now.timestamp()) == (600, 3600)
+    assert get_cache_ttls(None, {}, now.timestamp()) == (60, 0)
+
+    assert get_cache_ttls("dashboards", live, now.timestamp()) == (120, 0)
+    assert get_cache_ttls("dashboards", historical, now.timestamp()) == (120, 3600)
+
+
+def test_single_flight():
+    calls = SingleFlight()
+
+    future, is_leader = calls.claim("a")
+    assert is_leader
+    assert calls.claim("a") == (future, False)
+    calls.resolve("a", 1)
+    assert future.result() == 1
+
+    future, is_leader = calls.claim("a")
+    assert is_leader
+    calls.fail("a", ValueError("failed"))
+    with pytest.raises(ValueError):
+        future.result()
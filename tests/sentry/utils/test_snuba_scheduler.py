@@ -0,0 +1,211 @@
+import threading
+from collections import Counter
+from collections.abc import Generator
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from time import sleep
+from unittest import mock
+
+import pytest
+from snuba_sdk import Column, Entity, Query, Request
+
+from sentry.net.http import connection_from_url
+from sentry.utils import json
+from sentry.utils.snuba import RateLimitExceeded, bulk_snuba_queries
+from sentry.utils.snuba_scheduler import QueryScheduler
+
+
+def wait_until(condition, timeout=5.0):
+    for _ in range(int(timeout / 0.01)):
+        if condition():
+            return
+        sleep(0.01)
+    raise AssertionError("condition was not met in time")
+
+
+def test_referrer_limits():
+    scheduler = QueryScheduler(max_concurrency=4, referrer_limits={"api.dashboards.": 2})
+    scheduler.acquire("api.dashboards.widget.table")
+    scheduler.acquire("api.dashboards.widget.line-chart")
+
+    # All dashboard referrers share two slots, other referrers are not affected
+    blocked = threading.Thread(target=scheduler.acquire, args=("api.dashboards.widget.table",))
+    blocked.start()
+    scheduler.acquire("search")
+    assert blocked.is_alive()
+
+    scheduler.release("api.dashboards.widget.line-chart", 0.1)
+    blocked.join(5)
+    assert not blocked.is_alive()
+
+
+def test_referrer_share():
+    scheduler = QueryScheduler(max_concurrency=4, referrer_share=0.5)
+    scheduler.acquire("search")
+    scheduler.acquire("search")
+
+    blocked = threading.Thread(target=scheduler.acquire, args=("search",))
+    blocked.start()
+    scheduler.acquire("api.group-events")
+    assert blocked.is_alive()
+
+    scheduler.release("search", 0.1)
+    blocked.join(5)
+    assert not blocked.is_alive()
+
+
+def test_priorities():
+    scheduler = QueryScheduler(
+        max_concurrency=1, referrer_priorities={"alerts.": 10, "api.dashboards.": -1}
+    )
+    scheduler.acquire("search")
+
+    admitted = []
+
+    def acquire(referrer):
+        scheduler.acquire(referrer)
+        admitted.append(referrer)
+
+    threads = []
+    for referrer in ("api.dashboards.widget.table", "search", "alerts.rule"):
+        thread = threading.Thread(target=acquire, args=(referrer,))
+        thread.start()
+        threads.append(thread)
+        wait_until(lambda: len(scheduler._waiters) == len(threads))
+
+    held = "search"
+    for index in range(len(threads)):
+        scheduler.release(held, 0.1)
+        wait_until(lambda: len(admitted) == index + 1)
+        held = admitted[-1]
+
+    for thread in threads:
+        thread.join(5)
+    assert admitted == ["alerts.rule", "search", "api.dashboards.widget.table"]
+
+
+def test_adaptive_limit():
+    scheduler = QueryScheduler(max_concurrency=8, min_concurrency=2, target_latency=1.0)
+    assert scheduler.limit == 8
+
+    scheduler.throttled()
+    assert scheduler.limit == 4
+    scheduler.throttled()
+    scheduler.throttled()
+    assert scheduler.limit == 2
+
+    # Fast queries grow the limit by about one slot per round of queries
+    for _ in range(3):
+        scheduler.acquire("search")
+        scheduler.release("search", 0.1)
+    assert scheduler.limit == 3
+
+    # Slow queries shrink it again
+    for _ in range(4):
+        scheduler.acquire("search")
+        scheduler.release("search", 2.0)
+    assert scheduler.limit == 2
+
+    for _ in range(100):
+        scheduler.acquire("search")
+        scheduler.release("search", 0.1)
+    assert scheduler.limit == 8
+
+
+@dataclass
+class FakeSnuba:
+    """
+    Answers SnQL queries like Snuba would, after `delay` seconds and with the
+    given `status`, and records how many queries of each referrer were
+    running at the same time.
+    """
+
+    url: str
+    delay: float = 0.1
+    status: int = 200
+    running: Counter[str] = field(default_factory=Counter)
+    max_running: Counter[str] = field(default_factory=Counter)
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+
+@pytest.fixture
+def fake_snuba() -> Generator[FakeSnuba, None, None]:
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            self.rfile.read(int(self.headers["Content-Length"]))
+            referrer = self.headers.get("referer", "<unknown>")
+            with snuba.lock:
+                snuba.running[referrer] += 1
+                snuba.max_running[referrer] = max(
+                    snuba.max_running[referrer], snuba.running[referrer]
+                )
+            try:
+                sleep(snuba.delay)
+                if snuba.status == 200:
+                    body = {"data": [{"count": 1}], "meta": [{"name": "count", "type": "UInt64"}]}
+                else:
+                    body = {"error": {"type": "rate-limited", "message": "too many queries"}}
+                data = json.dumps(body).encode("utf-8")
+                self.send_response(snuba.status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+            finally:
+                with snuba.lock:
+                    snuba.running[referrer] -= 1
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    snuba = FakeSnuba(url=f"http://127.0.0.1:{server.server_address[1]}")
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        with mock.patch(
+            "sentry.utils.snuba._snuba_pool", connection_from_url(snuba.url, maxsize=20)
+        ), mock.patch("sentry.utils.snuba._query_thread_pool", ThreadPoolExecutor(max_workers=20)):
+            yield snuba
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def make_request() -> Request:
+    return Request(
+        dataset="events",
+        app_id="test",
+        query=Query(match=Entity("events"), select=[Column("event_id")]),
+        tenant_ids={"organization_id": 1},
+    )
+
+
+def test_bulk_queries_respect_referrer_limits(fake_snuba):
+    scheduler = QueryScheduler(max_concurrency=8, referrer_limits={"api.dashboards.": 2})
+    with mock.patch("sentry.utils.snuba._query_scheduler", scheduler):
+        with ThreadPoolExecutor(2) as pool:
+            dashboard = pool.submit(
+                bulk_snuba_queries,
+                [make_request() for _ in range(6)],
+                "api.dashboards.widget.line-chart",
+            )
+            search = pool.submit(bulk_snuba_queries, [make_request() for _ in range(3)], "search")
+
+            assert len(dashboard.result()) == 6
+            assert len(search.result()) == 3
+
+    assert fake_snuba.max_running["api.dashboards.widget.line-chart"] == 2
+    assert fake_snuba.max_running["search"] == 3
+
+
+def test_rate_limited_queries_shrink_the_limit(fake_snuba):
+    fake_snuba.status = 429
+    scheduler = QueryScheduler(max_concurrency=8)
+    with mock.patch("sentry.utils.snuba._query_scheduler", scheduler):
+        with pytest.raises(RateLimitExceeded):
+            bulk_snuba_queries([make_request()], "search")
+
+    assert scheduler.limit == 4
+    assert not scheduler._running_by_group